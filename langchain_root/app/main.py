@@ -1,15 +1,25 @@
 # app/main.py
 
+import argparse
+
 from src.utils.config import AppConfig
 from src.sql.db import SqlStore
 from src.crawler.rss_crawler import fetch_rss_docs
 from src.llm.solar import SolarClient
 from src.vector_store.indexer import Indexer
+from src.vector_store.chunker import TokenChunker
 from src.qa.answerer import Answerer
+from src.sql.journal import IndexJournal
+from src.sql.job_queue import IndexQueue
+from src.sql.collection_registry import CollectionRegistry
+from src.sql.lexical_index import LexicalIndex
+from src.vector_store.indexer import ChromaStore
+from src.utils.tracing import configure_from_config, summarize_jsonl
 
 class MainApp:
     def __init__(self):
         self.cfg = AppConfig()
+        configure_from_config(self.cfg)
         print("[INIT] 환경 로드 완료")
         print(f" - APP_ENV       : {self.cfg.env}")
         print(f" - CHROMA_DIR    : {self.cfg.chroma_dir}")
@@ -25,12 +35,14 @@ class MainApp:
         """
         store = SqlStore(self.cfg.sqlite_path)              # DB 연결(없으면 생성)
         docs = fetch_rss_docs(self.cfg.rss_list, per_feed_limit=20)  # RSS 2개 x 최대 20개
-        inserted = 0
+        new_ids = []
         for d in docs:
-            doc_id = store.upsert_document(d)               # 중복이면 기존 id 반환
-            if doc_id:
-                inserted += 1
-        print(f"[INGEST] new docs inserted: {inserted} / fetched: {len(docs)}")
+            doc_id, created = store.insert_or_get(d)        # 중복이면 기존 id 반환
+            if created:
+                new_ids.append(doc_id)
+        # 새 문서는 색인 큐에 넣어 두면 워커(python -m app.worker)가 바로 색인
+        IndexQueue(self.cfg.sqlite_path).enqueue(new_ids)
+        print(f"[INGEST] new docs inserted: {len(new_ids)} / fetched: {len(docs)} (index queue에 추가)")
 
     # 2) 인덱싱: 청킹/임베딩 → Chroma 업서트
     def run_index(self):
@@ -43,29 +55,99 @@ class MainApp:
         """
         store = SqlStore(self.cfg.sqlite_path)
         solar = SolarClient(api_key=self.cfg.solar_api_key)
+        chunker = TokenChunker.from_config(self.cfg.chunking)   # configs/chunking.yaml
 
         indexer = Indexer(
             store=store,
             chroma_dir=self.cfg.chroma_dir,
             solar_client=solar,
-            # 필요하면 configs로 빼서 조정 가능
-            max_chars=1200,
-            overlap=120,
-            min_chunk_chars=200,
+            chunker=chunker,
+            min_chunk_chars=chunker.min_chars,
             batch_size=16,
+            shard_by=self.cfg.shard_by,
         )
 
-        result = indexer.index_recent(limit_docs=100)  # 최근 N개만 색인
+        result = indexer.index_recent(limit_docs=100)  # 최근 N개만 색인 (멈춘 job이 있으면 이어서)
         print("[INDEX RESULT]", result)
 
+    # 2-1) 전체 재색인(blue/green): 새 컬렉션에 색인 → 검증 → 별칭 전환
+    def run_rebuild(self):
+        """
+        청커 설정(chunking.yaml)이나 임베딩 모델을 바꾼 뒤 전체 문서를 새 컬렉션에 다시 색인합니다.
+        검증을 통과해야 검색 별칭(ai_news_rag)이 새 컬렉션으로 바뀌고, 그동안 검색은 기존 컬렉션으로 계속 됩니다.
+        """
+        chunker = TokenChunker.from_config(self.cfg.chunking)
+        indexer = Indexer(
+            store=SqlStore(self.cfg.sqlite_path),
+            chroma_dir=self.cfg.chroma_dir,
+            solar_client=SolarClient(api_key=self.cfg.solar_api_key),
+            chunker=chunker,
+            min_chunk_chars=chunker.min_chars,
+            batch_size=16,
+            shard_by=self.cfg.shard_by,
+        )
+        result = indexer.rebuild()
+        print("[REBUILD RESULT]", result)
+        return result
+
+    # 2-2) 색인 작업(job) 진행 상황 조회
+    def run_index_status(self, limit: int = 5):
+        """저널에 기록된 최근 색인 job들의 문서별 진행(청킹/임베딩/업서트)을 출력합니다."""
+        registry = CollectionRegistry(self.cfg.sqlite_path)
+        live, version = registry.resolve("ai_news_rag")
+        print(f"[COLLECTION] ai_news_rag → {live} (version {version})")
+        for v in registry.versions("ai_news_rag"):
+            print(f"  - {v['collection']:<60} {v['status']:<8} chunks={v['chunks']}  created={v['created_at']}")
+
+        journal = IndexJournal(self.cfg.sqlite_path)
+        jobs = journal.status(limit=limit)
+        if not jobs:
+            print("[INDEX STATUS] 기록된 색인 작업이 없습니다.")
+            return jobs
+        for j in jobs:
+            print(f"[JOB {j['job_id']}] {j['status']:<7} version={j['index_version']}  "
+                  f"started={j['started_at']}  updated={j['updated_at']}")
+            print(f"  docs   : chunked {j['docs_chunked']}/{j['docs_total']}  "
+                  f"embedded {j['docs_embedded']}/{j['docs_total']}  upserted {j['docs_upserted']}/{j['docs_total']}")
+            print(f"  chunks : embedded {j['chunks_embedded']}/{j['chunks_total']}  "
+                  f"upserted {j['chunks_upserted']}/{j['chunks_total']}")
+            if j["error"]:
+                print(f"  error  : {j['error']}")
+        return jobs
+
+    # 2-3) 월별 샤드 목록/보관/삭제
+    def run_shards(self, action: str = "list", before: str | None = None):
+        """
+        월별 샤드(vector_store.shard_by: month) 관리.
+        - list: 샤드별 상태/청크 수
+        - archive: before(YYYY_MM)보다 이른 샤드를 검색에서 뺌 (데이터 유지, 다시 쓰려면 registry 상태만 active로)
+        - drop: before보다 이른 샤드를 컬렉션째 삭제
+        """
+        registry = CollectionRegistry(self.cfg.sqlite_path)
+        vdb = ChromaStore(
+            self.cfg.chroma_dir, registry=registry, lexical=LexicalIndex(self.cfg.sqlite_path), shard_by="month",
+        )
+        if action in ("archive", "drop"):
+            if not before:
+                raise SystemExit("--before YYYY_MM 이 필요합니다.")
+            done = vdb.archive_shards(before) if action == "archive" else vdb.drop_shards(before)
+            print(f"[SHARDS] {action}: {len(done)}개 {done}")
+        print(f"[SHARDS] {vdb.name}")
+        for sh in registry.shard_list(vdb.name):
+            try:
+                count = vdb.client.get_collection(sh["shard"]).count() if sh["status"] != "dropped" else 0
+            except Exception:
+                count = 0
+            print(f"  - {sh['shard']:<70} {sh['status']:<8} chunks={count}  updated={sh['updated_at']}")
+
     # 3) 검색+생성: Top-k 검색 → LLM 답변 생성(+출처)
         # 3) 검색+생성: Top-k 검색 → LLM 답변 생성(+출처)
-    def run_qa(self, question: str):
+    def run_qa(self, question: str, cascade: bool = False):
         """
         질문 한 번으로:
           - Retriever로 Top-k 근거 검색
           - PromptBuilder로 프롬프트 조립
-          - Solar LLM(mini/pro)로 생성
+          - Solar LLM(mini/pro)로 생성 (cascade면 mini 먼저, 필요할 때만 pro)
         결과를 콘솔에 보기 좋게 출력합니다.
         """
         print(f"[QA    ] Q: {question}")
@@ -78,17 +160,24 @@ class MainApp:
             mmr_lambda=0.3,
         )
 
-        # 같은 컨텍스트로 두 모델 결과를 나란히 비교
-        results = answerer.answer_multi(
-            question=question,
-            models=["solar-pro", "solar-mini"],
-            max_tokens=320,
-            extra_instructions=None,  # 필요하면 "불릿 3개 이내" 등 추가
-        )
+        if cascade:
+            results = [answerer.answer_cascade(question=question, max_tokens=320)]
+            c = results[0].get("cascade") or {}
+            if c:
+                print(f"[CASCADE] {' → '.join(c['models'])}  reasons={c['reasons']}  coverage={c['coverage']}  "
+                      f"saved_ms={c['saved_ms']}  saved_cost={c['saved_cost']}")
+        else:
+            # 같은 컨텍스트로 두 모델 결과를 나란히 비교
+            results = answerer.answer_multi(
+                question=question,
+                models=["solar-pro", "solar-mini"],
+                max_tokens=320,
+                extra_instructions=None,  # 필요하면 "불릿 3개 이내" 등 추가
+            )
 
         # 콘솔 출력(모델별 답변 + 출처)
         for res in results:
-            print(f"\n=== [{res['model']}] ===")
+            print(f"\n=== [{res['model']}] ===" + (" (cached)" if res.get("cached") else ""))
             print(res["answer"].strip())
 
             # Sources 요약
@@ -106,12 +195,54 @@ class MainApp:
         # 필요 시 상위 레벨에서 활용할 수 있도록 반환
         return results
     
+    def run_traces(self, last: int = 0):
+        """jsonl 트레이스 파일 → 단계(span)별 p50/p95/p99 (p99 높은 순). 어디서 꼬리 지연이 나는지 볼 때."""
+        opts = (self.cfg.app.get("logging", {}) or {}).get("tracing", {}) or {}
+        path = opts.get("path", "data/traces.jsonl")
+        try:
+            rows = summarize_jsonl(path, last=last)
+        except FileNotFoundError:
+            print(f"[TRACE ] {path} 없음 (logging.tracing.backend: jsonl 로 켜고 실행해 보세요)")
+            return []
+        print(f"[TRACE ] {path}" + (f" (최근 span {last}개)" if last else ""))
+        print(f"{'span':<30}{'count':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for r in rows:
+            print(f"{r['name']:<30}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+        return rows
+
 def main():
+    parser = argparse.ArgumentParser(description="AI 뉴스 RAG 파이프라인")
+    parser.add_argument(
+        "command", nargs="?", default="all",
+        choices=["all", "ingest", "index", "rebuild", "index-status", "shards", "archive-shards", "drop-shards", "qa", "traces"],
+        help="all(기본): 수집→색인→QA 전체 실행",
+    )
+    parser.add_argument("-q", "--question", default="최근 생성형 AI 규제 동향을 요약해줘.")
+    parser.add_argument("--before", default=None, help="archive-shards/drop-shards: 이 달(YYYY_MM)보다 이른 샤드")
+    parser.add_argument("--last", type=int, default=0, help="traces: 파일 끝에서 이만큼의 span만 집계 (0이면 전부)")
+    parser.add_argument("--cascade", action="store_true", help="qa: solar-mini로 먼저 답하고 필요할 때만 solar-pro")
+    args = parser.parse_args()
+
     app = MainApp()
+    if args.command == "traces":
+        app.run_traces(args.last)
+        return
+    if args.command in ("shards", "archive-shards", "drop-shards"):
+        app.run_shards({"shards": "list"}.get(args.command, args.command.split("-")[0]), args.before)
+        return
+    if args.command == "index-status":
+        app.run_index_status()
+        return
+    if args.command == "rebuild":
+        app.run_rebuild()
+        return
     # 워킹 스켈레톤: 전체 흐름 자리만 호출
-    app.run_ingest()  # 최신 뉴스 기사 수집
-    app.run_index()   # 수집한 기사를 청킹/임베딩해 벡터DB에 색인
-    app.run_qa("최근 생성형 AI 규제 동향을 요약해줘.")  # 검색+생성
+    if args.command in ("all", "ingest"):
+        app.run_ingest()  # 최신 뉴스 기사 수집
+    if args.command in ("all", "index"):
+        app.run_index()   # 수집한 기사를 청킹/임베딩해 벡터DB에 색인
+    if args.command in ("all", "qa"):
+        app.run_qa(args.question, cascade=args.cascade)  # 검색+생성
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
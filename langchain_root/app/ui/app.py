@@ -10,6 +10,11 @@ from src.sql.db import SqlStore
 from src.crawler.rss_crawler import fetch_rss_docs
 from src.llm.solar import SolarClient
 from src.vector_store.indexer import Indexer
+from src.vector_store.chunker import TokenChunker
+from src.sql.journal import IndexJournal
+from src.sql.job_queue import IndexQueue
+from src.sql.collection_registry import CollectionRegistry
+from src.utils.tracing import configure_from_config
 import os, sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 if ROOT not in sys.path:
@@ -23,6 +28,7 @@ st.title("📰 AI News RAG — QA & Evidence Viewer")
 
 if "cfg" not in st.session_state:
     st.session_state.cfg = AppConfig()
+    configure_from_config(st.session_state.cfg)
 if "answerer" not in st.session_state:
     st.session_state.answerer = Answerer(cfg=st.session_state.cfg)
 if "last_results" not in st.session_state:
@@ -40,7 +46,7 @@ with st.sidebar:
     # 모델 선택
     model_mode = st.radio(
         "Model",
-        options=("Both (pro & mini)", "solar-pro only", "solar-mini only"),
+        options=("Both (pro & mini)", "solar-pro only", "solar-mini only", "Cascade (mini → pro)"),
         index=0,
     )
 
@@ -71,34 +77,64 @@ with st.sidebar:
         store = SqlStore(cfg.sqlite_path)
         with st.spinner("Fetching RSS and extracting main content..."):
             docs = fetch_rss_docs(cfg.rss_list, per_feed_limit=20)
-            inserted = 0
+            new_ids = []
             for d in docs:
-                doc_id = store.upsert_document(d)
-                if doc_id:
-                    inserted += 1
-            st.success(f"INGEST 완료: 새 문서 {inserted} / 총 가져온 문서 {len(docs)}")
+                doc_id, created = store.insert_or_get(d)
+                if created:
+                    new_ids.append(doc_id)
+            IndexQueue(cfg.sqlite_path).enqueue(new_ids)
+            st.success(f"INGEST 완료: 새 문서 {len(new_ids)} / 총 가져온 문서 {len(docs)} (색인 큐에 추가)")
 
     # 색인(index)
     if st.button("Index: Chunk → Embed → Chroma upsert", use_container_width=True):
         cfg = st.session_state.cfg
         store = SqlStore(cfg.sqlite_path)
         solar = SolarClient(api_key=cfg.solar_api_key)
+        chunker = TokenChunker.from_config(cfg.chunking)
         indexer = Indexer(
             store=store,
             chroma_dir=cfg.chroma_dir,
             solar_client=solar,
-            max_chars=1200,
-            overlap=120,
-            min_chunk_chars=200,
+            chunker=chunker,
+            min_chunk_chars=chunker.min_chars,
             batch_size=16,
+            shard_by=cfg.shard_by,
         )
         with st.spinner("Indexing documents... (chunking/embedding/upsert)"):
             result = indexer.index_recent(limit_docs=100)
             st.success(f"INDEX 결과: {result}")
 
+    q = IndexQueue(st.session_state.cfg.sqlite_path).stats()
+    st.caption(f"Index queue: 대기 {q['ready']} · 처리 중 {q['leased']} · 실패 {q['dead']}  (워커: python -m app.worker)")
+
+    # 색인 작업 진행 상황(저널)
+    with st.expander("Index jobs (최근 5개)"):
+        jobs = IndexJournal(st.session_state.cfg.sqlite_path).status(limit=5)
+        if not jobs:
+            st.caption("기록된 색인 작업이 없습니다.")
+        for j in jobs:
+            st.markdown(f"**#{j['job_id']}** `{j['status']}` · {j['index_version']}")
+            st.caption(
+                f"docs upserted {j['docs_upserted']}/{j['docs_total']} · "
+                f"chunks embedded {j['chunks_embedded']}/{j['chunks_total']} · "
+                f"upserted {j['chunks_upserted']}/{j['chunks_total']} · updated {j['updated_at']}"
+            )
+            if j["error"]:
+                st.caption(f"error: {j['error']}")
+
     st.divider()
     st.caption(f"ENV: {st.session_state.cfg.env}")
     st.caption(f"Chroma: {st.session_state.cfg.chroma_dir}")
+    live, version = CollectionRegistry(st.session_state.cfg.sqlite_path).resolve("ai_news_rag")
+    st.caption(f"Collection: {live} (v{version})  · 전체 재색인: python -m app.main rebuild")
+    qc = st.session_state.answerer.retriever.query_cache.stats()
+    st.caption(f"Query embedding cache: hit {qc['hits']}/{qc['hits'] + qc['misses']} "
+               f"({qc['hit_rate']:.0%}) · {qc['size']}/{qc['max_size']}")
+    sc = st.session_state.answerer.retriever.semantic_cache
+    if sc is not None:
+        ss = sc.stats()
+        st.caption(f"Semantic cache: hit {ss['hits']} · near {ss['near_hits']} · miss {ss['misses']} "
+                   f"({ss['hit_rate']:.0%}, threshold {ss['threshold']})")
     st.caption(f"SQLite: {st.session_state.cfg.sqlite_path}")
 
 
@@ -142,7 +178,15 @@ with col_right:
 
         # 오케스트레이션 실행
         with st.spinner("Retrieving evidence and generating answers..."):
-            if len(models) == 1:
+            if model_mode == "Cascade (mini → pro)":
+                res = st.session_state.answerer.answer_cascade(
+                    question=question,
+                    max_tokens=max_tokens,
+                    extra_instructions=extra_ins or None,
+                )
+                st.session_state.last_results = [res]
+                st.session_state.last_sources = res["sources"]
+            elif len(models) == 1:
                 res = st.session_state.answerer.answer(
                     question=question,
                     model=models[0],
@@ -176,7 +220,18 @@ with col_right:
         # 모델별 답변 탭
         for i, r in enumerate(results):
             with tabs[i]:
-                st.markdown(f"**Model:** `{r['model']}`  |  **Top-k used:** {r['used_top_k']}")
+                cached = f"  |  ⚡ cached ({r.get('cache_age_s', 0):.0f}s ago)" if r.get("cached") else ""
+                st.markdown(f"**Model:** `{r['model']}`  |  **Top-k used:** {r['used_top_k']}{cached}")
+                if r.get("cascade"):
+                    c = r["cascade"]
+                    st.caption(
+                        f"cascade: {' → '.join(c['models'])}"
+                        + (f" (escalated: {', '.join(c['reasons'])})" if c["escalated"] else "")
+                        + f"  |  coverage {c['coverage']:.2f}  |  saved {c['saved_ms']:.0f} ms, ${c['saved_cost']:.5f}"
+                    )
+                    st.caption(f"cascade stats: {st.session_state.answerer.cascade_stats.snapshot()}")
+                if st.session_state.answerer.solar.hedger is not None:
+                    st.caption(f"hedging: {st.session_state.answerer.solar.hedger.snapshot()}")
                 st.markdown("---")
                 st.markdown(r["answer"])
 
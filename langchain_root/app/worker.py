@@ -0,0 +1,88 @@
+# app/worker.py
+# 실행:  python -m app.worker        (Ctrl+C로 종료)
+"""
+- 색인 큐(index_queue)를 계속 비우는 백그라운드 색인 워커입니다.
+- 수집(ingest)이 새 문서 id를 큐에 넣으면, 워커가 batch_size개씩 꺼내 청킹→임베딩→Chroma 업서트합니다.
+  → 누가 "Index" 버튼을 누를 때까지 기다리지 않고 수집 몇 초 뒤면 검색됩니다.
+- 워커가 죽어도 visibility timeout이 지나면 다른 워커가 같은 문서를 다시 가져갑니다.
+- 워커를 여러 개 띄워도 같은 문서를 동시에 받지 않습니다.
+"""
+
+import os
+import socket
+import time
+
+from src.utils.config import AppConfig
+from src.sql.db import SqlStore
+from src.sql.job_queue import IndexQueue
+from src.llm.solar import SolarClient
+from src.vector_store.indexer import Indexer
+from src.vector_store.chunker import TokenChunker
+from src.utils.tracing import configure_from_config
+
+class IndexWorker:
+    def __init__(self, cfg: AppConfig):
+        self.cfg = cfg
+        configure_from_config(cfg)
+        opts = cfg.app.get("index_worker", {}) or {}
+        self.batch_size = int(opts.get("batch_size", 32))
+        self.poll_interval = float(opts.get("poll_interval_s", 2))
+        self.visibility_timeout = float(opts.get("visibility_timeout_s", 300))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.queue = IndexQueue(cfg.sqlite_path, max_attempts=int(opts.get("max_attempts", 5)))
+        chunker = TokenChunker.from_config(cfg.chunking)
+        self.indexer = Indexer(
+            store=SqlStore(cfg.sqlite_path),
+            chroma_dir=cfg.chroma_dir,
+            solar_client=SolarClient(api_key=cfg.solar_api_key),
+            chunker=chunker,
+            min_chunk_chars=chunker.min_chars,
+            batch_size=16,
+            shard_by=cfg.shard_by,
+        )
+
+    def run_once(self) -> dict | None:
+        """큐에서 한 묶음을 꺼내 색인. 꺼낼 게 없으면 None."""
+        leased = self.queue.lease(self.worker_id, self.batch_size, self.visibility_timeout)
+        if not leased:
+            return None
+        doc_ids = [d for d, _ in leased]
+        try:
+            result = self.indexer.index_ids(doc_ids)
+        except Exception as e:
+            self.queue.nack(self.worker_id, doc_ids, f"{type(e).__name__}: {e}")
+            print(f"[WORKER] 색인 실패 ({len(doc_ids)} docs): {e}")
+            return {"docs": len(doc_ids), "error": str(e)}
+
+        self.queue.ack(self.worker_id, doc_ids)
+        # 신선도: 큐에 들어간 순간부터 검색 가능해진 지금까지
+        now = time.time()
+        waits = [now - enq for _, enq in leased]
+        out = {
+            "docs": len(doc_ids),
+            "upserted": result.get("upserted_total", 0),
+            "freshness_avg_s": round(sum(waits) / len(waits), 2),
+            "freshness_max_s": round(max(waits), 2),
+        }
+        print(f"[WORKER] indexed {out['docs']} docs / {out['upserted']} chunks  "
+              f"freshness avg={out['freshness_avg_s']}s max={out['freshness_max_s']}s")
+        return out
+
+    def run_forever(self) -> None:
+        print(f"[WORKER] {self.worker_id} 시작 (batch={self.batch_size}, poll={self.poll_interval}s, "
+              f"visibility_timeout={self.visibility_timeout}s)")
+        while True:
+            out = self.run_once()
+            if out is None or "error" in out:
+                time.sleep(self.poll_interval)
+
+def main():
+    worker = IndexWorker(AppConfig())
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        print("\n[WORKER] 종료")
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ import hashlib
 import re
 from urllib.parse import urlparse, urlunparse
 
+from src.utils.tracing import span, traced
+
 def _normalize_url(u: str) -> str:
     """URL에서 추적용 쿼리스트링(utm 등)을 제거해 같은 글을 같은 주소로 인식."""
     p = urlparse(u)
@@ -22,14 +24,23 @@ def _normalize_url(u: str) -> str:
     return urlunparse(clean)
 
 def _normalize_text(text: str) -> str:
-    """여러 공백/개행을 하나로 줄여 '같은 내용이면 같은 문자열'이 되게 정리."""
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    """
+    여러 공백을 하나로, 빈 줄은 없애서 '같은 내용이면 같은 문자열'이 되게 정리.
+    문단 경계(개행 1개)는 남겨 둬서 청커가 문단/문장 단위로 자를 수 있게 함.
+    """
+    lines = (re.sub(r"\s+", " ", ln).strip() for ln in text.splitlines())
+    return "\n".join(ln for ln in lines if ln)
 
 def _content_hash(text: str) -> str:
-    """정규화된 본문으로 지문(해시)을 생성. 중복 문서 방지에 사용."""
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    """
+    정규화된 본문으로 지문(해시)을 생성. 중복 문서 방지에 사용.
+    문단 개행을 남기기 전과 같은 값이 나오도록 공백/개행을 모두 하나로 줄인 문자열로 해시
+    (이미 저장된 문서의 content_hash와 그대로 비교됨).
+    """
+    flat = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(flat.encode("utf-8")).hexdigest()
 
+@traced("crawler.fetch_rss")
 def fetch_rss_docs(rss_urls: list[str], per_feed_limit: int = 20) -> list[dict]:
     """
     입력: RSS 주소 리스트
@@ -43,7 +54,9 @@ def fetch_rss_docs(rss_urls: list[str], per_feed_limit: int = 20) -> list[dict]:
     """
     docs = []
     for rss in rss_urls:
-        feed = feedparser.parse(rss)          # RSS 목록 읽기
+        with span("crawler.parse_feed", feed=rss) as sp:
+            feed = feedparser.parse(rss)      # RSS 목록 읽기
+            sp.set(entries=len(feed.entries))
         source_name = feed.feed.get("title", "").strip() if feed.feed else ""
         # entries: 파싱한 RSS의 글 목록. 메타 데이터만 있고 본문 내용은 보통 없음 -> 그래서 링크에 들어가서 본문을 추출해야 함!
         entries = feed.entries[:per_feed_limit]
@@ -55,14 +68,14 @@ def fetch_rss_docs(rss_urls: list[str], per_feed_limit: int = 20) -> list[dict]:
                 continue
 
             # 2) 웹페이지 다운로드 + 본문 추출
-            downloaded = trafilatura.fetch_url(url)
-            if not downloaded:
-                continue
-            extracted = trafilatura.extract(
-                downloaded,
-                include_comments=False,
-                include_tables=False
-            )
+            with span("crawler.fetch_article", url=url) as sp:
+                downloaded = trafilatura.fetch_url(url)
+                extracted = trafilatura.extract(
+                    downloaded,
+                    include_comments=False,
+                    include_tables=False
+                ) if downloaded else None
+                sp.set(downloaded=bool(downloaded), extracted_chars=len(extracted or ""))
             if not extracted:
                 continue
 
@@ -0,0 +1,219 @@
+# src/llm/hedging.py
+"""
+- 생성 요청 꼬리 지연(tail latency)을 줄이는 헤지(hedged) 요청입니다.
+  요청이 "평소 지연의 p95"(percentile)가 지나도록 응답(스트림이면 첫 조각)이 없으면
+  같은 요청을 한 번 더 보내고, 먼저 성공한 쪽을 쓰고 나머지는 취소합니다.
+- 기다리는 시간(delay)은 모델별 최근 지연 window개의 percentile → [min_delay_ms, max_delay_ms]로 자름.
+  표본이 min_samples보다 적으면 initial_delay_ms.
+- 예산(budget): 토큰 버킷. 요청 하나마다 budget_ratio만큼 쌓이고(최대 budget_burst) 헤지 하나에 1을 씀
+  → 헤지로 늘어나는 요청은 대략 전체의 budget_ratio 이하. 예산이 없으면 헤지 없이 원래 요청을 기다림.
+- 먼저 끝난 쪽이 실패면 나머지를 계속 기다림(둘 다 실패면 원래 요청의 에러). delay 전에 실패하면 헤지 없이 바로 에러.
+- 취소: async(run_async/stream_async)는 진 쪽 태스크를 cancel → httpx가 연결을 닫음.
+  동기(run)는 requests 호출을 중간에 끊을 수 없어서, 진 쪽은 풀 스레드에서 끝까지 돈 뒤 결과만 버려짐.
+- 지표(snapshot): requests, fired(헤지 보낸 수), won(헤지가 이긴 수), denied(예산 부족), fire_rate, win_rate, 모델별 delay.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+_END = object()   # 스트림이 조각 없이 끝난 경우의 첫 조각 자리
+
+class Hedger:
+    def __init__(
+        self,
+        percentile: float = 0.95,      # 이 분위수 지연이 지나면 헤지
+        window: int = 200,             # 모델별로 기억할 최근 지연 수
+        min_samples: int = 20,         # 이보다 적으면 initial_delay_ms
+        initial_delay_ms: float = 8000,
+        min_delay_ms: float = 500,
+        max_delay_ms: float = 30000,
+        budget_ratio: float = 0.05,    # 요청 대비 헤지 비율 상한
+        budget_burst: float = 3.0,     # 한 번에 몰아 쓸 수 있는 헤지 수
+        max_workers: int = 64,         # 동기 run()이 요청을 돌릴 스레드 수 (진 요청이 끝날 때까지 자리를 차지함)
+    ):
+        self.percentile = min(1.0, max(0.0, percentile))
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self.initial_delay_ms = initial_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max(min_delay_ms, max_delay_ms)
+        self.budget_ratio = max(0.0, budget_ratio)
+        self.budget_burst = max(1.0, budget_burst)
+        self.lock = threading.Lock()
+        self._latency: Dict[str, Deque[float]] = {}
+        self._tokens = self.budget_burst
+        self.requests = self.fired = self.won = self.denied = 0
+        self._pool = ThreadPoolExecutor(max_workers=max(2, max_workers), thread_name_prefix="hedge")
+
+    # ---------------- 지연/예산 ---------------- #
+
+    def delay_ms(self, key: str) -> float:
+        """key(모델) 요청을 헤지하기 전에 기다릴 시간."""
+        with self.lock:
+            xs = sorted(self._latency.get(key) or ())
+        if len(xs) < self.min_samples:
+            return self.initial_delay_ms
+        p = xs[min(len(xs) - 1, int(round(self.percentile * (len(xs) - 1))))]
+        return min(self.max_delay_ms, max(self.min_delay_ms, p))
+
+    def _start(self, key: str) -> Tuple[float, float]:
+        with self.lock:
+            self.requests += 1
+            self._tokens = min(self.budget_burst, self._tokens + self.budget_ratio)
+        return time.perf_counter(), self.delay_ms(key)
+
+    def _try_fire(self) -> bool:
+        with self.lock:
+            if self._tokens < 1.0:
+                self.denied += 1
+                return False
+            self._tokens -= 1.0
+            self.fired += 1
+            return True
+
+    def _finish(self, key: str, t0: float, hedge_won: bool) -> None:
+        # 호출한 쪽이 실제로 기다린 시간 (헤지가 이겼으면 delay + 헤지 시간)
+        ms = (time.perf_counter() - t0) * 1000
+        with self.lock:
+            self._latency.setdefault(key, deque(maxlen=self.window)).append(ms)
+            if hedge_won:
+                self.won += 1
+
+    # ---------------- 동기 ---------------- #
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, Dict[str, Any]]:
+        """
+        fn()을 헤지해서 실행. 반환: (결과, {hedge_delay_ms, hedge_fired, hedge_won})
+        fn은 두 번 불릴 수 있음 (스레드에서 부르므로 트레이싱이 필요하면 bind로 감싸서 줄 것).
+        """
+        t0, delay = self._start(key)
+        info = {"hedge_delay_ms": round(delay, 1), "hedge_fired": False, "hedge_won": False}
+        primary = self._pool.submit(fn)
+        try:
+            result = primary.result(timeout=delay / 1000)
+        except FutureTimeout:
+            pass
+        else:
+            self._finish(key, t0, False)
+            return result, info
+        if not self._try_fire():
+            result = primary.result()
+            self._finish(key, t0, False)
+            return result, info
+
+        info["hedge_fired"] = True
+        futures = [primary, self._pool.submit(fn)]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            ok = [f for f in futures if f in done and f.exception() is None]
+            if ok:
+                for f in pending:
+                    f.cancel()   # 이미 돌고 있으면 못 멈춤 → 끝나면 결과만 버려짐
+                info["hedge_won"] = ok[0] is futures[1]
+                self._finish(key, t0, info["hedge_won"])
+                return ok[0].result(), info
+        raise futures[0].exception()
+
+    # ---------------- async ---------------- #
+
+    async def _first_success(self, tasks: List["asyncio.Future"]) -> Tuple[int, Any]:
+        """먼저 성공한 태스크의 (순번, 결과). 모두 실패면 첫 태스크의 에러."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for i, t in enumerate(tasks):
+                if t in done:
+                    exc = t.exception()
+                    if exc is None:
+                        return i, t.result()
+                    if isinstance(exc, StopAsyncIteration):
+                        return i, _END
+        raise tasks[0].exception()
+
+    @staticmethod
+    async def _cancel(tasks: List["asyncio.Future"]) -> None:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_async(self, key: str, make: Callable[[], Awaitable[Any]]) -> Tuple[Any, Dict[str, Any]]:
+        """run()의 async 버전. make()는 부를 때마다 새 코루틴. 진 쪽(과 바깥에서 취소되면 전부)은 cancel."""
+        t0, delay = self._start(key)
+        info = {"hedge_delay_ms": round(delay, 1), "hedge_fired": False, "hedge_won": False}
+        tasks = [asyncio.ensure_future(make())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay / 1000)
+            if not done and self._try_fire():
+                info["hedge_fired"] = True
+                tasks.append(asyncio.ensure_future(make()))
+            i, result = await self._first_success(tasks)
+        finally:
+            await self._cancel([t for t in tasks if not t.done()])
+        info["hedge_won"] = i == 1
+        self._finish(key, t0, info["hedge_won"])
+        return result, info
+
+    async def stream_async(self, key: str, make_iter: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        스트림 헤지: delay 안에 첫 조각이 안 오면 스트림을 하나 더 열고, 첫 조각이 먼저 온 쪽을 끝까지 읽음.
+        진 스트림은 바로 닫힘. 지연 표본은 첫 조각까지의 시간(key + ":ttft").
+        """
+        key = f"{key}:ttft"
+        t0, delay = self._start(key)
+        iters = [make_iter()]
+        firsts = [asyncio.ensure_future(iters[0].__anext__())]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(firsts, timeout=delay / 1000)
+            if not done and self._try_fire():
+                iters.append(make_iter())
+                firsts.append(asyncio.ensure_future(iters[1].__anext__()))
+            winner, first = await self._first_success(firsts)
+        finally:
+            losers = [i for i in range(len(iters)) if i != winner]
+            await self._cancel([firsts[i] for i in losers])
+            for i in losers:
+                await iters[i].aclose()
+        self._finish(key, t0, winner == 1)
+
+        it = iters[winner]
+        try:
+            if first is not _END:
+                yield first
+                async for item in it:
+                    yield item
+        finally:
+            await it.aclose()
+
+    # ---------------- 지표 ---------------- #
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            keys = list(self._latency)
+            out = {
+                "requests": self.requests,
+                "fired": self.fired,
+                "won": self.won,
+                "denied": self.denied,
+                "fire_rate": round(self.fired / self.requests, 4) if self.requests else 0.0,
+                "win_rate": round(self.won / self.fired, 4) if self.fired else 0.0,
+                "budget_tokens": round(self._tokens, 2),
+            }
+        out["delay_ms"] = {k: round(self.delay_ms(k), 1) for k in keys}
+        return out
+
+_shared: Optional[Hedger] = None
+_shared_lock = threading.Lock()
+
+def get_hedger(**kwargs) -> Hedger:
+    """프로세스 공용 Hedger (모델별 지연 기록/예산을 Answerer를 다시 만들어도 이어서 씀)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Hedger(**kwargs)
+        return _shared
@@ -23,10 +23,13 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import textwrap
 import datetime
 
+from src.utils.text import TokenCounter, get_token_counter, split_sentences
+from src.utils.tracing import current_span, traced
+
 # src/llm/prompt.py  — PromptOptions 클래스만 교체
 
 # from dataclasses import dataclass
@@ -261,6 +264,8 @@ class PromptOptions:
     max_context_chars : int   # Evidence 전체 길이 상한
     max_block_chars : int     # Evidence 블록당 길이 상한
     max_blocks : int          # Evidence 블록 최대 개수(Top-k와 연동)
+    max_context_tokens : Optional[int]  # Evidence 전체 토큰 예산. 주면 글자 수 상한 대신 토큰으로 채움
+    max_block_tokens : Optional[int]    # 토큰 모드에서 블록당 본문 토큰 상한
 
     하위호환
     ----------
@@ -281,6 +286,8 @@ class PromptOptions:
     max_context_chars: int = 4200
     max_block_chars: int = 1000
     max_blocks: int = 7
+    max_context_tokens: Optional[int] = None
+    max_block_tokens: Optional[int] = None
     title: str = "뉴스 RAG 어시스턴트"
 
     # 하위호환
@@ -344,8 +351,13 @@ class PromptBuilder:
     system, user = builder.build_messages(question, evidences, extra_instructions)
     """
 
-    def __init__(self, options: Optional[PromptOptions] = None):
+    def __init__(self, options: Optional[PromptOptions] = None, token_counter: Optional[TokenCounter] = None):
+        """
+        token_counter : Optional[TokenCounter]
+            프롬프트/Evidence 토큰 수를 셀 토크나이저. 없으면 근사치 카운터(get_token_counter()).
+        """
         self.opt = options or PromptOptions()
+        self.counter = token_counter or get_token_counter()
 
     def _truncate(self, txt: str, limit: int) -> str:
         """길이 상한을 넘으면 말줄임표로 자른다."""
@@ -377,32 +389,11 @@ class PromptBuilder:
         blocks: List[str] = []
         total_len = 0
         for i, ev in enumerate(items, 1):
-            title = ev.get("title", "(제목 없음)").strip()
-            url = ev.get("url", "").strip()
-            source = ev.get("source", "").strip()
-            date_published = ev.get("date_published", "").strip()
-            score = ev.get("score", None)
             text = (ev.get("text", "") or "").strip()
 
             # 블록별 본문 상한
             t = self._truncate(text, self.opt.max_block_chars) if text else ""
-            head = f"[{i}] {title}"
-            if url:
-                head += f" ({url})"
-            meta_tail = []
-            if source:
-                meta_tail.append(source)
-            if date_published:
-                meta_tail.append(date_published)
-            if meta_tail:
-                head += "  |  " + " · ".join(meta_tail)
-            if score is not None:
-                head += f"  |  score={round(float(score), 4)}"
-
-            block = head
-            if t:
-                block += f"\n{t}"
-            block += "\n---"
+            block = self._render_block(self._render_head(i, ev), t)
 
             # 전체 컨텍스트 상한
             if total_len + len(block) > self.opt.max_context_chars:
@@ -412,18 +403,123 @@ class PromptBuilder:
 
         return "\n".join(blocks) if blocks else "(Evidence 없음)"
 
+    @staticmethod
+    def _render_head(i: int, ev: Dict[str, Any]) -> str:
+        """블록 머리줄: [번호] 제목 (URL)  |  출처 · 날짜  |  score"""
+        title = ev.get("title", "(제목 없음)").strip()
+        url = ev.get("url", "").strip()
+        source = ev.get("source", "").strip()
+        date_published = ev.get("date_published", "").strip()
+        score = ev.get("score", None)
+
+        head = f"[{i}] {title}"
+        if url:
+            head += f" ({url})"
+        meta_tail = []
+        if source:
+            meta_tail.append(source)
+        if date_published:
+            meta_tail.append(date_published)
+        if meta_tail:
+            head += "  |  " + " · ".join(meta_tail)
+        if score is not None:
+            head += f"  |  score={round(float(score), 4)}"
+        return head
+
+    @staticmethod
+    def _render_block(head: str, text: str) -> str:
+        return head + (f"\n{text}" if text else "") + "\n---"
+
+    def _trim_to_tokens(self, text: str, limit: int) -> Tuple[str, bool]:
+        """
+        본문을 limit 토큰 안으로 문장 경계에서 자른다. 반환: (잘린 본문, 잘렸는지)
+        - 문장별 토큰 수는 한 번에(count_many) 세고 앞에서부터 누적
+        - 첫 문장부터 limit을 넘으면(문장부호 없는 긴 문단 등) 글자 비율로 잘라 "..."
+        """
+        if limit <= 0:
+            return "", bool(text)
+        if self.counter.count(text) <= limit:
+            return text, False
+        sents = split_sentences(text)
+        counts = self.counter.count_many(sents)
+        keep, used = [], 0
+        for sent, c in zip(sents, counts):
+            if used + c > limit:
+                break
+            keep.append(sent)
+            used += c
+        out = " ".join(keep)
+        # 문장을 이어 붙이면서 경계 토큰이 달라질 수 있어 실제로 다시 세어 확인
+        while keep and self.counter.count(out) > limit:
+            keep.pop()
+            out = " ".join(keep)
+        if not keep and sents:
+            first = sents[0]
+            cut = max(0, int(len(first) * limit / max(1, counts[0])) - 3)
+            out = first[:cut] + "..." if cut else ""
+        return out, True
+
+    def _pack_evidence_tokens(self, evidences: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        토큰 예산(max_context_tokens) 안에서 Evidence 블록을 채운다.
+        - evidences는 Retriever가 준 순서(점수순, 재정렬했으면 그 순서) 그대로 앞에서부터 채움
+        - 블록당 본문은 max_block_tokens로 먼저 자르고(문장 경계),
+          남은 예산보다 큰 블록은 남은 만큼만 문장 경계에서 잘라 넣음
+        - 머리줄조차 안 들어가는 블록은 건너뛰고, 뒤의 작은 블록이 들어갈 수 있으면 계속 채움
+        반환: (Evidence 섹션 텍스트, 통계)
+        """
+        items = evidences[: max(1, int(self.opt.max_blocks))]
+        budget = int(self.opt.max_context_tokens)
+        block_cap = int(self.opt.max_block_tokens or 0)
+
+        blocks: List[str] = []
+        used = 0
+        trimmed = dropped = 0
+        for ev in items:
+            remaining = budget - used
+            text = (ev.get("text", "") or "").strip()
+            head = self._render_head(len(blocks) + 1, ev)
+            cut = False
+            if text and block_cap:
+                text, cut = self._trim_to_tokens(text, block_cap)
+
+            block = self._render_block(head, text)
+            n = self.counter.count(block)
+            if n > remaining:
+                head_n = self.counter.count(self._render_block(head, ""))
+                if head_n >= remaining:
+                    dropped += 1
+                    continue
+                # 블록 구분 개행 몫 1토큰 여유
+                text, _ = self._trim_to_tokens(text, remaining - head_n - 1)
+                if not text:
+                    dropped += 1
+                    continue
+                cut = True
+                block = self._render_block(head, text)
+                n = self.counter.count(block)
+                if n > remaining:
+                    dropped += 1
+                    continue
+            blocks.append(block)
+            used += n
+            trimmed += int(cut)
+
+        stats = {
+            "context_tokens": used,
+            "context_budget": budget,
+            "evidence_used": len(blocks),
+            "evidence_trimmed": trimmed,
+            "evidence_dropped": dropped + max(0, len(evidences) - len(items)),
+        }
+        return ("\n".join(blocks) if blocks else "(Evidence 없음)"), stats
+
     def build_messages(
         self,
         question: str,
         evidences: List[Dict[str, Any]],
         extra_instructions: Optional[str] = None,
     ) -> tuple[str, str]:
-        if evidences is None:
-            evidences = []
-        elif isinstance(evidences, dict):
-            evidences = list(evidences.values())
-        elif not isinstance(evidences, list):
-            evidences = list(evidences)
         """
         최종 system/user 메시지를 생성한다.
 
@@ -440,10 +536,36 @@ class PromptBuilder:
         -------
         (system_prompt, user_prompt) : tuple[str, str]
         """
+        system_prompt, user_prompt, _ = self.build_messages_with_stats(question, evidences, extra_instructions)
+        return system_prompt, user_prompt
+
+    @traced("prompt.build")
+    def build_messages_with_stats(
+        self,
+        question: str,
+        evidences: List[Dict[str, Any]],
+        extra_instructions: Optional[str] = None,
+    ) -> tuple[str, str, Dict[str, Any]]:
+        """
+        build_messages와 같고, 프롬프트 크기 통계를 함께 돌려준다.
+        - prompt_tokens: system + user 토큰 수 (tokenizer가 근사치면 tokenizer_exact=False)
+        - 토큰 모드(max_context_tokens)면 context_tokens/evidence_used/evidence_trimmed/evidence_dropped 추가
+        """
+        if evidences is None:
+            evidences = []
+        elif isinstance(evidences, dict):
+            evidences = list(evidences.values())
+        elif not isinstance(evidences, list):
+            evidences = list(evidences)
+
         today = datetime.date.today().isoformat()
         system_prompt = self.opt.render_system_rules()
 
-        ev_block = self._render_evidence_block(evidences)
+        stats: Dict[str, Any] = {}
+        if self.opt.max_context_tokens:
+            ev_block, stats = self._pack_evidence_tokens(evidences)
+        else:
+            ev_block = self._render_evidence_block(evidences)
 
         # 요청 포맷 지시(길이/밀도 강화)
         fmt_lines = [
@@ -467,7 +589,13 @@ class PromptBuilder:
             {chr(10).join(fmt_lines)}
         """).strip()
 
-        return system_prompt, user_prompt
+        stats.update(
+            prompt_tokens=sum(self.counter.count_many([system_prompt, user_prompt])),
+            tokenizer=self.counter.name,
+            tokenizer_exact=self.counter.is_exact,
+        )
+        current_span().set(evidences=len(evidences), prompt_tokens=stats["prompt_tokens"])
+        return system_prompt, user_prompt, stats
     # src/llm/prompt.py — PromptBuilder 클래스 내부에 다음 메서드 추가
 
     def _coerce_evidence_item(self, ev) -> dict:
@@ -3,6 +3,7 @@
 - Solar API를 부르는 아주 얇은 어댑터(내 명령어를 솔라가 이해할 수 있는 형태로 변환해서 전달해줌)입니다.
 - embed(texts): 문장/청크를 '숫자 벡터'로 바꿔서 벡터DB(Chroma)에 저장하거나 검색에 씁니다.
 - generate(system_prompt, user_prompt): 리트리브된 근거로 최종 답변을 만듭니다.
+  hedger(hedging.py)를 주면 느린 생성 요청은 한 번 더 보내 먼저 온 응답을 씁니다.
 """
 
 """
@@ -12,14 +13,39 @@
 - **Payload:** **소포 상자 안에 담긴 실제 물건들**
 """
 # src/llm/solar.py
+import re
+import time
 import requests
-from typing import List
+from typing import Any, Dict, List, Optional
+
+from src.llm.hedging import Hedger
+from src.utils.tracing import bind, span
+
+# 서버 처리 시간을 알려주는 응답 헤더 (있는 것만). HTTP 전체 시간과 비교해 네트워크/대기열 몫을 가늠
+_SERVER_TIME_HEADERS = ("openai-processing-ms", "x-envoy-upstream-service-time", "x-processing-ms")
+
+def server_time_ms(headers) -> Optional[float]:
+    """응답 헤더에서 서버 처리 시간(ms). 없으면 None. (Server-Timing: ...;dur=123 도 봄)"""
+    for name in _SERVER_TIME_HEADERS:
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    m = re.search(r"dur=([\d.]+)", headers.get("server-timing", "") or "")
+    return float(m.group(1)) if m else None
+
+def usage_attrs(body: Dict[str, Any]) -> Dict[str, Any]:
+    usage = body.get("usage") or {}
+    return {"prompt_tokens": usage.get("prompt_tokens"), "completion_tokens": usage.get("completion_tokens")}
 
 class SolarClient:
-    def __init__(self, api_key: str, base_url: str = "https://api.upstage.ai/v1"):
+    def __init__(self, api_key: str, base_url: str = "https://api.upstage.ai/v1", hedger: Optional[Hedger] = None):
         if not api_key:
             raise ValueError("SOLAR_API_KEY가 비어있습니다. .env에 설정하세요.")
         self.base_url = base_url.rstrip("/")
+        self.hedger = hedger   # 있으면 generate를 헤지 (임베딩은 안 함)
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {api_key}",
@@ -38,16 +64,29 @@ class SolarClient:
             return []
         url = f"{self.base_url}/embeddings"
         payload = {"model": model, "input": texts}
-        try:
-            r = self.session.post(url, json=payload, timeout=timeout)
-            r.raise_for_status()
-        except requests.HTTPError as e:
-            # 응답 바디를 그대로 보여줘서 원인을 빠르게 파악
-            msg = getattr(e.response, "text", str(e))
-            raise RuntimeError(f"[Solar Embeddings Error] {msg}") from e
-        data = r.json().get("data", [])
+        with span("solar.embed", model=model, inputs=len(texts)) as sp:
+            t0 = time.perf_counter()
+            try:
+                r = self.session.post(url, json=payload, timeout=timeout)
+                r.raise_for_status()
+            except requests.HTTPError as e:
+                # 응답 바디를 그대로 보여줘서 원인을 빠르게 파악
+                msg = getattr(e.response, "text", str(e))
+                raise RuntimeError(f"[Solar Embeddings Error] {msg}") from e
+            data = r.json().get("data", [])
+            sp.set(**self._http_attrs(r, t0))
         return [item["embedding"] for item in data]
 
+    @staticmethod
+    def _http_attrs(r, t0: float) -> Dict[str, Any]:
+        # http_ms: 요청~본문 다 받을 때까지, ttfb_ms: 응답 헤더까지(requests의 elapsed), server_ms: 서버가 알려준 처리 시간
+        return {
+            "status": r.status_code,
+            "http_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "ttfb_ms": round(r.elapsed.total_seconds() * 1000, 1),
+            "server_ms": server_time_ms(r.headers),
+        }
+
     # 편의 함수: 역할 분리형 호출
     # embed_passage 함수: 문서를 번역할 때 사용
     def embed_passage(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
@@ -82,10 +121,22 @@ class SolarClient:
             "max_tokens": max_tokens,
             "stream": False,
         }
+        with span("solar.generate", model=model, max_tokens=max_tokens) as sp:
+            if self.hedger is None:
+                body, attrs = self._chat(url, payload, timeout)
+            else:
+                (body, attrs), hedge = self.hedger.run(model, bind(lambda: self._chat(url, payload, timeout)))
+                attrs.update(hedge)
+            sp.set(**attrs, **usage_attrs(body))
+        return body["choices"][0]["message"]["content"]
+
+    def _chat(self, url: str, payload: Dict[str, Any], timeout: int) -> tuple:
+        """chat/completions 요청 한 번 → (응답 JSON, HTTP 속성)"""
+        t0 = time.perf_counter()
         try:
             r = self.session.post(url, json=payload, timeout=timeout)
             r.raise_for_status()
         except requests.HTTPError as e:
             msg = getattr(e.response, "text", str(e))
             raise RuntimeError(f"[Solar Chat Error] {msg}") from e
-        return r.json()["choices"][0]["message"]["content"]
\ No newline at end of file
+        return r.json(), self._http_attrs(r, t0)
\ No newline at end of file
@@ -0,0 +1,176 @@
+# src/llm/solar_async.py
+"""
+- SolarClient(solar.py)의 async 버전입니다. `httpx.AsyncClient` 하나로 연결을 재사용해서
+  이벤트 루프 하나가 여러 질문의 임베딩/생성 요청을 동시에 기다릴 수 있습니다.
+- generate_stream(): 생성 결과를 SSE 스트림으로 받아 조각(delta)마다 돌려줍니다.
+  소비하는 쪽이 중간에 멈추거나(클라이언트 끊김) 작업이 취소되면 HTTP 스트림도 바로 닫힙니다.
+- 에러 메시지 형식은 SolarClient와 같음 ([Solar ... Error] 응답 본문).
+- hedger를 주면 generate는 응답 기준, generate_stream은 첫 조각 기준으로 헤지 (진 요청은 cancel로 연결까지 닫힘).
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from src.llm.hedging import Hedger
+from src.llm.solar import server_time_ms, usage_attrs
+from src.utils.tracing import record_span, span
+
+class AsyncSolarClient:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.upstage.ai/v1",
+        max_connections: int = 32,   # 동시에 열어 둘 HTTP 연결 수 (진행 중인 질문 수 상한과 비슷하게)
+        hedger: Optional[Hedger] = None,
+    ):
+        if not api_key:
+            raise ValueError("SOLAR_API_KEY가 비어있습니다. .env에 설정하세요.")
+        self.base_url = base_url.rstrip("/")
+        self.hedger = hedger
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncSolarClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # --- 임베딩 ---
+    async def embed(self, texts: List[str], model: str = "embedding-passage", timeout: int = 60) -> List[List[float]]:
+        if not texts:
+            return []
+        with span("solar.embed", model=model, inputs=len(texts)) as sp:
+            t0 = time.perf_counter()
+            try:
+                r = await self.client.post(
+                    f"{self.base_url}/embeddings", json={"model": model, "input": texts}, timeout=timeout
+                )
+                r.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                raise RuntimeError(f"[Solar Embeddings Error] {e.response.text}") from e
+            sp.set(**self._http_attrs(r, t0))
+        return [item["embedding"] for item in r.json().get("data", [])]
+
+    @staticmethod
+    def _http_attrs(r: httpx.Response, t0: float) -> Dict[str, Any]:
+        # SolarClient._http_attrs와 같은 항목 (httpx의 elapsed는 본문까지 받은 시간이라 ttfb는 없음)
+        return {
+            "status": r.status_code,
+            "http_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "server_ms": server_time_ms(r.headers),
+        }
+
+    async def embed_passage(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        return await self.embed(texts, model="embedding-passage", timeout=timeout)
+
+    async def embed_query(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        return await self.embed(texts, model="embedding-query", timeout=timeout)
+
+    # --- 생성 ---
+    def _chat_payload(self, system_prompt, user_prompt, model, temperature, max_tokens, stream) -> dict:
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str = "solar-pro",
+        temperature: float = 0.2,
+        max_tokens: int = 800,
+        timeout: int = 120,
+    ) -> str:
+        payload = self._chat_payload(system_prompt, user_prompt, model, temperature, max_tokens, False)
+        with span("solar.generate", model=model, max_tokens=max_tokens) as sp:
+            if self.hedger is None:
+                body, attrs = await self._chat(payload, timeout)
+            else:
+                (body, attrs), hedge = await self.hedger.run_async(model, lambda: self._chat(payload, timeout))
+                attrs.update(hedge)
+            sp.set(**attrs, **usage_attrs(body))
+        return body["choices"][0]["message"]["content"]
+
+    async def _chat(self, payload: Dict[str, Any], timeout: int) -> tuple:
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.post(f"{self.base_url}/chat/completions", json=payload, timeout=timeout)
+            r.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise RuntimeError(f"[Solar Chat Error] {e.response.text}") from e
+        return r.json(), self._http_attrs(r, t0)
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str = "solar-pro",
+        temperature: float = 0.2,
+        max_tokens: int = 800,
+        timeout: int = 120,
+    ) -> AsyncIterator[str]:
+        """생성 결과를 조각 문자열로 차례대로. (OpenAI 호환 SSE: "data: {...}" 줄, 끝은 "data: [DONE]")"""
+        payload = self._chat_payload(system_prompt, user_prompt, model, temperature, max_tokens, True)
+        if self.hedger is None:
+            stream = self._stream(payload, model, max_tokens, timeout)
+        else:
+            stream = self.hedger.stream_async(model, lambda: self._stream(payload, model, max_tokens, timeout))
+        try:
+            async for delta in stream:
+                yield delta
+        finally:
+            await stream.aclose()
+
+    async def _stream(self, payload: Dict[str, Any], model: str, max_tokens: int, timeout: int) -> AsyncIterator[str]:
+        """SSE 스트림 하나 (헤지하면 둘이 동시에 열릴 수 있고, 각각 span 하나로 기록됨)"""
+        # async generator는 yield 사이에 호출 쪽 코드가 돌아서 span을 "현재 span"으로 열어 두지 않고,
+        # 끝날 때(정상/에러/중간 종료) 한 번에 기록
+        t0 = time.perf_counter()
+        attrs: Dict[str, Any] = {"model": model, "max_tokens": max_tokens, "chunks": 0}
+        error = None
+        try:
+            async with self.client.stream(
+                "POST", f"{self.base_url}/chat/completions", json=payload, timeout=timeout
+            ) as r:
+                attrs.update(status=r.status_code, ttfb_ms=round((time.perf_counter() - t0) * 1000, 1),
+                             server_ms=server_time_ms(r.headers))
+                if r.is_error:
+                    body = (await r.aread()).decode("utf-8", "replace")
+                    raise RuntimeError(f"[Solar Chat Error] {body}")
+                async for line in r.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                    if delta:
+                        if not attrs["chunks"]:
+                            attrs["first_token_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+                        attrs["chunks"] += 1
+                        yield delta
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            record_span("solar.generate_stream", t0, error=error, **attrs)
@@ -10,19 +10,36 @@ Retriever → PromptBuilder → SolarClient 를 오케스트레이션하여
 1) _retrieve(): 사용자 질문 임베딩 → 벡터 검색(Top-k/MMR) → Evidence 목록 반환
 2) _generate(): PromptBuilder로 System/User 프롬프트 구성 → Solar로 생성 호출
 3) answer(), answer_multi(): 단일/다중 모델 실행
+   - answer_multi는 검색/프롬프트를 한 번만 만들고(모든 모델이 같은 근거를 봄) 모델 호출만 동시에 보냄
+4) (옵션) 답변 캐시: 같은 질문/옵션/인덱스 버전이면 저장된 결과를 바로 돌려줌 (cached=True)
+5) answer_cascade(): 작은 모델로 먼저 답하고 검사에 걸리면 큰 모델로 다시 생성 (cascade.py)
 
 하위호환
 --------
 - PromptOptions는 style/include_sources를 받아도 동작(내부 매핑).
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
 import time
 
 from src.utils.config import AppConfig
 from src.retriever.search import Retriever
 from src.llm.solar import SolarClient
+from src.llm.hedging import Hedger, get_hedger
 from src.llm.prompt import PromptBuilder, PromptOptions
+from src.sql.collection_registry import CollectionRegistry
+from src.retriever.query_cache import get_query_cache, normalize_query
+from src.sql.answer_cache import AnswerCache, cache_key
+from src.qa.cascade import CascadePolicy, get_cascade_stats
+from src.sql.lexical_index import LexicalIndex
+from src.vector_store.mmap_index import get_mmap_index
+from src.retriever.semantic_cache import get_semantic_cache
+from src.retriever.reranker import get_reranker
+from src.retriever.compressor import EvidenceCompressor
+from src.utils.text import get_token_counter
+from src.utils.tracing import bind, span, traced
 import re
 
 class Answerer:
@@ -50,8 +67,8 @@ class Answerer:
         """
         self.cfg = cfg
 
-        # 1) LLM 클라이언트 (임베딩/생성 공용)
-        self.solar = SolarClient(api_key=cfg.solar_api_key)
+        # 1) LLM 클라이언트 (임베딩/생성 공용, generation.hedging이 켜져 있으면 생성 요청 헤지)
+        self.solar = SolarClient(api_key=cfg.solar_api_key, hedger=self._hedger(cfg))
 
         # 2) 리트리버 (❗ SolarClient를 반드시 넘겨야 함)
         self.retriever = Retriever(
@@ -60,24 +77,206 @@ class Answerer:
             top_k=top_k,
             use_mmr=use_mmr,
             mmr_lambda=mmr_lambda,
+            registry=CollectionRegistry(cfg.sqlite_path),   # 재색인 후 새 컬렉션 자동 반영
+            query_cache=self._query_cache(cfg),
+            **self._hybrid_options(cfg),
+            filters=self._filter_options(cfg),
+            mmap_index=self._mmap_index(cfg),
+            semantic_cache=self._semantic_cache(cfg),
+            **self._expansion_options(cfg),
+            **self._rerank_options(cfg),
+            shard_workers=int((cfg.app.get("vector_store", {}) or {}).get("shard_search_workers", 4)),
         )
 
         # 3) 프롬프트 빌더
         #    (PromptOptions는 style/include_sources 하위호환 지원: prompt.py 참조)
-        self.prompt_builder = PromptBuilder(options=prompt_opt or PromptOptions())
+        #    Evidence는 generation.max_context_tokens 토큰 예산으로 채움 (청킹과 같은 토크나이저)
+        counter = get_token_counter(cfg.chunking.get("tokenizer") or None, cfg.chunking.get("tokenizer_path") or None)
+        self.prompt_builder = PromptBuilder(options=self._prompt_options(cfg, prompt_opt), token_counter=counter)
+
+        # 4) (옵션) 검색 결과 → 프롬프트 사이 질문 중심 문장 압축
+        self.compressor = self._compressor(cfg, self.solar, counter)
+
+        # 5) (옵션) 최종 답변 캐시 (SQLite, 인덱스 버전이 키에 들어감)
+        self.answer_cache = self._answer_cache(cfg)
+
+        # 6) 캐스케이드 생성 (answer_cascade) 기준 + 프로세스 공용 집계
+        self.cascade = self._cascade_policy(cfg)
+        self.cascade_stats = get_cascade_stats()
 
     # ---------------- internal helpers ---------------- #
 
+    @staticmethod
+    def _query_cache(cfg: AppConfig):
+        """app.yaml retrieval.query_cache 설정으로 프로세스 공용 질문 임베딩 캐시를 가져온다."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("query_cache", {}) or {}
+        return get_query_cache(
+            max_size=int(opts.get("max_size", 1024)),
+            persist_path=cfg.sqlite_path if opts.get("persist", True) else None,
+        )
+
+    @staticmethod
+    def _prompt_options(cfg: AppConfig, prompt_opt: Optional[PromptOptions]) -> PromptOptions:
+        """app.yaml generation.max_context_tokens/max_block_tokens → PromptOptions (직접 준 값이 있으면 그대로)."""
+        opt = prompt_opt or PromptOptions()
+        gen = cfg.app.get("generation", {}) or {}
+        return dataclasses.replace(
+            opt,
+            max_context_tokens=opt.max_context_tokens or int(gen.get("max_context_tokens") or 0) or None,
+            max_block_tokens=opt.max_block_tokens or int(gen.get("max_block_tokens") or 0) or None,
+        )
+
+    @staticmethod
+    def _compressor(cfg: AppConfig, solar: SolarClient, counter) -> Optional[EvidenceCompressor]:
+        """app.yaml retrieval.compression이 켜져 있으면 질문 중심 추출식 Evidence 압축기."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("compression", {}) or {}
+        if not opts.get("enabled", False):
+            return None
+        return EvidenceCompressor(
+            solar,
+            counter,
+            block_tokens=int(opts.get("block_tokens", 160)),
+            min_sentences=int(opts.get("min_sentences", 1)),
+            embed_batch_size=int(opts.get("embed_batch_size", 64)),
+            cache_size=int(opts.get("cache_size", 4096)),
+        )
+
+    @staticmethod
+    def _answer_cache(cfg: AppConfig) -> Optional[AnswerCache]:
+        """app.yaml generation.answer_cache가 켜져 있으면 SQLite 답변 캐시 (sqlite_path와 같은 DB 파일)."""
+        opts = (cfg.app.get("generation", {}) or {}).get("answer_cache", {}) or {}
+        if not opts.get("enabled", False):
+            return None
+        return AnswerCache(
+            cfg.sqlite_path,
+            ttl_s=float(opts.get("ttl_s", 1800)),
+            max_entries=int(opts.get("max_entries", 5000)),
+        )
+
+    @staticmethod
+    def _hedger(cfg: AppConfig) -> Optional[Hedger]:
+        """app.yaml generation.hedging이 켜져 있으면 프로세스 공용 Hedger (느린 생성 요청을 한 번 더 보냄)."""
+        opts = (cfg.app.get("generation", {}) or {}).get("hedging", {}) or {}
+        if not opts.get("enabled", False):
+            return None
+        return get_hedger(
+            percentile=float(opts.get("percentile", 0.95)),
+            window=int(opts.get("window", 200)),
+            min_samples=int(opts.get("min_samples", 20)),
+            initial_delay_ms=float(opts.get("initial_delay_ms", 8000)),
+            min_delay_ms=float(opts.get("min_delay_ms", 500)),
+            max_delay_ms=float(opts.get("max_delay_ms", 30000)),
+            budget_ratio=float(opts.get("budget_ratio", 0.05)),
+            budget_burst=float(opts.get("budget_burst", 3)),
+        )
+
+    @staticmethod
+    def _cascade_policy(cfg: AppConfig) -> CascadePolicy:
+        """app.yaml generation.cascade → 작은/큰 모델과 상승 기준, 비용 추정 단가."""
+        opts = (cfg.app.get("generation", {}) or {}).get("cascade", {}) or {}
+        return CascadePolicy(
+            cheap_model=opts.get("cheap_model", "solar-mini"),
+            strong_model=opts.get("strong_model", "solar-pro"),
+            min_answer_chars=int(opts.get("min_answer_chars", 200)),
+            min_coverage=float(opts.get("min_coverage", 0.5)),
+            prices=opts.get("prices") or {},
+        )
+
+    @staticmethod
+    def _filter_options(cfg: AppConfig) -> Dict[str, Any]:
+        """app.yaml의 기간/출처/언어 설정 → Retriever 기본 검색 필터 (Chroma where로 적용됨)."""
+        retrieval = cfg.app.get("retrieval", {}) or {}
+        filters = retrieval.get("filters", {}) or {}
+        return {
+            "days": retrieval.get("date_filter_days") or None,
+            "sources_allow": filters.get("source") or None,
+            "sources_deny": filters.get("source_deny") or None,
+            "lang": (cfg.app.get("sources", {}) or {}).get("language_allow") or None,
+        }
+
+    @staticmethod
+    def _semantic_cache(cfg: AppConfig):
+        """app.yaml retrieval.semantic_cache가 켜져 있으면(기본 꺼짐) 프로세스 공용 의미 기반 후보 캐시."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("semantic_cache", {}) or {}
+        if not opts.get("enabled", False):
+            return None
+        return get_semantic_cache(
+            threshold=float(opts.get("threshold", 0.08)),
+            max_entries=int(opts.get("max_entries", 256)),
+            ttl_s=float(opts.get("ttl_s", 600)),
+        )
+
+    @staticmethod
+    def _mmap_index(cfg: AppConfig):
+        """app.yaml retrieval.mmap_index가 켜져 있으면 프로세스 공용 mmap 벡터 인덱스."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("mmap_index", {}) or {}
+        if not opts.get("enabled", False):
+            return None
+        return get_mmap_index(
+            opts.get("dir", "data/mmap_index"),   # chroma_dir처럼 실행 위치 기준
+            ivf_nlist=int(opts.get("ivf_nlist", 0)),
+            n_probe=int(opts.get("n_probe", 8)),
+            min_rebuild_interval_s=float(opts.get("min_rebuild_interval_s", 60)),
+            quantization=str(opts.get("quantization", "none")),
+            truncate_dim=int(opts.get("truncate_dim", 0)),
+            rescore_factor=int(opts.get("rescore_factor", 0)) or None,   # 0이면 코덱별 기본값
+        )
+
+    @staticmethod
+    def _expansion_options(cfg: AppConfig) -> Dict[str, Any]:
+        """app.yaml retrieval.expansion → 기사별 묶기 + 이웃 청크 확장 옵션."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("expansion", {}) or {}
+        if not opts.get("enabled", False):
+            return {}
+        return {
+            "group_by_doc": bool(opts.get("group_by_doc", True)),
+            "expand_window": int(opts.get("window", 1)),
+            "max_expand_ids": int(opts.get("max_ids", 24)),
+        }
+
+    @staticmethod
+    def _rerank_options(cfg: AppConfig) -> Dict[str, Any]:
+        """app.yaml retrieval.rerank가 켜져 있으면 ONNX cross-encoder 재정렬 옵션."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("rerank", {}) or {}
+        if not opts.get("enabled", False):
+            return {}
+        return {
+            "reranker": get_reranker(
+                opts.get("model_path", "data/models/reranker/model.onnx"),
+                opts.get("tokenizer_path", "data/models/reranker/tokenizer.json"),
+                batch_size=int(opts.get("batch_size", 16)),
+                max_length=int(opts.get("max_length", 256)),
+                budget_ms=float(opts.get("budget_ms", 300)),
+                threads=int(opts.get("threads", 0)),
+            ),
+            "rerank_candidates": int(opts.get("candidates", 30)),
+        }
+
+    @staticmethod
+    def _hybrid_options(cfg: AppConfig) -> Dict[str, Any]:
+        """app.yaml retrieval.hybrid 설정 → Retriever 키워드(FTS5) 검색 옵션."""
+        opts = (cfg.app.get("retrieval", {}) or {}).get("hybrid", {}) or {}
+        if not opts.get("enabled", True):
+            return {}
+        return {
+            "lexical": LexicalIndex(cfg.sqlite_path),
+            "lexical_k": int(opts.get("lexical_k", 20)),
+            "rrf_k": int(opts.get("rrf_k", 60)),
+        }
+
 # src/qa/answerer.py  — Answerer 클래스 안의 이 함수만 교체
 
+    @traced("qa.retrieve")
     def _retrieve(self, question: str) -> Dict[str, Any]:
         """
         리트리버로 evidence(근거 청크) 리스트를 구한다. (리턴 타입 방어 포함)
         """
         t0 = time.time()
-        sources = self.retriever.search(question)
+        res = self.retriever.search(question)
         t1 = time.time()
 
+        # search()는 {"contexts", "sources", "raw"}를 돌려줌 → 근거는 sources 리스트
+        sources = res.get("sources") if isinstance(res, dict) else res
         # ⬇️ 방어: 리스트 보장
         if sources is None:
             sources = []
@@ -90,6 +289,7 @@ class Answerer:
             "sources": sources,
             "retrieval_ms": int((t1 - t0) * 1000),
             "used_top_k": len(sources),
+            "raw": res.get("raw", {}) if isinstance(res, dict) else {},
         }
     
     @staticmethod
@@ -98,69 +298,242 @@ class Answerer:
         return re.sub(r"(?is)\n+sources?:\s*\n[\s\S]*$", "", text).strip()
 
 
-    def _generate(
-        self,
-        question: str,
-        model: str,
-        max_tokens: int,
-        extra_instructions: Optional[str],
-    ) -> Dict[str, Any]:
+    def _prepare(self, question: str, extra_instructions: Optional[str]) -> Dict[str, Any]:
         """
-        하나의 모델로 QA 실행:
+        모델과 상관없는 앞단계 (한 질문에 한 번):
         - 검색 (Retriever)
-        - 프롬프트 생성 (PromptBuilder)
-        - LLM 호출 (SolarClient)
-        - 결과 dict 반환 (항상 동일한 구조)
-
-        실패 시에도 dict로 error 메시지를 포함해 반환합니다.
+        - 프롬프트 생성 (PromptBuilder, 프롬프트 토큰 수 포함)
         """
+        return self._build_prep(question, extra_instructions, self._retrieve(question))
 
-        try:
-            # 1) 검색
-            ret = self._retrieve(question)
+    def _build_prep(self, question: str, extra_instructions: Optional[str], ret: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        검색 결과 → 근거 정리/(옵션) 압축 → 프롬프트. AsyncAnswerer도 검색만 async로 하고 이 함수를 그대로 씀.
+        index_version: 검색이 실제로 본 인덱스 버전 (답변 캐시 저장 키용)
+        """
+        with span("qa.normalize", sources=len(ret["sources"])):
             evidences = self._normalize_evidences(ret["sources"])
+        evidences, compress_stats = self._compress(question, evidences)
+        system_prompt, user_prompt, prompt_stats = self.prompt_builder.build_messages_with_stats(
+            question=question,
+            evidences=evidences,
+            extra_instructions=extra_instructions,
+        )
+        prompt_stats.update(compress_stats)
+        return {
+            "evidences": evidences,
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "retrieval_ms": ret.get("retrieval_ms", 0),
+            "prompt_stats": prompt_stats,
+            "index_version": (ret.get("raw") or {}).get("index_version"),
+        }
 
-            # 2) 프롬프트 생성
-            system_prompt, user_prompt = self.prompt_builder.build_messages(
-                question=question,
-                evidences=evidences,
-                extra_instructions=extra_instructions,
-            )
+    @traced("qa.compress")
+    def _compress(self, question: str, evidences: List[Dict[str, Any]]):
+        """압축기가 켜져 있으면 질문과 관련 있는 문장만 남긴 evidences와 통계, 아니면 그대로."""
+        if self.compressor is None or not evidences:
+            return evidences, {}
+        # 질문 임베딩은 방금 검색하면서 캐시에 들어가 있음 (없으면 한 번 더 받음)
+        q_vec, _ = self.retriever.query_cache.get_or_embed(
+            self.retriever.query_model, question, lambda q: self.solar.embed_query([q])[0]
+        )
+        return self.compressor.compress(q_vec, evidences)
 
-            # 3) LLM 호출
+    def _generate_from(self, prep: Dict[str, Any], model: str, max_tokens: int) -> Dict[str, Any]:
+        """준비된 프롬프트로 한 모델 호출 → 결과 dict (실패해도 dict)."""
+        try:
             t0 = time.time()
             answer = self.solar.generate(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
+                system_prompt=prep["system_prompt"],
+                user_prompt=prep["user_prompt"],
                 model=model,
                 max_tokens=max_tokens,
             )
-            answer = self._strip_model_sources(answer) 
-            t1 = time.time()
-
-            # 4) 정상 결과 반환
-            return {
-                "model": model,
-                "answer": answer,
-                "sources": evidences,
-                "used_top_k": len(evidences),
-                "retrieval_ms": ret.get("retrieval_ms", 0),
-                "gen_ms": int((t1 - t0) * 1000),
-                "error": None,
-            }
+            return self._generation_result(prep, model, answer, int((time.time() - t0) * 1000))
+        except Exception as e:
+            return self._error_result(model, e)
+
+    def _generation_result(self, prep: Dict[str, Any], model: str, answer: str, gen_ms: int) -> Dict[str, Any]:
+        """생성된 답변 → 결과 dict (동기/async 공용)."""
+        if model == self.cascade.strong_model:
+            self.cascade_stats.observe_strong(gen_ms)   # 캐스케이드가 아낀 지연 추정용
+        return {
+            "model": model,
+            "answer": self._strip_model_sources(answer),
+            "sources": prep["evidences"],
+            "used_top_k": len(prep["evidences"]),
+            "retrieval_ms": prep["retrieval_ms"],
+            "gen_ms": gen_ms,
+            "prompt_tokens": prep["prompt_stats"].get("prompt_tokens", 0),
+            "prompt_stats": prep["prompt_stats"],
+            "error": None,
+        }
+
+    def _answer_cache_key(
+        self, question: str, model: str, max_tokens: int, extra_instructions: Optional[str], index: Any = None
+    ) -> str:
+        """
+        답변 캐시 키: 정규화한 질문 + 모델/max_tokens/추가 지시 + 프롬프트 옵션 + 검색/압축 설정 + 인덱스 버전.
+        인덱스 버전 = 별칭이 가리키는 컬렉션 이름/버전(색인 업데이트마다 +1) + 검색 대상 샤드 목록.
+        index를 주면 그 버전(저장할 때: 검색이 실제로 본 버전), 없으면 지금 버전(조회할 때: Retriever.index_version).
+        """
+        r = self.retriever
+        c = self.compressor
+        return cache_key({
+            "q": normalize_query(question),
+            "model": model,
+            "max_tokens": max_tokens,
+            "extra": extra_instructions or "",
+            "prompt": dataclasses.asdict(self.prompt_builder.opt),
+            "retrieval": r.search_options(),
+            "compress": c is not None and (c.block_tokens, c.min_sentences),
+            # 조회: registry에서 바로 읽음 (다른 프로세스가 색인해도 보임)
+            "index": list(index) if index is not None else list(r.index_version()),
+        })
 
+    # 아래 캐시 함수들은 AsyncAnswerer도 그대로 씀 (SQLite를 만지므로 async 쪽은 스레드 풀에서 부름)
+
+    def _cache_lookup(
+        self, question: str, model: str, max_tokens: int, extra_instructions: Optional[str], t0: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        답변 캐시 조회 (지금 인덱스 버전 키). hit이면 결과 dict
+        (cached=True, 검색/생성 시간 0, cache_ms = 이번 조회 시간), miss거나 캐시가 꺼져 있으면 None.
+        """
+        if self.answer_cache is None:
+            return None
+        hit = self.answer_cache.get(self._answer_cache_key(question, model, max_tokens, extra_instructions))
+        if hit is None:
+            return None
+        hit.update(cached=True, retrieval_ms=0, gen_ms=0, cache_ms=round((time.time() - t0) * 1000, 1))
+        return hit
+
+    def _finish(
+        self, question: str, model: str, max_tokens: int, extra_instructions: Optional[str],
+        prep: Optional[Dict[str, Any]], res: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        새로 만든 결과를 답변 캐시에 저장하고 그대로 돌려줌 (cached=False). model은 키에 들어가는 이름(캐스케이드는 정책 이름).
+        - 키의 인덱스 버전은 조회 때 버전이 아니라 검색이 실제로 본 버전(prep["index_version"]).
+          조회와 검색 사이에 색인이 바뀌어 이전 버전으로 답했으면 이전 버전 키로 들어가서, 새 버전 질문에는 안 나감.
+        - 에러 결과와 검색 전에 실패한 결과(prep 없음)는 저장 안 함. trace_id 같은 요청별 값은 빼고 저장.
+        """
+        if self.answer_cache is None:
+            return res
+        res["cached"] = False
+        if res.get("error") or not prep or prep.get("index_version") is None:
+            return res
+        key = self._answer_cache_key(question, model, max_tokens, extra_instructions, index=prep["index_version"])
+        try:
+            self.answer_cache.put(key, res["model"], normalize_query(question),
+                                  {k: v for k, v in res.items() if k not in ("trace_id", "cached")})
         except Exception as e:
-            # ✅ 실패도 항상 dict로 반환 → UI가 깨지지 않음
-            return {
-                "model": model,
-                "answer": f"[ERROR] {e}",
-                "sources": [],
-                "used_top_k": 0,
-                "retrieval_ms": 0,
-                "gen_ms": 0,
-                "error": str(e),
-            }
+            print(f"[WARN] answer cache put failed: {e}")
+        return res
+
+    def _multi_lookup(
+        self, question: str, models: List[str], max_tokens: int, extra_instructions: Optional[str], t0: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """answer_multi: 답변 캐시에 있는 모델 → 결과 (나머지 모델만 검색/생성)."""
+        if self.answer_cache is None:
+            return {}
+        hits = {m: self._cache_lookup(question, m, max_tokens, extra_instructions, t0) for m in dict.fromkeys(models)}
+        return {m: hit for m, hit in hits.items() if hit is not None}
+
+    def _multi_finish(
+        self, question: str, models: List[str], max_tokens: int, extra_instructions: Optional[str],
+        prep: Optional[Dict[str, Any]], cached: Dict[str, Dict[str, Any]], fresh: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """answer_multi: 새 결과를 캐시에 저장하고 models 순서대로 결과 목록 (항상 dict)."""
+        for m, out in fresh.items():
+            if isinstance(out, dict):
+                self._finish(question, m, max_tokens, extra_instructions, prep, out)
+        # ✅ None 방지: 항상 dict 이어야 함
+        results = []
+        for m in models:
+            out = cached.get(m) or fresh.get(m)
+            results.append(dict(out) if isinstance(out, dict) else self._error_result(m, RuntimeError("Unknown failure")))
+        return results
+
+    def _cascade_from(self, prep: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+        """
+        준비된 프롬프트로 작은 모델 → (검사 실패 시) 큰 모델. 결과 dict에 cascade 정보:
+        models(호출한 모델), escalated, reasons(unknown/short/coverage/error), coverage,
+        cheap_ms/strong_ms, saved_ms/saved_cost(이번 요청 추정, 상승했으면 음수)
+        gen_ms는 두 모델 생성 시간의 합 (사용자가 기다린 시간).
+        """
+        cheap = self._generate_from(prep, self.cascade.cheap_model, max_tokens)
+        info = self._cascade_check(prep, cheap)
+        res = self._generate_from(prep, self.cascade.strong_model, max_tokens) if info["escalated"] else cheap
+        return self._cascade_finish(info, cheap, res)
+
+    def _cascade_check(self, prep: Dict[str, Any], cheap: Dict[str, Any]) -> Dict[str, Any]:
+        """작은 모델 결과 검사 → cascade 정보 (escalated/reasons/coverage + 비용 추정)."""
+        policy = self.cascade
+        if cheap.get("error"):
+            reasons, coverage = ["error"], 0.0
+        else:
+            reasons, coverage = policy.check(cheap["answer"], prep["evidences"])
+        # 비용 추정: 같은 프롬프트 + 작은 모델 답변 길이를 두 모델 단가로
+        prompt_tokens = prep["prompt_stats"].get("prompt_tokens", 0)
+        out_tokens = 0 if cheap.get("error") else self.prompt_builder.counter.count(cheap["answer"])
+        return {
+            "policy": policy.name,
+            "models": [policy.cheap_model] + ([policy.strong_model] if reasons else []),
+            "escalated": bool(reasons),
+            "reasons": reasons,
+            "coverage": coverage,
+            "cheap_ms": cheap["gen_ms"],
+            "_cheap_cost": policy.cost(policy.cheap_model, prompt_tokens, out_tokens),
+            "_strong_cost": policy.cost(policy.strong_model, prompt_tokens, out_tokens),
+        }
+
+    def _cascade_finish(self, info: Dict[str, Any], cheap: Dict[str, Any], res: Dict[str, Any]) -> Dict[str, Any]:
+        """집계에 기록하고 최종 결과에 cascade 정보를 붙임."""
+        cheap_cost, strong_cost = info.pop("_cheap_cost"), info.pop("_strong_cost")
+        if info["escalated"]:
+            info["strong_ms"] = res["gen_ms"]
+            res["gen_ms"] = cheap["gen_ms"] + res["gen_ms"]
+        info.update(self.cascade_stats.record(info["reasons"], cheap["gen_ms"], cheap_cost, strong_cost,
+                                              error=bool(res.get("error"))))
+        res["cascade"] = info
+        return res
+
+    @staticmethod
+    def _error_result(model: str, e: Exception) -> Dict[str, Any]:
+        # ✅ 실패도 항상 dict로 반환 → UI가 깨지지 않음
+        return {
+            "model": model,
+            "answer": f"[ERROR] {e}",
+            "sources": [],
+            "used_top_k": 0,
+            "retrieval_ms": 0,
+            "gen_ms": 0,
+            "prompt_tokens": 0,
+            "error": str(e),
+        }
 
+    def _generate(
+        self,
+        question: str,
+        model: str,
+        max_tokens: int,
+        extra_instructions: Optional[str],
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        하나의 모델로 QA 실행:
+        - 검색 + 프롬프트 생성 (_prepare)
+        - LLM 호출 (_generate_from)
+        - (준비 결과, 결과 dict) 반환 (결과는 항상 동일한 구조, 준비 단계에서 실패하면 준비 결과는 None)
+
+        실패 시에도 dict로 error 메시지를 포함해 반환합니다.
+        """
+        try:
+            prep = self._prepare(question, extra_instructions)
+        except Exception as e:
+            return None, self._error_result(model, e)
+        return prep, self._generate_from(prep, model, max_tokens)
 
     # ---------------- public API ---------------- #
 
@@ -171,19 +544,72 @@ class Answerer:
         max_tokens: int = 600,
         extra_instructions: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """단일 모델로 QA 실행"""
-        return self._generate(question, model, max_tokens, extra_instructions)
+        """단일 모델로 QA 실행 (트레이싱이 켜져 있으면 결과에 trace_id, 답변 캐시가 켜져 있으면 cached)"""
+        with span("qa.answer", model=model, question_chars=len(question)) as sp:
+            res = self._cache_lookup(question, model, max_tokens, extra_instructions, time.time())
+            sp.set(cached=res is not None)
+            if res is None:
+                prep, res = self._generate(question, model, max_tokens, extra_instructions)
+                res = self._finish(question, model, max_tokens, extra_instructions, prep, res)
+        res["trace_id"] = sp.trace_id
+        return res
+
+    def answer_cascade(
+        self,
+        question: str,
+        max_tokens: int = 600,
+        extra_instructions: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        캐스케이드 QA: 작은 모델(generation.cascade.cheap_model)로 먼저 생성하고,
+        "모르겠습니다"/너무 짧음/Evidence coverage 부족이면 큰 모델로 다시 생성.
+        결과 dict는 answer()와 같고 cascade 정보가 더 붙음. 집계는 self.cascade_stats.snapshot().
+        """
+        policy = self.cascade
+        with span("qa.answer_cascade", model=policy.name, question_chars=len(question)) as sp:
+            res = self._cache_lookup(question, policy.name, max_tokens, extra_instructions, time.time())
+            if res is None:
+                prep = None
+                try:
+                    prep = self._prepare(question, extra_instructions)
+                except Exception as e:
+                    res = self._error_result(policy.cheap_model, e)
+                else:
+                    res = self._cascade_from(prep, max_tokens)
+                    sp.set(escalated=res["cascade"]["escalated"], reasons=",".join(res["cascade"]["reasons"]))
+                res = self._finish(question, policy.name, max_tokens, extra_instructions, prep, res)
+            sp.set(cached=bool(res.get("cached")))
+        res["trace_id"] = sp.trace_id
+        return res
 
     def answer_multi(self, question: str, models: List[str], max_tokens: int = 600, extra_instructions: Optional[str] = None) -> List[Dict[str, Any]]:
-        results: List[Dict[str, Any]] = []
-        for m in models:
-            out = self._generate(question, m, max_tokens, extra_instructions)
-            # ✅ None 방지: 항상 dict 이어야 함
-            if not isinstance(out, dict):
-                out = {"model": m, "answer": "[ERROR] Unknown failure", "sources": [], "used_top_k": 0, "retrieval_ms": 0, "gen_ms": 0, "error": "unknown"}
-            results.append(out)
+        """
+        여러 모델 비교: 검색/프롬프트는 한 번만 만들어 모든 모델이 같은 근거를 보게 하고,
+        모델 호출은 동시에 보냄 → 전체 시간 ≈ 가장 느린 모델 시간. 결과는 models 순서대로, gen_ms는 모델별.
+        """
+        if not models:
+            return []
+        with span("qa.answer_multi", models=",".join(models), question_chars=len(question)) as sp:
+            # 캐시 hit인 모델은 바로 채우고, 나머지 모델만 검색/생성
+            cached = self._multi_lookup(question, models, max_tokens, extra_instructions, time.time())
+            todo = [m for m in dict.fromkeys(models) if m not in cached]
+            sp.set(cached=len(cached))
+            fresh: Dict[str, Any] = {}
+            prep = None
+            if todo:
+                try:
+                    prep = self._prepare(question, extra_instructions)
+                except Exception as e:
+                    fresh = {m: self._error_result(m, e) for m in todo}
+                else:
+                    # 모델 호출 스레드에서도 같은 trace 밑으로 (bind)
+                    with ThreadPoolExecutor(max_workers=len(todo)) as pool:
+                        fresh = dict(zip(todo, pool.map(bind(lambda m: self._generate_from(prep, m, max_tokens)), todo)))
+            results = self._multi_finish(question, models, max_tokens, extra_instructions, prep, cached, fresh)
+        for out in results:
+            out["trace_id"] = sp.trace_id
         return results
-    
+
     # src/qa/answerer.py — Answerer 클래스 내부에 추가
 
     def _normalize_evidences(self, sources) -> list[dict]:
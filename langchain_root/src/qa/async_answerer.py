@@ -0,0 +1,243 @@
+# src/qa/async_answerer.py
+"""
+AsyncAnswerer
+-------------
+Answerer(answerer.py)의 async 버전 API. 서빙 프로세스가 이벤트 루프 하나로 여러 질문을 동시에 처리하도록
+네트워크 대기(임베딩/생성)는 AsyncSolarClient로 await 하고, 블로킹인 Chroma 검색은 크기가 정해진
+스레드 풀(retrieval_workers)에서 돌립니다.
+
+주요 동작
+---------
+1) 질문 임베딩: 프로세스 공용 질문 임베딩 캐시에 없으면 async로 받아 캐시에 넣어 둠
+   → 스레드 풀의 Retriever.search는 캐시 hit라 블로킹 API 호출 없이 Chroma만 봄
+2) 프롬프트 생성/결과 dict/답변 캐시 조회·저장/캐스케이드 검사는 Answerer의 함수를 그대로 부름
+   (_build_prep, _generation_result, _cache_lookup, _finish, _multi_lookup, _multi_finish, _cascade_check)
+   → 여기에는 await 순서만 있음. 결과 dict 모양과 캐시 키도 Answerer와 같음
+3) answer(), answer_multi(), answer_cascade(), answer_stream() (answer_stream은 답변 캐시를 안 씀)
+4) 답변 캐시는 검색이 실제로 본 인덱스 버전으로 저장 (Answerer._finish)
+5) SQLite를 만지는 일(답변 캐시 조회/저장, 질문 임베딩 캐시 저장, 인덱스 버전 확인)은 짧아도 블로킹이라
+   전부 검색과 같은 스레드 풀에서 (_blocking). 이벤트 루프에서는 네트워크 대기만.
+
+취소
+----
+- 클라이언트가 끊겨 작업이 취소되면 CancelledError가 그대로 올라감(삼키지 않음).
+  진행 중인 HTTP 요청/스트림은 httpx가 닫고, answer_multi는 아직 안 끝난 모델 호출도 함께 취소됨.
+- 이미 스레드 풀에서 돌고 있는 검색은 끝까지 돈 뒤 결과만 버려짐(스레드는 중간에 멈출 수 없음).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.utils.config import AppConfig
+from src.llm.solar_async import AsyncSolarClient
+from src.qa.answerer import Answerer
+from src.retriever.query_cache import normalize_query
+from src.utils.tracing import bind, span
+
+class AsyncAnswerer:
+    def __init__(self, answerer: Answerer, solar: AsyncSolarClient, retrieval_workers: int = 8):
+        """
+        Parameters
+        ----------
+        answerer : Answerer
+            검색기/프롬프트 빌더 설정을 그대로 빌려 쓸 동기 Answerer.
+        solar : AsyncSolarClient
+            임베딩/생성 async 클라이언트.
+        retrieval_workers : int
+            Chroma 검색을 돌릴 스레드 수 (동시에 도는 검색 수 상한).
+        """
+        self.answerer = answerer
+        self.retriever = answerer.retriever
+        self.solar = solar
+        self._executor = ThreadPoolExecutor(max_workers=max(1, retrieval_workers), thread_name_prefix="retrieval")
+
+    @classmethod
+    def from_config(cls, cfg: AppConfig, retrieval_workers: int = 8, max_connections: int = 32, **answerer_kwargs) -> "AsyncAnswerer":
+        return cls(
+            Answerer(cfg, **answerer_kwargs),
+            AsyncSolarClient(api_key=cfg.solar_api_key, max_connections=max_connections,
+                             hedger=Answerer._hedger(cfg)),   # 동기 Answerer와 같은 공용 Hedger
+            retrieval_workers=retrieval_workers,
+        )
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        await self.solar.aclose()
+
+    # ---------------- internal helpers ---------------- #
+
+    async def _blocking(self, fn, *args):
+        """블로킹 함수(Chroma/SQLite)를 스레드 풀에서 실행 (현재 span 유지)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, bind(fn), *args)
+
+    async def _cached(self, fn, *args):
+        """답변 캐시 함수: 캐시가 꺼져 있으면 SQLite를 안 만지므로 바로, 켜져 있으면 스레드 풀에서."""
+        if self.answerer.answer_cache is None:
+            return fn(*args)
+        return await self._blocking(fn, *args)
+
+    async def _retrieve(self, question: str) -> Dict[str, Any]:
+        t0 = time.time()
+        with span("qa.retrieve"):
+            cache, model = self.retriever.query_cache, self.retriever.query_model
+            if cache.get(model, question) is None:   # 메모리 LRU만 봄
+                vec = (await self.solar.embed_query([normalize_query(question)]))[0]
+                await self._blocking(cache.put, model, question, vec)   # persist면 SQLite에 씀
+            res = await self._blocking(self.retriever.search, question)
+        sources = res.get("sources") or []
+        return {
+            "sources": sources,
+            "retrieval_ms": int((time.time() - t0) * 1000),
+            "used_top_k": len(sources),
+            "raw": res.get("raw", {}),
+        }
+
+    async def _prepare(self, question: str, extra_instructions: Optional[str]) -> Dict[str, Any]:
+        ret = await self._retrieve(question)
+        # 근거 정리/압축(문장 임베딩은 동기 클라이언트)/프롬프트는 Answerer와 같은 함수로, 검색과 같은 스레드 풀에서
+        return await self._blocking(self.answerer._build_prep, question, extra_instructions, ret)
+
+    async def _generate_from(self, prep: Dict[str, Any], model: str, max_tokens: int) -> Dict[str, Any]:
+        try:
+            t0 = time.time()
+            answer = await self.solar.generate(
+                system_prompt=prep["system_prompt"],
+                user_prompt=prep["user_prompt"],
+                model=model,
+                max_tokens=max_tokens,
+            )
+            return self.answerer._generation_result(prep, model, answer, int((time.time() - t0) * 1000))
+        except Exception as e:   # CancelledError는 Exception이 아니라 그대로 전파됨
+            return self.answerer._error_result(model, e)
+
+    # ---------------- public API ---------------- #
+
+    async def answer(
+        self,
+        question: str,
+        model: str = "solar-pro",
+        max_tokens: int = 600,
+        extra_instructions: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """단일 모델로 QA 실행 (Answerer.answer와 같은 결과 dict)"""
+        a = self.answerer
+        with span("qa.answer", model=model, question_chars=len(question)) as sp:
+            res = await self._cached(a._cache_lookup, question, model, max_tokens, extra_instructions, time.time())
+            sp.set(cached=res is not None)
+            if res is None:
+                prep = None
+                try:
+                    prep = await self._prepare(question, extra_instructions)
+                except Exception as e:
+                    res = a._error_result(model, e)
+                else:
+                    res = await self._generate_from(prep, model, max_tokens)
+                res = await self._cached(a._finish, question, model, max_tokens, extra_instructions, prep, res)
+        res["trace_id"] = sp.trace_id
+        return res
+
+    async def answer_cascade(
+        self, question: str, max_tokens: int = 600, extra_instructions: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """작은 모델 먼저, 검사에 걸리면 큰 모델 (Answerer.answer_cascade와 같은 결과 dict)"""
+        a = self.answerer
+        policy = a.cascade
+        with span("qa.answer_cascade", model=policy.name, question_chars=len(question)) as sp:
+            res = await self._cached(a._cache_lookup, question, policy.name, max_tokens, extra_instructions, time.time())
+            if res is None:
+                prep = None
+                try:
+                    prep = await self._prepare(question, extra_instructions)
+                except Exception as e:
+                    res = a._error_result(policy.cheap_model, e)
+                else:
+                    cheap = await self._generate_from(prep, policy.cheap_model, max_tokens)
+                    info = a._cascade_check(prep, cheap)
+                    res = await self._generate_from(prep, policy.strong_model, max_tokens) if info["escalated"] else cheap
+                    res = a._cascade_finish(info, cheap, res)
+                    sp.set(escalated=info["escalated"], reasons=",".join(info["reasons"]))
+                res = await self._cached(a._finish, question, policy.name, max_tokens, extra_instructions, prep, res)
+            sp.set(cached=bool(res.get("cached")))
+        res["trace_id"] = sp.trace_id
+        return res
+
+    async def answer_multi(
+        self, question: str, models: List[str], max_tokens: int = 600, extra_instructions: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """검색/프롬프트 한 번 + 모델 호출 동시에. 결과는 models 순서대로."""
+        if not models:
+            return []
+        a = self.answerer
+        with span("qa.answer_multi", models=",".join(models), question_chars=len(question)) as sp:
+            cached = await self._cached(a._multi_lookup, question, models, max_tokens, extra_instructions, time.time())
+            todo = [m for m in dict.fromkeys(models) if m not in cached]
+            sp.set(cached=len(cached))
+            fresh: Dict[str, Dict[str, Any]] = {}
+            prep = None
+            if todo:
+                try:
+                    prep = await self._prepare(question, extra_instructions)
+                except Exception as e:
+                    fresh = {m: a._error_result(m, e) for m in todo}
+                else:
+                    outs = await asyncio.gather(*(self._generate_from(prep, m, max_tokens) for m in todo))
+                    fresh = dict(zip(todo, outs))
+            results = await self._cached(a._multi_finish, question, models, max_tokens, extra_instructions, prep, cached, fresh)
+        for res in results:
+            res["trace_id"] = sp.trace_id
+        return results
+
+    async def answer_stream(
+        self,
+        question: str,
+        model: str = "solar-pro",
+        max_tokens: int = 600,
+        extra_instructions: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        스트리밍 QA. 이벤트 dict를 차례로 돌려줌:
+        - {"type": "sources", "sources": [...], "retrieval_ms": int, "prompt_tokens": int}   검색이 끝나면 바로
+        - {"type": "delta", "text": str}                                생성 조각
+        - {"type": "done", "answer": str, "gen_ms": int, "first_token_ms": int}
+        - {"type": "error", "error": str}                               실패 시 (그 뒤로는 없음)
+        """
+        try:
+            # async generator라 span은 yield 전에 닫음 (생성 단계는 solar.generate_stream이 기록)
+            with span("qa.answer_stream.prepare", model=model, question_chars=len(question)):
+                prep = await self._prepare(question, extra_instructions)
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+            return
+        yield {
+            "type": "sources",
+            "sources": prep["evidences"],
+            "retrieval_ms": prep["retrieval_ms"],
+            "prompt_tokens": prep["prompt_stats"].get("prompt_tokens", 0),
+        }
+
+        t0 = time.time()
+        first_token_ms = None
+        parts: List[str] = []
+        try:
+            async for delta in self.solar.generate_stream(
+                system_prompt=prep["system_prompt"],
+                user_prompt=prep["user_prompt"],
+                model=model,
+                max_tokens=max_tokens,
+            ):
+                if first_token_ms is None:
+                    first_token_ms = int((time.time() - t0) * 1000)
+                parts.append(delta)
+                yield {"type": "delta", "text": delta}
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+            return
+        yield {
+            "type": "done",
+            "answer": self.answerer._strip_model_sources("".join(parts)),
+            "gen_ms": int((time.time() - t0) * 1000),
+            "first_token_ms": first_token_ms,
+        }
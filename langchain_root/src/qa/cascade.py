@@ -0,0 +1,135 @@
+# src/qa/cascade.py
+"""
+- 캐스케이드 생성: 싸고 빠른 모델(solar-mini)로 먼저 답하고, 값싼 검사에 걸릴 때만 큰 모델(solar-pro)로 다시 생성.
+- 검사 (전부 로컬 문자열 계산, API 호출 없음)
+  - unknown  : 답변에 "모르겠습니다" (프롬프트 규칙상 Evidence가 부족하다고 본 경우)
+  - short    : 답변 글자 수 < min_answer_chars
+  - coverage : 답변이 Evidence에 얼마나 기대는지 < min_coverage
+               (답변 단어 안 글자 2-gram 중 Evidence에도 있는 비율. 한국어 조사가 붙어도 대부분 겹침)
+- CascadeStats: 프로세스 공용 집계 — 상승(escalation) 비율/사유별 건수, 아낀 지연/비용 추정.
+  아낀 지연 = (큰 모델 평균 gen_ms − 작은 모델 gen_ms), 상승한 요청은 작은 모델 시간만큼 손해로 셈.
+  비용은 generation.cascade.prices(1M 토큰당 입력/출력 단가)로 추정. 출력 토큰은 답변을 토크나이저로 센 값.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+UNKNOWN_MARKERS = ("모르겠습니다",)
+
+def _bigrams(text: str) -> set:
+    # 단어 경계를 넘지 않는 글자 2-gram (공백/문장부호 제외, 대소문자 무시)
+    grams = set()
+    for w in re.findall(r"\w+", (text or "").lower()):
+        grams.update(w[i:i + 2] for i in range(len(w) - 1))
+    return grams
+
+def evidence_coverage(answer: str, evidences: List[Dict[str, Any]]) -> float:
+    """답변 글자 2-gram 중 Evidence 본문/제목에도 나오는 비율 (0~1). 답변이 비면 0."""
+    ans = _bigrams(answer)
+    if not ans:
+        return 0.0
+    ev = set()
+    for e in evidences:
+        ev |= _bigrams(f"{e.get('title') or ''} {e.get('text') or ''}")
+    return len(ans & ev) / len(ans)
+
+class CascadePolicy:
+    def __init__(
+        self,
+        cheap_model: str = "solar-mini",
+        strong_model: str = "solar-pro",
+        min_answer_chars: int = 200,    # 이보다 짧으면 상승 (프롬프트가 불릿 5개 이상을 요구함)
+        min_coverage: float = 0.5,      # Evidence 2-gram 비율이 이보다 낮으면 상승
+        prices: Optional[Dict[str, Dict[str, float]]] = None,   # {모델: {"input": $/1M, "output": $/1M}}
+    ):
+        self.cheap_model = cheap_model
+        self.strong_model = strong_model
+        self.min_answer_chars = max(0, min_answer_chars)
+        self.min_coverage = min_coverage
+        self.prices = prices or {}
+
+    @property
+    def name(self) -> str:
+        """캐시 키/결과 표시용 이름 (검사 기준이 바뀌면 다른 이름)"""
+        return f"cascade:{self.cheap_model}>{self.strong_model}:{self.min_answer_chars}:{self.min_coverage}"
+
+    def check(self, answer: str, evidences: List[Dict[str, Any]]) -> Tuple[List[str], float]:
+        """반환: (상승 사유 목록 — 비어 있으면 작은 모델 답변 채택, evidence coverage)"""
+        reasons = []
+        if any(m in answer for m in UNKNOWN_MARKERS):
+            reasons.append("unknown")
+        if len(answer.strip()) < self.min_answer_chars:
+            reasons.append("short")
+        coverage = evidence_coverage(answer, evidences)
+        if coverage < self.min_coverage:
+            reasons.append("coverage")
+        return reasons, round(coverage, 3)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """추정 비용($). 단가가 없는 모델은 0."""
+        p = self.prices.get(model) or {}
+        return (prompt_tokens * float(p.get("input", 0)) + completion_tokens * float(p.get("output", 0))) / 1e6
+
+class CascadeStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.escalated = 0
+        self.errors = 0
+        self.reasons: Dict[str, int] = {}
+        self.saved_ms = 0.0
+        self.saved_cost = 0.0
+        self._strong_ms: Optional[float] = None   # 큰 모델 gen_ms 이동 평균 (아낀 지연 추정용)
+
+    def observe_strong(self, gen_ms: float) -> None:
+        """큰 모델 생성 시간을 관찰 (캐스케이드 상승 때 + 일반 호출 때)"""
+        with self.lock:
+            self._strong_ms = gen_ms if self._strong_ms is None else 0.8 * self._strong_ms + 0.2 * gen_ms
+
+    def record(self, reasons: List[str], cheap_ms: float, cheap_cost: float, strong_cost: float, error: bool = False) -> Dict[str, float]:
+        """
+        한 요청 결과 기록. strong_cost = (상승 안 했으면) 같은 프롬프트를 큰 모델로 보냈을 때의 추정 비용.
+        반환: 이번 요청에서 아낀 {saved_ms, saved_cost} (상승했으면 음수 = 작은 모델 몫 손해)
+        """
+        with self.lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+            if reasons:
+                self.escalated += 1
+                for r in reasons:
+                    self.reasons[r] = self.reasons.get(r, 0) + 1
+                saved = {"saved_ms": -cheap_ms, "saved_cost": -cheap_cost}
+            else:
+                strong_ms = self._strong_ms if self._strong_ms is not None else cheap_ms
+                saved = {"saved_ms": max(0.0, strong_ms - cheap_ms), "saved_cost": strong_cost - cheap_cost}
+            self.saved_ms += saved["saved_ms"]
+            self.saved_cost += saved["saved_cost"]
+            return {k: round(v, 6) for k, v in saved.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            n = self.requests
+            return {
+                "requests": n,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / n, 4) if n else 0.0,
+                "reasons": dict(self.reasons),
+                "errors": self.errors,
+                "saved_ms_total": round(self.saved_ms, 1),
+                "saved_ms_avg": round(self.saved_ms / n, 1) if n else 0.0,
+                "saved_cost_total": round(self.saved_cost, 6),
+                "strong_ms_avg": round(self._strong_ms, 1) if self._strong_ms is not None else None,
+            }
+
+_stats: Optional[CascadeStats] = None
+_stats_lock = threading.Lock()
+
+def get_cascade_stats() -> CascadeStats:
+    """프로세스 공용 캐스케이드 집계 (UI 재실행/Answerer 재생성에도 유지)"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = CascadeStats()
+        return _stats
@@ -0,0 +1,125 @@
+# src/retriever/compressor.py
+"""
+- 검색 결과(Evidence)를 프롬프트에 넣기 전에 질문과 관련 있는 문장만 남기는 추출식 압축 단계입니다.
+- 청크를 문장으로 나누고, 문장 임베딩(embedding-passage)과 질문 임베딩의 코사인 유사도를
+  행렬 곱 한 번으로 계산해서 점수가 높은 문장부터 블록당 토큰 예산(block_tokens)까지 남깁니다.
+  남긴 문장은 원래 순서대로 이어 붙임(읽기 흐름 유지).
+- 예산 안에 이미 들어가는 짧은 블록은 그대로 둡니다(임베딩도 안 함).
+- 문장 임베딩은 프로세스 안 LRU(QueryEmbeddingCache, 메모리 전용)에 두어 자주 뽑히는 청크는 API를 다시 안 부름.
+- 임베딩 API가 실패하면 압축하지 않은 원래 Evidence를 그대로 씁니다.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.retriever.query_cache import QueryEmbeddingCache
+from src.utils.text import TokenCounter, split_sentences
+
+class EvidenceCompressor:
+    def __init__(
+        self,
+        solar_client,
+        token_counter: TokenCounter,
+        block_tokens: int = 160,       # 블록 하나에 남길 본문 토큰 상한
+        min_sentences: int = 1,        # 예산과 상관없이 최소로 남길 문장 수 (가장 관련 높은 것부터)
+        embed_batch_size: int = 64,    # 문장 임베딩 한 요청당 문장 수
+        cache_size: int = 4096,        # 문장 임베딩 LRU 크기
+    ):
+        self.solar = solar_client
+        self.counter = token_counter
+        self.block_tokens = max(1, block_tokens)
+        self.min_sentences = max(0, min_sentences)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.model = "embedding-passage"
+        self.cache = QueryEmbeddingCache(max_size=cache_size)
+
+    def _embed_sentences(self, sents: List[str]) -> Tuple[List[List[float]], int]:
+        """캐시에 없는 문장만(중복 제거) 배치로 임베딩. 반환: (문장별 벡터, API에 보낸 문장 수)"""
+        vecs: List[Any] = [self.cache.get(self.model, s) for s in sents]
+        missing = list(dict.fromkeys(s for s, v in zip(sents, vecs) if v is None))
+        embedded: Dict[str, List[float]] = {}
+        for start in range(0, len(missing), self.embed_batch_size):
+            part = missing[start:start + self.embed_batch_size]
+            for s, v in zip(part, self.solar.embed_passage(part)):
+                embedded[s] = v
+                self.cache.put(self.model, s, v)
+        return [v if v is not None else embedded[s] for s, v in zip(sents, vecs)], len(missing)
+
+    def compress(
+        self, q_vec: Optional[List[float]], evidences: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        반환: (압축한 evidences(원본 dict는 건드리지 않고 복사), 통계)
+        통계: compress_status(ok/skip/error), compress_ms, compress_tokens_before/after,
+              compress_ratio(after/before), compress_sentences/kept, compress_embedded(API로 보낸 문장 수)
+        """
+        t0 = time.perf_counter()
+        # 블록별 문장/토큰 수 (예산 안이면 압축 대상 아님)
+        plans: List[Optional[Tuple[List[str], List[int]]]] = []
+        before = 0
+        for ev in evidences:
+            text = ev.get("text") or ""
+            n = self.counter.count(text)
+            before += n
+            if n <= self.block_tokens:
+                plans.append(None)
+                continue
+            sents = split_sentences(text)
+            plans.append((sents, self.counter.count_many(sents)) if len(sents) > 1 else None)
+
+        stats: Dict[str, Any] = {"compress_tokens_before": before, "compress_embedded": 0}
+        flat = [s for p in plans if p for s in p[0]]
+        if not flat or q_vec is None:
+            stats.update(compress_status="skip", compress_tokens_after=before, compress_ratio=1.0,
+                         compress_sentences=0, compress_kept=0,
+                         compress_ms=round((time.perf_counter() - t0) * 1000, 1))
+            return list(evidences), stats
+
+        try:
+            vecs, stats["compress_embedded"] = self._embed_sentences(flat)
+        except Exception as e:
+            print(f"[WARN] evidence compression failed: {e}")
+            stats.update(compress_status="error", compress_tokens_after=before, compress_ratio=1.0,
+                         compress_sentences=len(flat), compress_kept=len(flat),
+                         compress_ms=round((time.perf_counter() - t0) * 1000, 1))
+            return list(evidences), stats
+
+        # 전체 문장 점수를 한 번에: 정규화한 문장 행렬 · 질문 벡터
+        S = np.asarray(vecs, dtype=np.float32)
+        S /= np.linalg.norm(S, axis=1, keepdims=True) + 1e-12
+        q = np.asarray(q_vec, dtype=np.float32)
+        scores = S @ (q / (np.linalg.norm(q) + 1e-12))
+
+        out: List[Dict[str, Any]] = []
+        after = kept_total = 0
+        pos = 0
+        for ev, plan in zip(evidences, plans):
+            if plan is None:
+                out.append(ev)
+                after += self.counter.count(ev.get("text") or "")
+                continue
+            sents, counts = plan
+            sc = scores[pos:pos + len(sents)]
+            pos += len(sents)
+            keep, used = [], 0
+            for j in np.argsort(-sc, kind="stable"):
+                # 예산을 넘는 문장은 건너뛰고 더 짧은 다음 문장이 들어갈 수 있으면 계속
+                if used + counts[j] <= self.block_tokens or len(keep) < self.min_sentences:
+                    keep.append(int(j))
+                    used += counts[j]
+            text = " ".join(sents[j] for j in sorted(keep))
+            out.append({**ev, "text": text, "compressed": True})
+            after += used
+            kept_total += len(keep)
+
+        stats.update(
+            compress_status="ok",
+            compress_tokens_after=after,
+            compress_ratio=round(after / before, 3) if before else 1.0,
+            compress_sentences=len(flat),
+            compress_kept=kept_total,
+            compress_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return out, stats
@@ -0,0 +1,116 @@
+# src/retriever/query_cache.py
+"""
+- 질문 임베딩(embedding-query) 결과를 메모리에 들고 있는 LRU 캐시입니다.
+- 같은 질문(기본 질문, 자주 묻는 질문)이 다시 오면 임베딩 API를 부르지 않고 바로 벡터를 씁니다.
+- 키: (임베딩 모델, 정규화한 질문). 정규화 = 유니코드 NFC + 앞뒤/연속 공백 정리.
+- 프로세스 전체에서 하나만 씁니다(get_query_cache). UI가 "Apply Retrieval Settings"로
+  Retriever를 새로 만들어도 캐시는 그대로 남습니다.
+- persist_path를 주면 SQLite에도 같이 저장해서 재시작 후에도 이어 씁니다.
+"""
+
+import os, re, sqlite3, threading, time, unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_embeddings(
+  model TEXT,
+  query TEXT,               -- 정규화한 질문
+  embedding BLOB,           -- float32
+  last_used REAL,
+  PRIMARY KEY(model, query)
+);
+"""
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = 1024, persist_path: Optional[str] = None):
+        self.max_size = max(1, max_size)
+        self.lock = threading.Lock()
+        self._items: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+        if persist_path:
+            if persist_path != ":memory:":
+                os.makedirs(os.path.dirname(persist_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(persist_path, check_same_thread=False)
+            if persist_path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL;")
+            self.conn.executescript(SCHEMA)
+            self._load()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, normalize_query(text))
+        with self.lock:
+            vec = self._items.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, model: str, text: str, vec: List[float]) -> None:
+        key = (model, normalize_query(text))
+        with self.lock:
+            self._items[key] = list(vec)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings(model, query, embedding, last_used) VALUES(?,?,?,?)",
+                    (key[0], key[1], array("f", vec).tobytes(), time.time()),
+                )
+                self.conn.commit()
+
+    def get_or_embed(self, model: str, text: str, embed: Callable[[str], List[float]]) -> Tuple[List[float], bool]:
+        """캐시에 있으면 (벡터, True), 없으면 embed(text)로 구해 저장하고 (벡터, False)."""
+        vec = self.get(model, text)
+        if vec is not None:
+            return vec, True
+        vec = embed(text)
+        self.put(model, text, vec)
+        return vec, False
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def _load(self) -> None:
+        # 최근에 쓴 것부터 max_size개만 올림 (오래된 것 → 최근 순으로 넣어 LRU 순서 유지)
+        rows = self.conn.execute(
+            "SELECT model, query, embedding FROM query_embeddings ORDER BY last_used DESC LIMIT ?",
+            (self.max_size,),
+        ).fetchall()
+        for model, query, blob in reversed(rows):
+            a = array("f")
+            a.frombytes(blob)
+            self._items[(model, query)] = a.tolist()
+
+_shared: Optional[QueryEmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+def get_query_cache(max_size: int = 1024, persist_path: Optional[str] = None) -> QueryEmbeddingCache:
+    """프로세스 공용 캐시. 처음 부를 때의 설정으로 만들고, 이후에는 같은 객체를 돌려줌."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = QueryEmbeddingCache(max_size=max_size, persist_path=persist_path)
+        return _shared
@@ -0,0 +1,113 @@
+# src/retriever/reranker.py
+"""
+- 벡터 검색 후보를 (질문, 청크) 쌍으로 cross-encoder에 넣어 다시 점수 매기는 CPU 재정렬 단계입니다.
+- 모델은 ONNX로 내보낸 작은 cross-encoder(예: bge-reranker-base, ms-marco-MiniLM)를 `onnxruntime`으로,
+  토크나이저는 같은 모델의 tokenizer.json을 `tokenizers`로 불러옵니다. (둘 다 처음 쓸 때 import)
+- 후보를 batch_size개씩 묶어 돌리고, 질문당 budget_ms를 넘길 것 같으면 멈춥니다.
+  끝까지 못 돌렸으면(시간 초과) 또는 모델이 없으면 원래 벡터 순서를 그대로 씁니다.
+"""
+
+import os, time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str,
+        batch_size: int = 16,
+        max_length: int = 256,
+        budget_ms: float = 300.0,
+        threads: int = 0,          # 0이면 onnxruntime 기본값
+    ):
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.budget_ms = budget_ms
+        self.session = None
+        self.tok = None
+        self.input_names: List[str] = []
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+            if not (os.path.exists(model_path) and os.path.exists(tokenizer_path)):
+                raise FileNotFoundError(f"{model_path} / {tokenizer_path}")
+            opts = ort.SessionOptions()
+            if threads:
+                opts.intra_op_num_threads = threads
+            self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+            self.input_names = [i.name for i in self.session.get_inputs()]
+            self.tok = Tokenizer.from_file(tokenizer_path)
+            self.tok.enable_truncation(max_length=max_length)
+            self.tok.enable_padding()
+        except Exception as e:
+            print(f"[WARN] reranker 로드 실패({model_path}) → 벡터 순서를 그대로 씁니다: {e}")
+            self.session = None
+
+    @property
+    def available(self) -> bool:
+        return self.session is not None
+
+    def rerank(self, question: str, texts: List[str]) -> Tuple[Optional[List[int]], Optional[List[float]], Dict[str, Any]]:
+        """
+        반환: (새 순서(후보 인덱스) 또는 None, 후보별 점수 또는 None, 통계)
+        None이면 재정렬하지 않음(모델 없음/시간 초과/오류) → 호출 쪽은 벡터 순서 유지.
+        """
+        t0 = time.perf_counter()
+        stats: Dict[str, Any] = {"rerank_status": "off", "rerank_scored": 0, "rerank_batches": 0}
+        if not self.available or not texts:
+            stats["rerank_ms"] = 0.0
+            return None, None, stats
+
+        scores: List[float] = []
+        last_batch_ms = 0.0
+        try:
+            for start in range(0, len(texts), self.batch_size):
+                elapsed = (time.perf_counter() - t0) * 1000
+                # 이번 배치가 직전 배치만큼 걸린다고 보고, 예산을 넘길 것 같으면 여기서 멈춤
+                if elapsed + last_batch_ms > self.budget_ms:
+                    stats.update(rerank_status="timeout", rerank_ms=round(elapsed, 1))
+                    return None, None, stats
+                t_b = time.perf_counter()
+                scores.extend(self._score_batch(question, texts[start:start + self.batch_size]))
+                last_batch_ms = (time.perf_counter() - t_b) * 1000
+                stats["rerank_batches"] += 1
+                stats["rerank_scored"] = len(scores)
+        except Exception as e:
+            print(f"[WARN] rerank failed: {e}")
+            stats.update(rerank_status="error", rerank_ms=round((time.perf_counter() - t0) * 1000, 1))
+            return None, None, stats
+
+        # 점수 높은 순 (동점이면 원래 벡터 순서 우선)
+        order = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        stats.update(rerank_status="ok", rerank_ms=round((time.perf_counter() - t0) * 1000, 1))
+        return order, scores, stats
+
+    def _score_batch(self, question: str, texts: List[str]) -> List[float]:
+        encs = self.tok.encode_batch([(question, t) for t in texts])
+        arrays = {
+            "input_ids": np.asarray([e.ids for e in encs], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encs], dtype=np.int64),
+            "token_type_ids": np.asarray([e.type_ids for e in encs], dtype=np.int64),
+        }
+        feeds = {name: arrays[name] for name in self.input_names if name in arrays}
+        logits = np.asarray(self.session.run(None, feeds)[0], dtype=np.float32)
+        # 출력이 [B, 1](관련도 점수)이면 그대로, [B, 2](무관/관련)이면 관련 쪽 logit
+        if logits.ndim == 1:
+            return logits.tolist()
+        return logits[:, -1].tolist()
+
+@lru_cache(maxsize=2)
+def get_reranker(
+    model_path: str,
+    tokenizer_path: str,
+    batch_size: int = 16,
+    max_length: int = 256,
+    budget_ms: float = 300.0,
+    threads: int = 0,
+) -> CrossEncoderReranker:
+    """같은 모델을 프로세스 안에서 한 번만 불러오도록 공유. (UI에서 Retriever를 새로 만들어도 재사용)"""
+    return CrossEncoderReranker(model_path, tokenizer_path, batch_size, max_length, budget_ms, threads)
@@ -4,21 +4,43 @@
 - Chroma(VectorDB)에서 가장 관련 있는 청크 Top-k를 찾아옵니다.
 - (옵션) MMR로 비슷비슷한 청크를 덜어내고 다양하게 뽑습니다.
 - 생성기에 넘길 '컨텍스트 문자열'과 '출처 메타데이터'를 함께 돌려줍니다.
+- registry를 주면 collection_name을 별칭으로 보고, 검색할 때마다 실제 컬렉션을 다시 확인합니다.
+  (재색인 후 별칭이 새 컬렉션으로 바뀌면 재시작 없이 따라감)
+  확인 결과는 IndexSnapshot(이름/버전/컬렉션/샤드, 바뀌지 않는 값)으로 검색 끝까지 들고 다님
+  → 여러 스레드가 같은 Retriever로 검색하는 중에 별칭이 바뀌어도 한 검색 안에서 옛/새 컬렉션이 섞이지 않음.
+- 질문 임베딩은 프로세스 공용 LRU 캐시(query_cache.py)를 먼저 봅니다. 같은 질문은 API를 다시 안 부름.
+- lexical(FTS5 키워드 인덱스)을 주면 하이브리드 검색: 키워드 검색과 벡터 검색을 동시에 돌리고
+  RRF(reciprocal rank fusion)로 순위를 합친 뒤 MMR로 고릅니다. (모델명/법령명 같은 정확 일치 보강)
+- 기간/출처/언어 필터는 Chroma where 조건으로 바꿔 벡터 검색 안에서 거릅니다.
+  (후보를 많이 가져와서 파이썬에서 버리는 방식이 아니라 n_results를 그대로 둬도 됨)
+- mmap_index를 주면 벡터 검색을 Chroma 대신 메모리 매핑 행렬(mmap_index.py)에서 합니다.
+  컬렉션 버전이 바뀌면 인덱스가 백그라운드에서 다시 떠지고, 준비 전에는 Chroma로 검색합니다.
+- semantic_cache를 주면 뜻이 거의 같은 이전 질문의 후보 집합을 재사용합니다(semantic_cache.py).
+- group_by_doc이면 같은 기사 청크는 가장 순위 높은 것 하나만 남기고(top_k 자리를 한 기사가 차지하지 않게),
+  expand_window > 0이면 고른 청크의 앞뒤 chunk_index 이웃을 col.get(ids) 한 번으로 가져와 이어 붙입니다.
+  (질문당 추가 조회는 최대 1번, 가져올 이웃 id 수는 max_expand_ids로 제한)
+- reranker(reranker.py)를 주면 후보를 rerank_candidates개까지 넉넉히 가져와 CPU cross-encoder로 다시 정렬하고
+  그 순서대로 top_k를 고릅니다(MMR 대신). 시간 예산을 넘기면 원래 벡터 순서 + MMR로 진행.
+- 색인이 월별 샤드(<컬렉션>__mYYYY_MM, registry에 기록)로 나뉘어 있으면 기간(days) 안의 샤드만
+  스레드로 동시에 검색하고 거리순으로 합쳐 후보를 만듭니다. (샤드가 있으면 mmap 인덱스는 쓰지 않음)
 """
 
-from typing import List, Dict, Any, Tuple
-import math
+from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+import time
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from src.llm.solar import SolarClient
-
-# 코사인 유사도 계산(벡터와 벡터 사이의 각도를 보고 얼마나 비슷한지 판단), MMR에서 두 벡터의 비슷함/겹침 계산할 때 사용
-def _cosine(a: List[float], b: List[float]) -> float:
-    # Upstage 임베딩은 정규화되어 있어 dot==cos지만, 안전하게 코사인 계산
-    dot = sum(x*y for x, y in zip(a, b))
-    na = math.sqrt(sum(x*x for x in a))
-    nb = math.sqrt(sum(y*y for y in b))
-    return dot / (na * nb + 1e-12)
+from src.sql.collection_registry import CollectionRegistry, UNDATED, shard_period
+from src.retriever.query_cache import QueryEmbeddingCache, get_query_cache, normalize_query
+from src.utils.tracing import bind, current_span, span, traced
+from src.sql.lexical_index import LexicalIndex
+from src.vector_store.mmap_index import MmapIndexManager
+from src.retriever.semantic_cache import SemanticResultCache
+from src.retriever.reranker import CrossEncoderReranker
 
 def _mmr_select(
     query_vec: List[float],
@@ -32,27 +54,121 @@ def _mmr_select(
     - 관련성(relevance): query와의 유사도
     - 다양성(diversity): 이미 선택된 것들과의 '차이'
     점수 = λ * relevance - (1-λ) * max(similarity to selected)
+
+    NumPy 벡터화:
+    - 후보 행렬의 노름은 한 번만 계산하고, 관련성은 행렬-벡터 곱 한 번으로 구함
+    - 하나를 고를 때마다 "선택된 것들과의 최대 유사도"를 방금 고른 열로만 갱신 (O(k·n·d))
+    - 코사인 식(dot / (|a||b| + 1e-12))과 동점 처리(앞 인덱스 우선)는 예전 순수 파이썬 버전과 같음
     """
+    if not cand_idxs or k <= 0:
+        return []
+    idx = np.asarray(cand_idxs)
+    C = np.asarray(cand_vecs, dtype=np.float64)[idx]
+    q = np.asarray(query_vec, dtype=np.float64)
+    norms = np.linalg.norm(C, axis=1)
+
+    rel = (C @ q) / (norms * np.linalg.norm(q) + 1e-12)
+    max_sim = np.full(len(idx), -np.inf)
+    available = np.ones(len(idx), dtype=bool)
+
     selected: List[int] = []
-    remaining = set(cand_idxs)
-    rel_scores = {i: _cosine(query_vec, cand_vecs[i]) for i in cand_idxs}
-
-    while remaining and len(selected) < k:
-        best_i = None
-        best_score = -1e9
-        for i in list(remaining):
-            if not selected:
-                score = rel_scores[i]
-            else:
-                max_sim = max(_cosine(cand_vecs[i], cand_vecs[j]) for j in selected)
-                score = lambda_coef * rel_scores[i] - (1 - lambda_coef) * max_sim
-            if score > best_score:
-                best_score = score
-                best_i = i
-        selected.append(best_i)
-        remaining.remove(best_i)
+    for step in range(min(k, len(idx))):
+        score = rel if step == 0 else lambda_coef * rel - (1 - lambda_coef) * max_sim
+        best = int(np.argmax(np.where(available, score, -np.inf)))
+        selected.append(int(idx[best]))
+        available[best] = False
+        sim = (C @ C[best]) / (norms * norms[best] + 1e-12)
+        np.maximum(max_sim, sim, out=max_sim)
     return selected
 
+def _distances(space: str, q: List[float], vecs) -> List[float]:
+    """Chroma가 쓰는 거리(l2는 제곱 거리, cosine은 1-cos, ip는 1-dot)를 직접 계산 (키워드로만 찾은 청크용)."""
+    Q = np.asarray(q, dtype=np.float64)
+    E = np.asarray(vecs, dtype=np.float64)
+    if space == "cosine":
+        d = 1 - (E @ Q) / (np.linalg.norm(E, axis=1) * np.linalg.norm(Q) + 1e-12)
+    elif space == "ip":
+        d = 1 - E @ Q
+    else:
+        d = ((E - Q) ** 2).sum(axis=1)
+    return d.tolist()
+
+def _join_overlap(a: str, b: str, max_overlap: int = 600) -> str:
+    """이웃 청크 이어 붙이기. 청커가 앞 청크 끝 문장을 다음 청크 앞에 겹쳐 넣으므로 겹친 부분은 한 번만."""
+    if not a:
+        return b
+    for n in range(min(len(a), len(b), max_overlap), 0, -1):
+        if a.endswith(b[:n]):
+            return a + b[n:]
+    return a + "\n" + b
+
+def build_where(
+    days: Optional[int] = None,
+    sources_allow: Optional[List[str]] = None,
+    sources_deny: Optional[List[str]] = None,
+    lang: Optional[List[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    검색 필터 → Chroma where 조건.
+    - days: 최근 N일 (청크 메타데이터 published_ts 기준)
+    - sources_allow / sources_deny: 출처(source) 포함/제외 목록
+    - lang: 언어 코드 목록 (예: ["ko", "en"])
+    조건이 없으면 None, 하나면 그대로, 여럿이면 $and로 묶음.
+    """
+    conds: List[Dict[str, Any]] = []
+    if days:
+        conds.append({"published_ts": {"$gte": int(time.time() - days * 86400)}})
+    if sources_allow:
+        conds.append({"source": {"$in": list(sources_allow)}})
+    if sources_deny:
+        conds.append({"source": {"$nin": list(sources_deny)}})
+    if lang:
+        langs = [lang] if isinstance(lang, str) else list(lang)
+        conds.append({"lang": {"$in": [l.lower() for l in langs]}})
+    if not conds:
+        return None
+    return conds[0] if len(conds) == 1 else {"$and": conds}
+
+_pools: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+def get_thread_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """
+    프로세스 공용 스레드 풀 (이름 + 크기별 하나). Retriever를 여러 개 만들어도 스레드가 쌓이지 않음
+    (질문 임베딩 캐시처럼 프로세스가 끝날 때까지 살아 있으므로 따로 닫지 않음).
+    """
+    with _pools_lock:
+        pool = _pools.get((name, max_workers))
+        if pool is None:
+            pool = _pools[(name, max_workers)] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        return pool
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """검색 한 번이 처음부터 끝까지 같이 쓰는 컬렉션 상태 (Retriever._refresh_collection이 만듦)."""
+    name: str                                # 별칭이 가리키는 실제 컬렉션
+    version: int                             # 별칭 버전 (색인 업데이트마다 +1)
+    col: Any                                 # 상위 컬렉션 (샤딩 전 청크)
+    shards: Tuple[Tuple[str, str, Any], ...] # (샤드 이름, 기간 YYYY_MM, 컬렉션)
+
+    @property
+    def index_version(self) -> Tuple[str, int, Tuple[str, ...]]:
+        """이 스냅샷의 인덱스 버전 (Retriever.index_version과 같은 모양, 결과 raw에 실어 답변 캐시 저장 키로 씀)."""
+        return self.name, self.version, tuple(sh for sh, _, _ in self.shards)
+
+    def targets(self, days: Optional[int]) -> List[Tuple[str, Any]]:
+        """
+        검색할 [(이름, 컬렉션)]: 상위 컬렉션 + 기간 안의 샤드.
+        days가 있으면 시작 월 이후 샤드만 (날짜 없는 샤드 제외, 경계 월 안쪽은 where가 거름).
+        """
+        targets = [(self.name, self.col)]
+        start = shard_period(time.time() - days * 86400) if days and self.shards else None
+        for shard, period, col in self.shards:
+            if start is not None and (period == UNDATED or period < start):
+                continue
+            targets.append((shard, col))
+        return targets
+
 class Retriever:
     def __init__(
         self,
@@ -62,84 +178,540 @@ class Retriever:
         top_k: int = 5,
         use_mmr: bool = True,
         mmr_lambda: float = 0.3,
+        registry: Optional[CollectionRegistry] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,   # 없으면 프로세스 공용 캐시
+        lexical: Optional[LexicalIndex] = None,              # 주면 하이브리드(키워드+벡터) 검색
+        lexical_k: int = 20,                                 # 키워드 검색 후보 수
+        rrf_k: int = 60,                                     # RRF 상수 (클수록 순위 차이 영향이 완만)
+        filters: Optional[Dict[str, Any]] = None,            # 기본 검색 필터 {days, sources_allow, sources_deny, lang}
+        mmap_index: Optional[MmapIndexManager] = None,       # 주면 읽기 전용 mmap 인덱스로 벡터 검색
+        semantic_cache: Optional[SemanticResultCache] = None,  # 주면 비슷한 질문의 후보 재사용
+        group_by_doc: bool = False,                          # 기사당 최고 순위 청크 하나만
+        expand_window: int = 0,                              # 고른 청크 앞뒤로 붙일 이웃 청크 수 (0이면 끔)
+        max_expand_ids: int = 24,                            # 질문당 이웃 청크 조회 상한
+        reranker: Optional[CrossEncoderReranker] = None,     # 주면 cross-encoder로 후보 재정렬
+        rerank_candidates: int = 30,                         # 재정렬할 후보 수 (top_k*3보다 크면 그만큼 더 가져옴)
+        shard_workers: int = 4,                              # 월별 샤드를 동시에 검색할 스레드 수
     ):
         self.top_k = top_k
         self.use_mmr = use_mmr
         self.mmr_lambda = mmr_lambda
+        self.lexical = lexical
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        self.filters = dict(filters or {})
+        self.mmap_index = mmap_index
+        self.semantic_cache = semantic_cache
+        self.group_by_doc = group_by_doc
+        self.expand_window = max(0, int(expand_window))
+        self.max_expand_ids = max_expand_ids
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        # 키워드 검색을 벡터 검색(임베딩 API + Chroma)과 동시에 돌릴 스레드 (프로세스 공용)
+        self._executor = get_thread_pool("lexical", 2) if lexical is not None else None
+        self.shard_workers = max(1, shard_workers)
+        # 샤드 동시 검색 (프로세스 공용, 스레드는 실제로 일이 들어올 때 생김)
+        self._shard_pool = get_thread_pool("shards", self.shard_workers)
 
         self.solar = solar_client
+        self.query_model = "embedding-query"
+        self.query_cache = query_cache or get_query_cache()
         self.client = chromadb.PersistentClient(
             path=chroma_dir,
             settings=Settings(anonymized_telemetry=False),
         )
-        self.col = self.client.get_or_create_collection(collection_name)
+        self.alias = collection_name
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._refresh_collection()
+
+    def _resolve(self) -> Tuple[str, int, List[Tuple[str, str]]]:
+        """registry에서 (컬렉션 이름, 버전, [(샤드, 기간)]). registry가 없으면 별칭 그대로, 버전 0."""
+        if self.registry is None:
+            return self.alias, 0, []
+        name, version = self.registry.resolve(self.alias)
+        return name, version, self.registry.shards(name)
 
-    def search(self, question: str) -> Dict[str, Any]:
+    def index_version(self) -> Tuple[str, int, Tuple[str, ...]]:
+        """
+        지금 검색하면 볼 인덱스 버전: (컬렉션 이름, 별칭 버전, 검색 대상 샤드 이름들).
+        색인 업데이트/재색인/샤드 보관·삭제 때마다 바뀜. registry만 읽고 Retriever 상태는 안 건드림 (캐시 키용).
+        """
+        name, version, shards = self._resolve()
+        return name, version, tuple(sh for sh, _ in shards)
+
+    def search_options(self) -> Dict[str, Any]:
+        """검색 결과를 바꾸는 설정 묶음 (답변 캐시 키/디버깅용, 읽기만 함)."""
+        return {
+            "top_k": self.top_k, "mmr": self.use_mmr, "mmr_lambda": self.mmr_lambda, "filters": dict(self.filters),
+            "group_by_doc": self.group_by_doc, "expand_window": self.expand_window, "max_expand_ids": self.max_expand_ids,
+            "lexical": self.lexical is not None and (self.lexical_k, self.rrf_k),
+            "rerank": self.reranker is not None and self.rerank_candidates,
+        }
+
+    def _refresh_collection(self) -> IndexSnapshot:
+        """
+        별칭이 가리키는 컬렉션/샤드를 확인해 이번 검색이 쓸 IndexSnapshot을 돌려준다.
+        (SQLite 조회 두 번이라 매 검색마다 해도 싸다. 바뀐 게 없으면 이전 스냅샷을 그대로)
+        컬렉션 핸들은 이전 스냅샷에 있던 것을 재사용하고, 새 이름만 연다.
+        """
+        name, version, shards = self._resolve()
+        with self._lock:
+            snap = self._snapshot
+            if (snap is not None and snap.name == name and snap.version == version
+                    and [(sh, p) for sh, p, _ in snap.shards] == list(shards)):
+                return snap
+            known = {snap.name: snap.col, **{sh: c for sh, _, c in snap.shards}} if snap is not None else {}
+
+            def open_col(n: str):
+                return known.get(n) or self.client.get_or_create_collection(n)
+
+            snap = IndexSnapshot(name, version, open_col(name), tuple((sh, p, open_col(sh)) for sh, p in shards))
+            self._snapshot = snap
+            return snap
+
+    def _fan_out(self, fn, targets: List[Tuple[str, Any]]) -> List[Any]:
+        """컬렉션(샤드)마다 fn(col)을 스레드로 동시에. 하나면 그냥 호출."""
+        if len(targets) == 1:
+            return [fn(targets[0][1])]
+        return list(self._shard_pool.map(bind(lambda t: fn(t[1])), targets))
+
+    def _get(self, targets: List[Tuple[str, Any]], ids: List[str], where, include: List[str]) -> Dict[str, List[Any]]:
+        """id로 청크 가져오기 (샤드면 모든 대상 샤드에 물어서 합침)."""
+        parts = self._fan_out(lambda col: col.get(ids=ids, where=where, include=include), targets)
+        out: Dict[str, List[Any]] = {k: [] for k in ["ids"] + include}
+        for part in parts:
+            for k in out:
+                vals = part.get(k)
+                if vals is not None:
+                    out[k].extend(vals)
+        return out
+
+    def search(
+        self,
+        question: str,
+        days: Optional[int] = None,
+        sources_allow: Optional[List[str]] = None,
+        sources_deny: Optional[List[str]] = None,
+        lang: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
         """
         입력: 사용자 질문(문자열)
+              + 필터(주지 않으면 생성자에서 받은 기본 필터): 최근 days일, 출처 포함/제외, 언어
         출력: {
           "contexts": 컨텍스트 문자열(생성기용),
-          "sources":  [{title,url,source,date_published,chunk_index,length,score}, ...],
+          "sources":  [{title,url,source,date_published,chunk_index,chunk_span,length,score,text}, ...],
           "raw":      Chroma 원본 결과(디버깅용 일부)
         }
         """
-        # 1) 질문 임베딩 (query 전용)
-        q_emb = self.solar.embed_query([question])[0]
+        return self.search_many(
+            [question], days=days, sources_allow=sources_allow, sources_deny=sources_deny, lang=lang
+        )[0]
 
-        # 2) Chroma에서 후보 Top-(top_k*3) 먼저 가져오기 (MMR 위해 여유있게)
+    @traced("retriever.search")
+    def search_many(
+        self,
+        questions: List[str],
+        days: Optional[int] = None,
+        sources_allow: Optional[List[str]] = None,
+        sources_deny: Optional[List[str]] = None,
+        lang: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        여러 질문을 한 번에 검색 (평가/비교용). 결과는 질문 순서대로 search()와 같은 모양.
+        - 질문 임베딩: 캐시에 없는 질문만 모아 embed_query 한 번
+        - 벡터 검색: 여러 질문 벡터를 col.query 한 번에 (같은 필터)
+        - MMR/정리는 질문별로
+        """
+        if not questions:
+            return []
+        snap = self._refresh_collection()   # 이번 검색은 끝까지 이 스냅샷만 봄
         n_initial = max(self.top_k * 3, self.top_k)
-        res = self.col.query(
-            query_embeddings=[q_emb],
+        if self.reranker is not None and self.reranker.available:
+            n_initial = max(n_initial, self.rerank_candidates)
+        filt = self._resolve_filters(days, sources_allow, sources_deny, lang)
+        where = build_where(**filt)
+        targets = snap.targets(filt["days"])
+
+        # 0) 키워드 검색은 다른 스레드에서 동시에
+        lex_futures: List[Any] = [None] * len(questions)
+        if self.lexical is not None:
+            names = [n for n, _ in targets] if len(targets) > 1 else snap.name
+            lex_futures = [self._executor.submit(bind(self._lexical_leg), q, names) for q in questions]
+
+        # 1) 질문 임베딩 (query 전용, 캐시 우선)
+        t_vec = time.perf_counter()
+        q_embs, cache_hits = self._embed_queries(questions)
+
+        # 1-1) 비슷한 질문의 후보가 캐시에 있으면 후보 검색을 건너뜀
+        scope = (snap.name, tuple(sorted((k, str(v)) for k, v in filt.items())), n_initial, self.lexical is not None)
+        raws: List[Dict[str, Any]] = []
+        cands: List[Any] = []
+        for i, q_emb in enumerate(q_embs):
+            cached, sem_status, sem_dist = None, "off", None
+            if self.semantic_cache is not None:
+                cached, sem_status, sem_dist = self.semantic_cache.lookup(
+                    q_emb, scope, snap.name, snap.version, question=questions[i]
+                )
+            raws.append({
+                "n_initial": n_initial, "where": where, "batch_size": len(questions),
+                "collection": snap.name,
+                "collection_version": snap.version,
+                "shards": len(targets) - 1,
+                "query_cache_hit": cache_hits[i],
+                "semantic_cache": sem_status,
+                "semantic_distance": round(sem_dist, 4) if sem_dist is not None else None,
+            })
+            if cached is not None:
+                if lex_futures[i] is not None:
+                    lex_futures[i].cancel()
+                docs, metas, embs = cached
+                dists = _distances(self._space(snap.col), q_emb, embs) if len(embs) else []
+                raws[i].update(vector_backend="semantic_cache")
+                cands.append((docs, metas, dists, embs))
+            else:
+                cands.append(None)
+
+        # 2) 캐시에 없던 질문만 한 번에 벡터 검색 (+ 하이브리드 합치기)
+        todo = [i for i, c in enumerate(cands) if c is None]
+        if todo:
+            results, backend = self._vector_query([q_embs[i] for i in todo], n_initial, where, snap, targets)
+            vector_ms = (time.perf_counter() - t_vec) * 1000
+            for i, res in zip(todo, results):
+                raws[i].update(vector_backend=backend, vector_ms=round(vector_ms, 1))
+                cands[i] = self._fuse(q_embs[i], res, lex_futures[i], n_initial, where, raws[i], targets)
+                if cands[i][0] and self.semantic_cache is not None:
+                    docs, metas, _, embs = cands[i]
+                    self.semantic_cache.put(
+                        q_embs[i], scope, snap.name, snap.version, (docs, metas, embs), question=questions[i]
+                    )
+        cached_ms = round((time.perf_counter() - t_vec) * 1000, 1)
+
+        # 3~4) 질문별 (재정렬) + MMR + 정리
+        out: List[Dict[str, Any]] = []
+        for question, q_emb, (docs, metas, dists, embs), raw in zip(questions, q_embs, cands, raws):
+            raw.setdefault("vector_ms", cached_ms)
+            raw["index_version"] = snap.index_version   # 이 결과를 만든 인덱스 (조회 뒤에 색인이 바뀌었어도)
+            if not docs:
+                out.append({"contexts": "", "sources": [], "raw": raw})
+                continue
+            rerank_scores = None
+            if self.reranker is not None:
+                docs, metas, dists, embs, rerank_scores = self._rerank(question, docs, metas, dists, embs, raw)
+            res = self._select(q_emb, docs, metas, dists, embs, raw, rerank_scores, targets)
+            raw.update(returned=len(docs), selected=len(res["sources"]))
+            res["raw"] = raw
+            out.append(res)
+        current_span().set(
+            questions=len(questions),
+            vector_backend=raws[0].get("vector_backend"),
+            semantic_cache=raws[0]["semantic_cache"],
+            query_cache_hit=raws[0]["query_cache_hit"],
+        )
+        return out
+
+    # ---------------- search 내부 단계 ---------------- #
+
+    def _resolve_filters(self, days, sources_allow, sources_deny, lang) -> Dict[str, Any]:
+        f = self.filters
+        return {
+            "days": days if days is not None else f.get("days"),
+            "sources_allow": sources_allow if sources_allow is not None else f.get("sources_allow"),
+            "sources_deny": sources_deny if sources_deny is not None else f.get("sources_deny"),
+            "lang": lang if lang is not None else f.get("lang"),
+        }
+
+    @staticmethod
+    def _space(col) -> str:
+        return (col.metadata or {}).get("hnsw:space", "l2")
+
+    @traced("retriever.embed_query")
+    def _embed_queries(self, questions: List[str]) -> Tuple[List[List[float]], List[bool]]:
+        """캐시에 없는 질문만 모아서(중복 제거) embed_query 한 번. 반환: (벡터들, 캐시 hit 여부들)"""
+        vecs: List[Any] = [self.query_cache.get(self.query_model, q) for q in questions]
+        hits = [v is not None for v in vecs]
+        missing = list(dict.fromkeys(normalize_query(q) for q, v in zip(questions, vecs) if v is None))
+        if missing:
+            embedded = dict(zip(missing, self.solar.embed_query(missing)))
+            for text, vec in embedded.items():
+                self.query_cache.put(self.query_model, text, vec)
+            vecs = [v if v is not None else embedded[normalize_query(q)] for q, v in zip(questions, vecs)]
+        return vecs, hits
+
+    @traced("retriever.vector_query")
+    def _vector_query(self, q_embs: List[List[float]], n_initial: int, where, snap: IndexSnapshot,
+                      targets: List[Tuple[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        2) Chroma(또는 mmap 인덱스)에서 질문별 후보 Top-(top_k*3) (MMR 위해 여유있게).
+        Chroma는 여러 질문 벡터를 query 한 번에 보냄. 샤드가 여럿이면 샤드마다 동시에 보내고 거리순으로 합침.
+        반환: ([질문별 {ids, documents, metadatas, distances, embeddings}], 사용한 백엔드 이름)
+        """
+        current_span().set(queries=len(q_embs), n_results=n_initial, collections=len(targets))
+        if len(targets) > 1:
+            return self._sharded_query(q_embs, n_initial, where, targets), f"shards({len(targets) - 1})"
+
+        index = None
+        if self.mmap_index is not None:
+            index = self.mmap_index.current(snap.col, snap.name, snap.version)
+        if index is not None:
+            per_query = [
+                index.query(q, n_initial, where=where, n_probe=self.mmap_index.n_probe,
+                            rescore_factor=self.mmap_index.rescore_factor)
+                for q in q_embs
+            ]
+            backend = f"mmap(v{index.version})" if index.codes is None else f"mmap(v{index.version},{index.quantization})"
+            return self._attach_documents(snap.col, [{k: v[0] for k, v in r.items()} for r in per_query]), backend
+
+        res = snap.col.query(
+            query_embeddings=q_embs,
             n_results=n_initial,
+            where=where,
             include=["documents", "metadatas", "distances", "embeddings"],
         )
+        out = []
+        for i in range(len(q_embs)):
+            out.append({
+                key: (res[key][i] if res.get(key) is not None and len(res[key]) > i else [])
+                for key in ("ids", "documents", "metadatas", "distances", "embeddings")
+            })
+        return out, "chroma"
+
+    @staticmethod
+    def _attach_documents(col, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        mmap 인덱스 결과(id/거리/임베딩)에 본문/메타데이터를 채움: 모든 질문의 후보 id를 모아 col.get 한 번.
+        (그 사이 지워진 청크는 결과에서 뺌)
+        """
+        want = list(dict.fromkeys(cid for r in results for cid in r["ids"]))
+        got = col.get(ids=want, include=["documents", "metadatas"]) if want else {"ids": []}
+        rows = {cid: (doc, meta) for cid, doc, meta in zip(got["ids"], got.get("documents") or [], got.get("metadatas") or [])}
+        out = []
+        for r in results:
+            keep = [j for j, cid in enumerate(r["ids"]) if cid in rows]
+            out.append({
+                "ids": [r["ids"][j] for j in keep],
+                "documents": [rows[r["ids"][j]][0] for j in keep],
+                "metadatas": [rows[r["ids"][j]][1] for j in keep],
+                "distances": [r["distances"][j] for j in keep],
+                "embeddings": [r["embeddings"][j] for j in keep],
+            })
+        return out
 
-        docs = res["documents"][0] if res["documents"] else []
-        metas = res["metadatas"][0] if res["metadatas"] else []
-        dists = res["distances"][0] if res["distances"] else []
-        embs  = res["embeddings"][0] if "embeddings" in res and res["embeddings"] else []
+    def _sharded_query(self, q_embs, n_initial: int, where, targets) -> List[Dict[str, Any]]:
+        keys = ("ids", "documents", "metadatas", "distances", "embeddings")
+        parts = self._fan_out(
+            lambda col: col.query(
+                query_embeddings=q_embs, n_results=n_initial, where=where,
+                include=["documents", "metadatas", "distances", "embeddings"],
+            ),
+            targets,
+        )
+        out = []
+        for i in range(len(q_embs)):
+            merged: Dict[str, List[Any]] = {k: [] for k in keys}
+            for part in parts:
+                if part.get("ids") is None or len(part["ids"]) <= i:
+                    continue
+                for k in keys:
+                    merged[k].extend(part[k][i] if part.get(k) is not None else [])
+            order = sorted(range(len(merged["distances"])), key=lambda j: merged["distances"][j])[:n_initial]
+            out.append({k: [merged[k][j] for j in order] for k in keys})
+        return out
 
-        if not docs:
-            return {"contexts": "", "sources": [], "raw": {}}
+    @traced("retriever.fuse")
+    def _fuse(self, q_emb, res: Dict[str, Any], lex_future, n_initial: int, where, raw: Dict[str, Any], targets):
+        """2-1) 하이브리드면 키워드 결과와 RRF로 합치기. 반환: (docs, metas, dists, embs)"""
+        ids, docs, metas = res["ids"], res["documents"], res["metadatas"]
+        dists, embs = res["distances"], res["embeddings"]
+        lex_ids, lexical_ms, fusion_ms, lexical_only = [], 0.0, 0.0, 0
+        if lex_future is not None:
+            lex_ids, lexical_ms = lex_future.result()
+            if lex_ids:
+                t_fuse = time.perf_counter()
+                docs, metas, dists, embs, lexical_only = self._rrf_fuse(
+                    q_emb, ids, docs, metas, dists, embs, lex_ids, n_initial, where, targets
+                )
+                fusion_ms = (time.perf_counter() - t_fuse) * 1000
+        raw.update(
+            lexical_ms=round(lexical_ms, 1),
+            fusion_ms=round(fusion_ms, 1),
+            lexical_hits=len(lex_ids),
+            lexical_only=lexical_only,
+        )
+        return docs, metas, dists, embs
 
-        # 3) MMR 선택(옵션)
+    @traced("retriever.rerank")
+    def _rerank(self, question: str, docs, metas, dists, embs, raw: Dict[str, Any]):
+        """2-2) cross-encoder 재정렬. 시간 초과/모델 없음이면 그대로 두고 점수 None."""
+        order, scores, stats = self.reranker.rerank(question, docs)
+        raw.update(stats)
+        current_span().set(**stats)
+        if order is None:
+            return docs, metas, dists, embs, None
+        return (
+            [docs[i] for i in order],
+            [metas[i] for i in order],
+            [dists[i] for i in order],
+            [embs[i] for i in order],
+            [scores[i] for i in order],
+        )
+
+    @traced("retriever.select")
+    def _select(self, q_emb, docs, metas, dists, embs, raw: Dict[str, Any], rerank_scores, targets) -> Dict[str, Any]:
+        """
+        3) (옵션) 기사별 묶기 → MMR 선택 → 이웃 청크 확장 → 4) 컨텍스트 문자열/출처 목록 정리.
+        rerank_scores가 있으면 후보가 이미 재정렬 순서이므로 MMR 없이 앞에서부터 top_k.
+        """
         idxs = list(range(len(docs)))
-        if self.use_mmr and len(docs) > self.top_k:
+        # 3-0) 기사별 묶기: 후보는 이미 순위순이라 기사마다 처음 나온 청크가 최고 순위
+        if self.group_by_doc:
+            seen = set()
+            grouped = []
+            for i in idxs:
+                key = metas[i].get("doc_id", metas[i].get("url", i))
+                if key not in seen:
+                    seen.add(key)
+                    grouped.append(i)
+            raw["grouped_docs"] = len(grouped)
+            idxs = grouped
+
+        # 3) MMR 선택(옵션)
+        if rerank_scores is None and self.use_mmr and len(idxs) > self.top_k:
             sel = _mmr_select(q_emb, embs, idxs, k=self.top_k, lambda_coef=self.mmr_lambda)
         else:
             sel = idxs[: self.top_k]
 
         # 4) 선택 결과 정리 (컨텍스트/소스)
         picked = [(docs[i], metas[i], 1 - dists[i]) for i in sel]  # 유사도 점수: 1 - distance
-        # 점수로 정렬(높은 순)
-        picked.sort(key=lambda x: x[2], reverse=True)
+        rr = [rerank_scores[i] for i in sel] if rerank_scores is not None else None
+        # 점수로 정렬(높은 순). 재정렬했으면 그 순서 유지
+        if rr is None:
+            picked.sort(key=lambda x: x[2], reverse=True)
 
-        # 컨텍스트 문자열 구성(짧게)
+        # 3-1) 이웃 청크 확장 (질문당 col.get 최대 1번)
+        spans = self._expand_neighbors(picked, docs, metas, raw, targets)
+
+        # 컨텍스트 문자열 구성(짧게, 이웃을 붙였으면 붙인 청크 수만큼 여유)
         context_blocks = []
         sources = []
-        for text, meta, score in picked:
+        for n, ((text, meta, score), (passage, span)) in enumerate(zip(picked, spans)):
             title = meta.get("title", "")
             url = meta.get("url", "")
             source = meta.get("source", "")
             date = meta.get("date_published", "")
             idx = meta.get("chunk_index", -1)
+            limit = 800 * len(span)
             context_blocks.append(
-                f"[{title}]({url})\n{(text[:800] + '...') if len(text) > 800 else text}\n---"
+                f"[{title}]({url})\n{(passage[:limit] + '...') if len(passage) > limit else passage}\n---"
             )
             sources.append({
                 "title": title, "url": url, "source": source,
                 "date_published": date, "chunk_index": idx,
-                "length": meta.get("length", len(text)),
-                "score": round(float(score), 4)
+                "chunk_span": [span[0], span[-1]],
+                "length": meta.get("length", len(text)) if len(span) == 1 else len(passage),
+                "score": round(float(score), 4),
+                "text": passage,
             })
+            if rr is not None:
+                sources[-1]["rerank_score"] = round(float(rr[n]), 4)
 
         contexts = "\n".join(context_blocks)
-        return {
-            "contexts": contexts,
-            "sources": sources,
-            "raw": {
-                "n_initial": n_initial,
-                "returned": len(docs),
-                "selected": len(picked),
-            }
-        }
\ No newline at end of file
+        return {"contexts": contexts, "sources": sources}
+
+    @traced("retriever.expand")
+    def _expand_neighbors(self, picked, docs, metas, raw: Dict[str, Any], targets) -> List[Tuple[str, List[int]]]:
+        """
+        고른 청크마다 앞뒤 expand_window개 이웃(doc_<id>_chunk_<i±n>)을 붙인 본문.
+        - 후보 안에 이미 있는 이웃은 그대로 쓰고, 없는 것만 모아 col.get(ids) 한 번
+        - 가까운 이웃(±1)부터 채워서 max_expand_ids를 넘으면 먼 이웃은 생략
+        - 없는 id(짧아서 빠진 청크, 문서 끝)는 Chroma가 그냥 빼고 돌려줌
+        반환: [(본문, 포함된 chunk_index 목록)] (picked 순서)
+        """
+        base = [(m.get("doc_id"), m.get("chunk_index", -1)) for _, m, _ in picked]
+        texts: Dict[Tuple[Any, int], str] = {}
+        for d, m in zip(docs, metas):
+            texts[(m.get("doc_id"), m.get("chunk_index", -1))] = d
+        calls, fetched, t0 = 0, 0, time.perf_counter()
+
+        if self.expand_window > 0:
+            want: List[Tuple[Any, int]] = []
+            for dist in range(1, self.expand_window + 1):
+                for doc_id, ci in base:
+                    if doc_id is None or ci < 0:
+                        continue
+                    for j in (ci - dist, ci + dist):
+                        key = (doc_id, j)
+                        if j >= 0 and key not in texts and key not in want:
+                            want.append(key)
+            want = want[: self.max_expand_ids]
+            if want:
+                calls = 1
+                got = self._get(targets, [f"doc_{d}_chunk_{j}" for d, j in want], None, ["documents", "metadatas"])
+                for doc, meta in zip(got.get("documents") or [], got.get("metadatas") or []):
+                    texts[(meta.get("doc_id"), meta.get("chunk_index", -1))] = doc
+                    fetched += 1
+
+        out: List[Tuple[str, List[int]]] = []
+        for (doc_id, ci), (text, _, _) in zip(base, picked):
+            if self.expand_window <= 0 or doc_id is None or ci < 0:
+                out.append((text, [ci]))
+                continue
+            texts[(doc_id, ci)] = text
+            span = [
+                j for j in range(ci - self.expand_window, ci + self.expand_window + 1)
+                if (doc_id, j) in texts
+            ]
+            passage = ""
+            for j in span:
+                passage = _join_overlap(passage, texts[(doc_id, j)])
+            out.append((passage, span))
+        raw.update(
+            expansion_calls=calls,
+            expanded_chunks=fetched,
+            expansion_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return out
+
+    # ---------------- hybrid ---------------- #
+
+    @traced("retriever.lexical")
+    def _lexical_leg(self, question: str, collection) -> Tuple[List[str], float]:
+        """키워드 검색 (실패해도 벡터 검색만으로 계속 가도록 빈 결과)."""
+        t0 = time.perf_counter()
+        try:
+            hits = self.lexical.search(collection, question, limit=self.lexical_k)
+        except Exception as e:
+            print(f"[WARN] lexical search failed: {e}")
+            hits = []
+        return [cid for cid, _ in hits], (time.perf_counter() - t0) * 1000
+
+    def _rrf_fuse(self, q_emb, ids, docs, metas, dists, embs, lex_ids, n: int, where, targets):
+        """
+        RRF: 점수 = Σ 1 / (rrf_k + 순위). 두 검색 결과 순위를 합쳐 상위 n개 후보를 만든다.
+        키워드로만 찾은 청크는 Chroma에서 id로 한 번에 가져오고, 거리는 질문 벡터로 직접 계산.
+        (이때 같은 where 조건을 걸어 필터에 안 맞는 청크는 빠짐)
+        """
+        fused: Dict[str, float] = {}
+        for ranked in (ids, lex_ids):
+            for rank, cid in enumerate(ranked, start=1):
+                fused[cid] = fused.get(cid, 0.0) + 1.0 / (self.rrf_k + rank)
+        order = sorted(fused, key=lambda c: fused[c], reverse=True)[:n]
+
+        rows = {cid: (docs[i], metas[i], dists[i], embs[i]) for i, cid in enumerate(ids)}
+        missing = [cid for cid in order if cid not in rows]
+        if missing:
+            got = self._get(targets, missing, where, ["documents", "metadatas", "embeddings"])
+            if len(got["ids"]):
+                extra_d = _distances(self._space(targets[0][1]), q_emb, got["embeddings"])
+                for cid, doc, meta, d, e in zip(got["ids"], got["documents"], got["metadatas"], extra_d, got["embeddings"]):
+                    rows[cid] = (doc, meta, d, e)
+
+        order = [cid for cid in order if cid in rows]
+        return (
+            [rows[c][0] for c in order],
+            [rows[c][1] for c in order],
+            [rows[c][2] for c in order],
+            [rows[c][3] for c in order],
+            sum(1 for c in missing if c in rows),
+        )
\ No newline at end of file
@@ -0,0 +1,125 @@
+# src/retriever/semantic_cache.py
+"""
+- "거의 같은 뜻의 질문"이면 이전 검색 후보(Chroma/키워드 검색 + RRF 결과)를 재사용하는 캐시입니다.
+  예) "요즘 AI 규제 동향" ↔ "최근 생성형 AI 규제 요약"
+- 새 질문 임베딩과 캐시된 질문 임베딩의 코사인 거리가 threshold 이하이면 hit → 후보 검색을 건너뛰고
+  후보 집합만 새 질문 벡터로 다시 점수 매겨 MMR을 돌립니다.
+- 범위(scope: 컬렉션, 필터, 후보 수)가 같은 항목끼리만 비교합니다.
+- 컬렉션 버전이 바뀌면(색인 업데이트/재색인) 그 컬렉션의 항목은 모두 버립니다.
+- LRU(max_entries) + TTL(ttl_s)로 정리. threshold를 조정할 수 있도록 hit / near-hit(조금만 더 가까웠으면
+  hit였을 질문) / miss 통계를 남깁니다.
+- 기본은 꺼져 있음(retrieval.semantic_cache.enabled: false). 뜻이 다른 질문("2023년 규제" ↔ "2024년 규제")도
+  거리가 가까울 수 있어, 잘못 재사용하면 엉뚱한 Evidence로 답하기 때문. 켤 때 threshold 정하는 법:
+  1) 낮은 threshold(예: 0.02)로 켜고 평소 트래픽을 흘림. hit는 거의 없고 threshold~threshold+near_margin 구간이 near로 집계됨.
+  2) stats()["recent_near"](최근 near-hit 20건의 새 질문 / 가장 가까운 캐시 질문 / 거리)를 보고
+     같은 후보를 써도 되는 쌍인지 확인 (건수는 near_hits, UI 사이드바 "Semantic cache").
+  3) 같은 뜻인 쌍만 들어오는 거리까지 threshold를 올림 (한 번에 0.01~0.02씩). 다른 뜻인 쌍이 섞이기 시작하는
+     거리보다 확실히 낮게 둘 것. 올린 뒤에는 near_hits가 다시 그 위 구간을 보여 줌.
+"""
+
+import threading, time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+class SemanticResultCache:
+    def __init__(self, threshold: float = 0.08, max_entries: int = 256, ttl_s: float = 600.0, near_margin: float = 0.05):
+        self.threshold = threshold        # 코사인 거리(1 - cos) 기준
+        self.near_margin = near_margin    # threshold ~ threshold+near_margin 사이는 near-hit로 집계
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.lock = threading.Lock()
+        # id → (단위 벡터, scope, 저장 시각, 후보, 질문 원문)
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Hashable, float, Any, str]]" = OrderedDict()
+        self.recent_near: Deque[Dict[str, Any]] = deque(maxlen=20)   # threshold 조정용 최근 near-hit 질문 쌍
+        self._versions: Dict[str, int] = {}   # 컬렉션 → 마지막으로 본 버전
+        self._next_id = 0
+        self.hits = self.near_hits = self.misses = 0
+        self.evictions = self.expired = self.invalidated = 0
+
+    def lookup(
+        self, q_emb, scope: Hashable, collection: str, version: int, question: str = ""
+    ) -> Tuple[Optional[Any], str, Optional[float]]:
+        """반환: (캐시된 후보 또는 None, "hit"|"near"|"miss", 가장 가까운 거리)"""
+        q = _unit(q_emb)
+        now = time.time()
+        with self.lock:
+            self._invalidate_if_changed(collection, version)
+            for key in [k for k, (_, _, ts, _, _) in self._entries.items() if now - ts > self.ttl_s]:
+                del self._entries[key]
+                self.expired += 1
+            keys = [k for k, (_, s, _, _, _) in self._entries.items() if s == scope]
+            if not keys:
+                self.misses += 1
+                return None, "miss", None
+            mat = np.stack([self._entries[k][0] for k in keys])
+            dist = 1.0 - mat @ q
+            best = int(np.argmin(dist))
+            d = float(dist[best])
+            if d <= self.threshold:
+                self.hits += 1
+                self._entries.move_to_end(keys[best])
+                return self._entries[keys[best]][3], "hit", d
+            if d <= self.threshold + self.near_margin:
+                self.near_hits += 1
+                self.recent_near.append(
+                    {"question": question, "cached_question": self._entries[keys[best]][4], "distance": round(d, 4)}
+                )
+                self.misses += 1
+                return None, "near", d
+            self.misses += 1
+            return None, "miss", d
+
+    def put(self, q_emb, scope: Hashable, collection: str, version: int, payload: Any, question: str = "") -> None:
+        with self.lock:
+            self._invalidate_if_changed(collection, version)
+            self._entries[self._next_id] = (_unit(q_emb), scope, time.time(), payload, question)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        with self.lock:
+            self._drop(collection)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries), "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits, "near_hits": self.near_hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions, "expired": self.expired, "invalidated": self.invalidated,
+                "recent_near": list(self.recent_near),
+            }
+
+    def _invalidate_if_changed(self, collection: str, version: int) -> None:
+        seen = self._versions.get(collection)
+        if seen is not None and seen != version:
+            self._drop(collection)
+        self._versions[collection] = version
+
+    def _drop(self, collection: Optional[str]) -> None:
+        # scope의 첫 원소가 컬렉션 이름
+        keys = [k for k, (_, s, _, _, _) in self._entries.items() if collection is None or s[0] == collection]
+        for k in keys:
+            del self._entries[k]
+        self.invalidated += len(keys)
+
+def _unit(v) -> np.ndarray:
+    a = np.asarray(v, dtype=np.float32)
+    return a / (np.linalg.norm(a) + 1e-12)
+
+_shared: Optional[SemanticResultCache] = None
+_shared_lock = threading.Lock()
+
+def get_semantic_cache(**kwargs) -> SemanticResultCache:
+    """프로세스 공용 캐시. 처음 부를 때의 설정으로 만들고, 이후에는 같은 객체를 돌려줌."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SemanticResultCache(**kwargs)
+        return _shared
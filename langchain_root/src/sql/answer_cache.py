@@ -0,0 +1,101 @@
+# src/sql/answer_cache.py
+"""
+- 최종 답변(검색 → 프롬프트 → 생성 결과 dict 전체)을 SQLite에 저장해 두는 캐시입니다.
+- 같은 질문(정규화) + 같은 모델/max_tokens/추가 지시/프롬프트 옵션/검색 설정 + 같은 인덱스 버전이면
+  검색도 생성도 다시 하지 않고 저장된 결과를 돌려줍니다.
+- 키는 위 항목을 JSON으로 묶은 sha256 (Answerer._answer_cache_key). 인덱스 버전이 키에 들어가므로
+  색인 업데이트/재색인/샤드 보관·삭제 뒤에는 자연히 miss → 옛 답변은 TTL이 지나거나 max_entries를 넘으면 지워짐.
+  조회는 지금 버전으로, 저장은 검색이 실제로 본 버전으로 (그 사이 색인이 바뀌면 옛 결과는 옛 버전 키에만 들어감).
+- TTL(ttl_s): 프롬프트에 "오늘 날짜"와 기간 필터(최근 N일)가 들어가므로 오래된 답변은 버림.
+- UI/워커/CLI 프로세스가 같은 DB 파일을 같이 씀. 자체 커넥션 + 락.
+"""
+
+import hashlib, json, os, sqlite3, threading, time
+from typing import Any, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer_cache(
+  key TEXT PRIMARY KEY,      -- sha256(질문/옵션/인덱스 버전)
+  model TEXT,
+  question TEXT,             -- 정규화한 질문 (디버깅용)
+  result TEXT,               -- 결과 dict JSON
+  created_at REAL,
+  last_used REAL,
+  hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_answer_cache_created ON answer_cache(created_at);
+"""
+
+def cache_key(parts: Dict[str, Any]) -> str:
+    """키 재료(dict) → sha256. 순서와 상관없이 같은 값이면 같은 키."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    def __init__(self, db_path: str, ttl_s: float = 1800.0, max_entries: int = 5000):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """TTL 안의 결과 dict (cache_age_s 포함) 또는 None."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT result, created_at FROM answer_cache WHERE key=? AND created_at>=?",
+                (key, now - self.ttl_s),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE answer_cache SET last_used=?, hits=hits+1 WHERE key=?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        result = json.loads(row[0])
+        result["cache_age_s"] = round(now - row[1], 1)
+        return result
+
+    def put(self, key: str, model: str, question: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answer_cache(key, model, question, result, created_at, last_used, hits) "
+                "VALUES(?,?,?,?,?,?,0)",
+                (key, model, question, json.dumps(result, ensure_ascii=False, default=str), now, now),
+            )
+            # 만료된 것 + 상한을 넘는 오래 안 쓴 것 정리
+            self.conn.execute("DELETE FROM answer_cache WHERE created_at<?", (now - self.ttl_s,))
+            self.conn.execute(
+                "DELETE FROM answer_cache WHERE key IN ("
+                " SELECT key FROM answer_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def clear(self) -> int:
+        with self.lock:
+            n = self.conn.execute("DELETE FROM answer_cache").rowcount
+            self.conn.commit()
+            self.hits = self.misses = 0
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM answer_cache").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "size": size,
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,113 @@
+# src/sql/chunk_cache.py
+"""
+- 청크 본문 해시(sha256) → 임베딩 벡터를 SQLite에 저장해 두는 캐시입니다.
+- 여러 기사에 똑같이 붙는 문단(면책 조항, 기자 소개, "회사 소개" 등)은 한 번만 임베딩하고 벡터를 재사용합니다.
+- 어떤 청크가 몇 개 문서에 나왔는지도 기록해서, 너무 흔한 청크(보일러플레이트)를 색인에서 뺄 수 있게 합니다.
+- 색인 파이프라인의 여러 스레드에서 동시에 부르기 때문에 자체 커넥션 + 락을 씁니다.
+"""
+
+import sqlite3, os, time, hashlib, re, threading
+from array import array
+from typing import Dict, Iterable, List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_embeddings(
+  chunk_hash TEXT,
+  model TEXT,
+  dim INTEGER,
+  embedding BLOB,
+  created_at TEXT,
+  PRIMARY KEY(chunk_hash, model)
+);
+CREATE TABLE IF NOT EXISTS chunk_occurrences(
+  chunk_hash TEXT,
+  doc_id INTEGER,
+  PRIMARY KEY(chunk_hash, doc_id)
+);
+"""
+
+# SQLite의 바인딩 변수 개수 제한을 넘지 않도록 IN (...) 조회를 나눠서 보냄
+_IN_BATCH = 500
+
+def chunk_hash(text: str) -> str:
+    """공백만 다른 청크는 같은 해시가 나오도록 정리한 뒤 sha256."""
+    norm = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+def _pack(vec: List[float]) -> bytes:
+    # Chroma도 내부적으로 float32로 저장하므로 float32로 보관
+    return array("f", vec).tobytes()
+
+def _unpack(blob: bytes) -> List[float]:
+    a = array("f")
+    a.frombytes(blob)
+    return a.tolist()
+
+class ChunkEmbeddingCache:
+    """
+    청크 해시 기반 임베딩 캐시.
+    - get_many(): 이미 임베딩된 청크 벡터 조회
+    - put_many(): 새로 임베딩한 벡터 저장
+    - record_occurrences() / doc_freq(): 청크가 등장한 문서 수 집계
+    """
+    def __init__(self, db_path: str, model: str = "embedding-passage"):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.model = model
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(hashes))
+        out: Dict[str, List[float]] = {}
+        with self.lock:
+            for i in range(0, len(keys), _IN_BATCH):
+                part = keys[i:i + _IN_BATCH]
+                marks = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"SELECT chunk_hash, embedding FROM chunk_embeddings "
+                    f"WHERE model=? AND chunk_hash IN ({marks})",
+                    (self.model, *part),
+                ).fetchall()
+                for h, blob in rows:
+                    out[h] = _unpack(blob)
+        return out
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO chunk_embeddings(chunk_hash, model, dim, embedding, created_at) "
+                "VALUES(?,?,?,?,?)",
+                [(h, self.model, len(v), _pack(v), now) for h, v in items.items()],
+            )
+            self.conn.commit()
+
+    def record_occurrences(self, doc_id: int, hashes: Iterable[str]) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO chunk_occurrences(chunk_hash, doc_id) VALUES(?,?)",
+                [(h, doc_id) for h in set(hashes)],
+            )
+            self.conn.commit()
+
+    def doc_freq(self, hashes: Iterable[str]) -> Dict[str, int]:
+        """각 청크 해시가 몇 개 문서에 등장했는지."""
+        keys = list(dict.fromkeys(hashes))
+        out: Dict[str, int] = {}
+        with self.lock:
+            for i in range(0, len(keys), _IN_BATCH):
+                part = keys[i:i + _IN_BATCH]
+                marks = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"SELECT chunk_hash, COUNT(*) FROM chunk_occurrences "
+                    f"WHERE chunk_hash IN ({marks}) GROUP BY chunk_hash",
+                    part,
+                ).fetchall()
+                out.update(dict(rows))
+        return out
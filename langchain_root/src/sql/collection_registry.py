@@ -0,0 +1,223 @@
+# src/sql/collection_registry.py
+"""
+- Chroma 컬렉션 "별칭(alias) → 실제 컬렉션 이름"을 SQLite에 저장하는 작은 레지스트리입니다.
+- 검색/색인 코드는 별칭(ai_news_rag)만 알고, 실제로는 버전이 붙은 컬렉션
+  (예: ai_news_rag__CHUNK_v2-3fa2b1_embedding-passage_2)을 씁니다.
+- 전체 재색인은 새 컬렉션에 따로 만들고, 검증이 끝나면 별칭만 한 번에(트랜잭션) 바꿉니다. (blue/green)
+- version 숫자는 별칭이 가리키는 내용이 바뀔 때마다(승격, 색인 업데이트) 1씩 올라갑니다.
+  검색기는 이 값을 보고 재시작 없이 새 컬렉션/새 내용을 따라갑니다.
+- (선택) 월별 샤드: 컬렉션 하나를 게시 월별 컬렉션(<컬렉션>__m2025_07)으로 나눠 쓸 때 샤드 목록/상태도 여기 둡니다.
+  archived 샤드는 검색에서 빠지고(데이터는 그대로), dropped는 Chroma에서도 지운 것.
+"""
+
+import sqlite3, os, re, time, threading
+from typing import Any, Dict, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collection_aliases(
+  alias TEXT PRIMARY KEY,
+  collection TEXT,
+  version INTEGER,
+  updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS collection_versions(
+  collection TEXT PRIMARY KEY,
+  alias TEXT,
+  index_version TEXT,
+  model TEXT,
+  status TEXT,              -- building | live | retired | failed | deleted
+  chunks INTEGER,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS collection_shards(
+  shard TEXT PRIMARY KEY,
+  collection TEXT,          -- 상위(버전) 컬렉션
+  period TEXT,              -- YYYY_MM (날짜 없는 청크는 0000_00)
+  status TEXT,              -- active | archived | dropped
+  created_at TEXT,
+  updated_at TEXT
+);
+"""
+
+UNDATED = "0000_00"
+
+def shard_period(ts: int | float | None) -> str:
+    """epoch 초 → 샤드 기간(UTC 기준 YYYY_MM). 0/None이면 UNDATED."""
+    if not ts:
+        return UNDATED
+    return time.strftime("%Y_%m", time.gmtime(ts))
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _slug(s: str) -> str:
+    # Chroma 컬렉션 이름에 쓸 수 있는 글자만 남김
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", s).strip("-_") or "x"
+
+class CollectionRegistry:
+    def __init__(self, db_path: str):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Streamlit은 요청마다 다른 스레드에서 돌 수 있어 스레드 공유 허용 + 락
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+
+    def resolve(self, alias: str) -> Tuple[str, int]:
+        """별칭이 가리키는 (컬렉션 이름, 버전). 등록 전이면 별칭 이름 그대로(예전 단일 컬렉션)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT collection, version FROM collection_aliases WHERE alias=?", (alias,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (alias, 0)
+
+    def create_version(self, alias: str, index_version: str, model: str) -> str:
+        """새 버전 컬렉션 이름을 만들고 building 상태로 등록."""
+        prefix = f"{alias}__{_slug(index_version)}_{_slug(model)}_"
+        with self.lock:
+            n = self.conn.execute(
+                "SELECT COUNT(*) FROM collection_versions WHERE collection LIKE ?", (prefix + "%",)
+            ).fetchone()[0]
+            name = f"{prefix}{n + 1}"
+            self.conn.execute(
+                "INSERT INTO collection_versions(collection, alias, index_version, model, status, chunks, created_at, updated_at) "
+                "VALUES(?,?,?,?,'building',0,?,?)",
+                (name, alias, index_version, model, _now(), _now()),
+            )
+            self.conn.commit()
+        return name
+
+    def set_status(self, collection: str, status: str, chunks: int | None = None) -> None:
+        with self.lock:
+            if chunks is None:
+                self.conn.execute(
+                    "UPDATE collection_versions SET status=?, updated_at=? WHERE collection=?",
+                    (status, _now(), collection),
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE collection_versions SET status=?, chunks=?, updated_at=? WHERE collection=?",
+                    (status, chunks, _now(), collection),
+                )
+            self.conn.commit()
+
+    def promote(self, alias: str, collection: str) -> int:
+        """
+        별칭을 새 컬렉션으로 한 번에 전환(트랜잭션). 이전 컬렉션은 retired로.
+        반환: 새 별칭 버전
+        """
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                row = self.conn.execute(
+                    "SELECT collection, version FROM collection_aliases WHERE alias=?", (alias,)
+                ).fetchone()
+                old, version = row if row else (alias, 0)
+                if old != collection:
+                    # 예전 단일 컬렉션(별칭 이름 그대로)도 기록에 남겨 나중에 정리되도록
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO collection_versions(collection, alias, status, created_at, updated_at) "
+                        "VALUES(?,?,'retired',?,?)",
+                        (old, alias, _now(), _now()),
+                    )
+                    self.conn.execute(
+                        "UPDATE collection_versions SET status='retired', updated_at=? WHERE collection=?",
+                        (_now(), old),
+                    )
+                self.conn.execute(
+                    "INSERT INTO collection_aliases(alias, collection, version, updated_at) VALUES(?,?,?,?) "
+                    "ON CONFLICT(alias) DO UPDATE SET collection=excluded.collection, "
+                    "version=excluded.version, updated_at=excluded.updated_at",
+                    (alias, collection, version + 1, _now()),
+                )
+                self.conn.execute(
+                    "UPDATE collection_versions SET status='live', updated_at=? WHERE collection=?",
+                    (_now(), collection),
+                )
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return version + 1
+
+    def touch(self, alias: str) -> int:
+        """별칭이 가리키는 컬렉션 내용이 바뀌었음을 알림(버전 +1). 반환: 새 버전"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO collection_aliases(alias, collection, version, updated_at) VALUES(?,?,1,?) "
+                "ON CONFLICT(alias) DO UPDATE SET version=version+1, updated_at=excluded.updated_at",
+                (alias, alias, _now()),
+            )
+            self.conn.commit()
+            return self.conn.execute(
+                "SELECT version FROM collection_aliases WHERE alias=?", (alias,)
+            ).fetchone()[0]
+
+    def collections_to_gc(self, alias: str, keep: int = 1) -> List[str]:
+        """retired 컬렉션 중 최근 keep개(롤백용)를 뺀 나머지."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT collection FROM collection_versions WHERE alias=? AND status IN ('retired','failed') "
+                "ORDER BY updated_at DESC, created_at DESC",
+                (alias,),
+            ).fetchall()
+        return [r[0] for r in rows[keep:]]
+
+    # ---------------- 월별 샤드 ---------------- #
+
+    def shard_for(self, collection: str, period: str) -> str:
+        """collection의 period 샤드 이름 (처음이면 active로 등록, 지웠던 샤드에 다시 쓰면 active로 되살림)."""
+        shard = f"{collection}__m{period}"
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO collection_shards(shard, collection, period, status, created_at, updated_at) "
+                "VALUES(?,?,?,'active',?,?) "
+                "ON CONFLICT(shard) DO UPDATE SET status='active', updated_at=excluded.updated_at "
+                "WHERE collection_shards.status='dropped'",
+                (shard, collection, period, _now(), _now()),
+            )
+            self.conn.commit()
+        return shard
+
+    def shards(self, collection: str, statuses: Tuple[str, ...] | None = ("active",)) -> List[Tuple[str, str]]:
+        """[(샤드 이름, 기간)] 기간 오름차순. statuses=None이면 상태 상관없이 전부."""
+        sql = "SELECT shard, period FROM collection_shards WHERE collection=?"
+        args: List[Any] = [collection]
+        if statuses is not None:
+            sql += f" AND status IN ({','.join('?' * len(statuses))})"
+            args.extend(statuses)
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY period", args).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def shard_list(self, collection: str) -> List[Dict[str, Any]]:
+        """상태와 상관없이 샤드 전체 (관리 명령 출력용)."""
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT shard, period, status, created_at, updated_at FROM collection_shards "
+                "WHERE collection=? ORDER BY period",
+                (collection,),
+            )
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def set_shard_status(self, shards: List[str], status: str) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE collection_shards SET status=?, updated_at=? WHERE shard=?",
+                [(status, _now(), sh) for sh in shards],
+            )
+            self.conn.commit()
+
+    def versions(self, alias: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT collection, index_version, model, status, chunks, created_at, updated_at "
+                "FROM collection_versions WHERE alias=? ORDER BY created_at DESC",
+                (alias,),
+            )
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
@@ -27,6 +27,7 @@ class SqlStore:
     - fetch_all(): 최신 문서 몇 개를 읽어옵니다(색인 단계에서 사용할 예정).
     """
     def __init__(self, db_path: str):
+        self.db_path = db_path
         # 폴더가 없다면 먼저 만들어 둠
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         # DB 연결 (파일이 없으면 새로 만들어짐)
@@ -46,12 +47,20 @@ class SqlStore:
         }
         이미 같은 URL 또는 같은 해시가 있으면 새로 넣지 않고 기존 id를 돌려줍니다.
         """
+        doc_id, _ = self.insert_or_get(doc)
+        return doc_id
+
+    def insert_or_get(self, doc: dict) -> tuple[int, bool]:
+        """
+        upsert_document와 같지만 (문서 id, 새로 넣었는지 여부)를 돌려줍니다.
+        새 문서만 색인 큐에 넣을 때 사용.
+        """
         cur = self.conn.cursor()
         cur.execute("SELECT id FROM documents WHERE url=? OR content_hash=?",
                     (doc["url"], doc["content_hash"]))
         row = cur.fetchone()
         if row:
-            return row[0]  # 기존 문서 id
+            return row[0], False  # 기존 문서 id
 
         # 먼저 url, title, source, date_published, content_hash, raw_text, lang에 그 내용이 있는지 확인
         # 만일 없다면 추가
@@ -65,7 +74,7 @@ class SqlStore:
           doc["content_hash"], doc.get("raw_text",""), doc.get("lang","")
         ))
         self.conn.commit()
-        return cur.lastrowid  # 새 문서 id
+        return cur.lastrowid, True  # 새 문서 id
 
     def fetch_all(self, limit: int = 200):
         """
@@ -74,10 +83,28 @@ class SqlStore:
         """
         cur = self.conn.cursor()
         cur.execute("""
-            SELECT id, url, title, source, date_published, raw_text, lang
+            SELECT id, url, title, source, date_published, date_crawled, raw_text, lang
             FROM documents
             ORDER BY id DESC
             LIMIT ?
         """, (limit,))
         cols = [c[0] for c in cur.description]
-        return [dict(zip(cols, r)) for r in cur.fetchall()]
\ No newline at end of file
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def fetch_by_ids(self, doc_ids: list[int]) -> list[dict]:
+        """id 목록으로 문서를 읽어옵니다. (멈춘 색인 작업 이어서 하기, 색인 큐 처리 등에 사용)"""
+        if not doc_ids:
+            return []
+        out = []
+        cur = self.conn.cursor()
+        for i in range(0, len(doc_ids), 500):
+            part = list(doc_ids[i:i + 500])
+            cur.execute(f"""
+                SELECT id, url, title, source, date_published, date_crawled, raw_text, lang
+                FROM documents
+                WHERE id IN ({",".join("?" * len(part))})
+                ORDER BY id DESC
+            """, part)
+            cols = [c[0] for c in cur.description]
+            out.extend(dict(zip(cols, r)) for r in cur.fetchall())
+        return out
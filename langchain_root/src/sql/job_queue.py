@@ -0,0 +1,93 @@
+# src/sql/job_queue.py
+"""
+- 수집(ingest)이 새 문서 id를 넣고, 색인 워커(app/worker.py)가 꺼내 가는 SQLite 기반 작업 큐입니다.
+- 워커는 문서를 "임대(lease)"해 가고, 처리가 끝나면 ack로 지웁니다.
+- 워커가 죽어서 ack를 못 하면 visibility timeout(임대 만료 시각)이 지난 뒤 다른 워커가 다시 가져갑니다.
+- 여러 프로세스가 동시에 꺼내도 같은 문서를 두 번 받지 않도록 BEGIN IMMEDIATE(쓰기 잠금)로 임대합니다.
+"""
+
+import sqlite3, os, time
+from typing import Dict, Iterable, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_queue(
+  doc_id INTEGER PRIMARY KEY,
+  enqueued_at REAL,           -- 넣은 시각(epoch 초). 신선도(수집→검색 가능까지 걸린 시간) 계산용
+  lease_until REAL DEFAULT 0, -- 이 시각 전까지는 다른 워커에게 안 보임
+  leased_by TEXT,
+  attempts INTEGER DEFAULT 0,
+  last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_index_queue_lease ON index_queue(lease_until, enqueued_at);
+"""
+
+class IndexQueue:
+    def __init__(self, db_path: str, max_attempts: int = 5):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT으로 관리
+        self.conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+        self.max_attempts = max_attempts
+
+    def enqueue(self, doc_ids: Iterable[int]) -> int:
+        """문서 id를 큐에 넣음. 이미 들어 있는 id는 그대로 둠."""
+        now = time.time()
+        rows = [(d, now) for d in doc_ids]
+        if not rows:
+            return 0
+        cur = self.conn.executemany(
+            "INSERT OR IGNORE INTO index_queue(doc_id, enqueued_at) VALUES(?,?)", rows
+        )
+        return cur.rowcount
+
+    def lease(self, worker_id: str, batch_size: int = 32, visibility_timeout: float = 300.0) -> List[Tuple[int, float]]:
+        """
+        지금 보이는(임대 만료된) 문서를 batch_size개까지 임대.
+        반환: [(doc_id, enqueued_at), ...]
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT doc_id, enqueued_at FROM index_queue "
+                "WHERE lease_until <= ? AND attempts < ? ORDER BY enqueued_at LIMIT ?",
+                (now, self.max_attempts, batch_size),
+            ).fetchall()
+            if rows:
+                self.conn.executemany(
+                    "UPDATE index_queue SET lease_until=?, leased_by=?, attempts=attempts+1 WHERE doc_id=?",
+                    [(now + visibility_timeout, worker_id, d) for d, _ in rows],
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def ack(self, worker_id: str, doc_ids: Iterable[int]) -> None:
+        """처리 완료 → 큐에서 삭제. (임대가 만료돼 다른 워커가 가져간 항목은 건드리지 않음)"""
+        self.conn.executemany(
+            "DELETE FROM index_queue WHERE doc_id=? AND leased_by=?",
+            [(d, worker_id) for d in doc_ids],
+        )
+
+    def nack(self, worker_id: str, doc_ids: Iterable[int], error: str, retry_after: float = 30.0) -> None:
+        """처리 실패 → retry_after초 뒤에 다시 보이도록. attempts가 max_attempts에 닿으면 더는 안 꺼냄."""
+        self.conn.executemany(
+            "UPDATE index_queue SET lease_until=?, last_error=? WHERE doc_id=? AND leased_by=?",
+            [(time.time() + retry_after, error[:2000], d, worker_id) for d in doc_ids],
+        )
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        ready, leased, dead = self.conn.execute(
+            """
+            SELECT COALESCE(SUM(lease_until <= ? AND attempts < ?), 0),
+                   COALESCE(SUM(lease_until > ?), 0),
+                   COALESCE(SUM(lease_until <= ? AND attempts >= ?), 0)
+            FROM index_queue
+            """,
+            (now, self.max_attempts, now, now, self.max_attempts),
+        ).fetchone()
+        return {"ready": ready, "leased": leased, "dead": dead}
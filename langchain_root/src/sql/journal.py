@@ -0,0 +1,197 @@
+# src/sql/journal.py
+"""
+- 색인 작업(job)의 진행 상황을 SQLite에 기록하는 저널입니다.
+- 문서별로 청킹/임베딩/업서트가 몇 개까지 끝났는지 남겨서, 중간에 죽거나(rate limit 등) 멈춰도
+  다음 실행이 끝난 문서는 건너뛰고 이어서 합니다.
+- 받아 왔지만 아직 Chroma에 못 쓴 임베딩은 chunk_cache(청크 해시 → 벡터)에 바로 저장되므로,
+  이어서 돌릴 때 API를 다시 부르지 않습니다.
+- 색인 파이프라인의 여러 스레드에서 부르므로 자체 커넥션 + 락을 씁니다.
+- job마다 주인(owner = 호스트:pid)과 heartbeat(진행 기록할 때마다 갱신)를 남깁니다.
+  이어받을 수 있는 건 failed job이거나, running인데 heartbeat가 stale_after_s 넘게 멈춘 job(프로세스가 죽은 것)뿐.
+  다른 프로세스가 아직 돌리고 있는 job은 가져가지 않습니다.
+"""
+
+import sqlite3, os, socket, time, json, threading
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_jobs(
+  job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  status TEXT,              -- running | done | failed
+  index_version TEXT,
+  owner TEXT,               -- 돌리고 있는(마지막으로 돌린) 프로세스 "호스트:pid"
+  heartbeat REAL,           -- 마지막 진행 기록 시각 (epoch 초)
+  started_at TEXT,
+  updated_at TEXT,
+  error TEXT,
+  result TEXT               -- 끝났을 때 색인 결과(JSON)
+);
+CREATE TABLE IF NOT EXISTS index_job_docs(
+  job_id INTEGER,
+  doc_id INTEGER,
+  n_chunks INTEGER,         -- 청킹 결과 청크 수 (NULL이면 아직 청킹 전)
+  embedded INTEGER DEFAULT 0,
+  upserted INTEGER DEFAULT 0,
+  PRIMARY KEY(job_id, doc_id)
+);
+"""
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+class IndexJournal:
+    def __init__(self, db_path: str, owner: Optional[str] = None, stale_after_s: float = 600.0):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.stale_after_s = stale_after_s   # heartbeat가 이만큼 멈춘 running job은 죽은 것으로 봄
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(SCHEMA)
+
+    # ---------------- job 단위 ---------------- #
+
+    def start(self, index_version: str, doc_ids: Iterable[int]) -> int:
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO index_jobs(status, index_version, owner, heartbeat, started_at, updated_at) "
+                "VALUES('running',?,?,?,?,?)",
+                (index_version, self.owner, time.time(), _now(), _now()),
+            )
+            job_id = cur.lastrowid
+            self._add_docs(job_id, doc_ids)
+            self.conn.commit()
+            return job_id
+
+    def find_resumable(self, index_version: str) -> Optional[int]:
+        """
+        같은 청커 버전으로 돌다가 끝나지 못한 가장 최근 job을 이 프로세스 것으로 가져옴 (없으면 None).
+        대상: failed, 또는 running인데 heartbeat가 stale_after_s 넘게 멈춘 job (다른 프로세스가 돌리는 job은 제외).
+        조건부 UPDATE로 가져오므로 두 프로세스가 동시에 불러도 한쪽만 가져감.
+        """
+        claimable = "index_version=? AND (status='failed' OR (status='running' AND COALESCE(heartbeat, 0) < ?))"
+        with self.lock:
+            stale = time.time() - self.stale_after_s
+            rows = self.conn.execute(
+                f"SELECT job_id FROM index_jobs WHERE {claimable} ORDER BY job_id DESC",
+                (index_version, stale),
+            ).fetchall()
+            for (job_id,) in rows:
+                cur = self.conn.execute(
+                    f"UPDATE index_jobs SET status='running', owner=?, heartbeat=?, updated_at=? "
+                    f"WHERE job_id=? AND {claimable}",
+                    (self.owner, time.time(), _now(), job_id, index_version, stale),
+                )
+                self.conn.commit()
+                if cur.rowcount:
+                    return job_id
+        return None
+
+    def resume(self, job_id: int, extra_doc_ids: Iterable[int] = ()) -> None:
+        with self.lock:
+            self._add_docs(job_id, extra_doc_ids)
+            self.conn.execute(
+                "UPDATE index_jobs SET status='running', error=NULL, owner=?, heartbeat=?, updated_at=? WHERE job_id=?",
+                (self.owner, time.time(), _now(), job_id),
+            )
+            self.conn.commit()
+
+    def finish(self, job_id: int, result: Dict[str, Any]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "UPDATE index_jobs SET status='done', result=?, updated_at=? WHERE job_id=?",
+                (json.dumps(result, ensure_ascii=False), _now(), job_id),
+            )
+            self.conn.commit()
+
+    def fail(self, job_id: int, error: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "UPDATE index_jobs SET status='failed', error=?, updated_at=? WHERE job_id=?",
+                (error[:2000], _now(), job_id),
+            )
+            self.conn.commit()
+
+    # ---------------- 문서 단위 ---------------- #
+
+    def unfinished_docs(self, job_id: int) -> List[int]:
+        """청킹 전이거나, 업서트가 청크 수만큼 끝나지 않은 문서."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT doc_id FROM index_job_docs WHERE job_id=? AND (n_chunks IS NULL OR upserted < n_chunks)",
+                (job_id,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def mark_chunked(self, job_id: int, doc_id: int, n_chunks: int) -> None:
+        # 다시 청킹했다는 건 이 문서를 처음부터 다시 쓴다는 뜻이라 카운터도 0으로
+        with self.lock:
+            self.conn.execute(
+                "UPDATE index_job_docs SET n_chunks=?, embedded=0, upserted=0 WHERE job_id=? AND doc_id=?",
+                (n_chunks, job_id, doc_id),
+            )
+            self._beat(job_id)
+            self.conn.commit()
+
+    def add_embedded(self, job_id: int, counts: Dict[int, int]) -> None:
+        self._add(job_id, "embedded", counts)
+
+    def add_upserted(self, job_id: int, counts: Dict[int, int]) -> None:
+        self._add(job_id, "upserted", counts)
+
+    # ---------------- 조회 (CLI/UI) ---------------- #
+
+    def status(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """최근 job 목록 + 문서 진행 현황 요약."""
+        with self.lock:
+            jobs = self.conn.execute(
+                "SELECT job_id, status, index_version, owner, started_at, updated_at, error FROM index_jobs "
+                "ORDER BY job_id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            out: List[Dict[str, Any]] = []
+            for job_id, status, version, owner, started, updated, error in jobs:
+                docs_total, chunked, embedded, upserted, chunks, emb, ups = self.conn.execute(
+                    """
+                    SELECT COUNT(*),
+                           SUM(n_chunks IS NOT NULL),
+                           SUM(n_chunks IS NOT NULL AND embedded >= n_chunks),
+                           SUM(n_chunks IS NOT NULL AND upserted >= n_chunks),
+                           COALESCE(SUM(n_chunks), 0), COALESCE(SUM(embedded), 0), COALESCE(SUM(upserted), 0)
+                    FROM index_job_docs WHERE job_id=?
+                    """,
+                    (job_id,),
+                ).fetchone()
+                out.append({
+                    "job_id": job_id, "status": status, "index_version": version, "owner": owner,
+                    "started_at": started, "updated_at": updated, "error": error,
+                    "docs_total": docs_total, "docs_chunked": chunked or 0,
+                    "docs_embedded": embedded or 0, "docs_upserted": upserted or 0,
+                    "chunks_total": chunks, "chunks_embedded": emb, "chunks_upserted": ups,
+                })
+        return out
+
+    # ---------------- internal ---------------- #
+
+    def _add_docs(self, job_id: int, doc_ids: Iterable[int]) -> None:
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO index_job_docs(job_id, doc_id) VALUES(?,?)",
+            [(job_id, d) for d in doc_ids],
+        )
+
+    def _add(self, job_id: int, column: str, counts: Dict[int, int]) -> None:
+        if not counts:
+            return
+        with self.lock:
+            self.conn.executemany(
+                f"UPDATE index_job_docs SET {column}={column}+? WHERE job_id=? AND doc_id=?",
+                [(n, job_id, d) for d, n in counts.items()],
+            )
+            self._beat(job_id)
+            self.conn.commit()
+
+    def _beat(self, job_id: int) -> None:
+        # 진행 기록 = 살아 있다는 표시 (lock 안에서 부름)
+        self.conn.execute("UPDATE index_jobs SET heartbeat=?, updated_at=? WHERE job_id=?", (time.time(), _now(), job_id))
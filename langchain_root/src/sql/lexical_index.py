@@ -0,0 +1,154 @@
+# src/sql/lexical_index.py
+"""
+- 청크 본문을 SQLite FTS5에 넣어 두는 키워드(BM25) 검색 인덱스입니다.
+- 벡터 검색이 놓치는 고유명사/모델명/법령명("GPT-4o", "AI 기본법" 등) 정확 일치를 잡는 용도.
+- 저장 구조
+  - lexical_chunks : 일반 테이블 (collection, chunk_id, doc_id, text). (collection, chunk_id)/(collection, doc_id) 인덱스
+                     → 청크/문서 단위 삭제·교체가 인덱스 조회 + rowid 삭제 (테이블 크기와 상관없이 빠름)
+  - lexical_fts    : trigram 토크나이저 FTS5 (external content = lexical_chunks). 3글자 이상 검색어용.
+                     글자 3개 단위라 띄어쓰기/조사에 덜 민감하고 한국어·영어 모두 됨
+  - lexical_words  : unicode61 토크나이저 FTS5 (같은 external content). 1~2글자 검색어("AI", "규제", "동향")를
+                     접두어 검색("규제"* → "규제를", "규제안")으로 찾음. trigram은 3글자 미만을 못 찾음.
+  두 FTS 테이블은 lexical_chunks 트리거로 같이 맞춰짐 (삭제도 rowid로).
+  (SQLite 3.34 미만이라 trigram이 없으면 lexical_words만으로 모든 검색어를 찾음)
+- Chroma 컬렉션마다 따로 관리(collection 컬럼). ChromaStore가 쓰고/지울 때 같이 맞춰 줍니다.
+"""
+
+import sqlite3, os, re, threading
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lexical_chunks(
+  id INTEGER PRIMARY KEY,
+  collection TEXT NOT NULL,
+  chunk_id TEXT NOT NULL,
+  doc_id INTEGER,
+  text TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lexical_chunks_key ON lexical_chunks(collection, chunk_id);
+CREATE INDEX IF NOT EXISTS idx_lexical_chunks_doc ON lexical_chunks(collection, doc_id);
+"""
+
+_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+  text, content='lexical_chunks', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON lexical_chunks BEGIN
+  INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON lexical_chunks BEGIN
+  INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF text ON lexical_chunks BEGIN
+  INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text);
+  INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# 질문에서 뽑을 검색어: 영문/숫자/한글 덩어리 (GPT-4o, 3.5 같은 표기 포함)
+_TERM_RE = re.compile(r"[0-9A-Za-z가-힣][0-9A-Za-z가-힣\-\.]*")
+# 흔한 조사/어미 (trigram은 부분 문자열, 짧은 검색어는 접두어 일치라 "규제를" → "규제"로 찾아도 됨)
+_KO_SUFFIX = ("으로", "에서", "에게", "까지", "부터", "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "로")
+
+def _terms(question: str) -> List[str]:
+    """질문 → 중복 없는 검색어 목록 (한글 단어 끝 조사 하나는 뗌)."""
+    terms: List[str] = []
+    for t in _TERM_RE.findall(question):
+        t = t.strip(".-")
+        if re.search(r"[가-힣]$", t):
+            for suf in _KO_SUFFIX:
+                if t.endswith(suf) and len(t) - len(suf) >= 2:
+                    t = t[: -len(suf)]
+                    break
+        if t and t not in terms:
+            terms.append(t)
+    return terms
+
+def _fts_query(terms: List[str], prefix: bool = False) -> str:
+    """FTS5 MATCH 식: "검색어" OR ... (prefix면 "검색어"*)."""
+    star = "*" if prefix else ""
+    return " OR ".join('"' + t.replace('"', '""') + '"' + star for t in terms)
+
+def _match_query(question: str, min_len: int) -> str:
+    """min_len글자 이상 검색어만으로 만든 MATCH 식 (trigram 테이블용)."""
+    return _fts_query([t for t in _terms(question) if len(t) >= min_len])
+
+class LexicalIndex:
+    def __init__(self, db_path: str):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(_SCHEMA)
+        self.conn.executescript(_FTS.format(fts="lexical_words", tokenizer="unicode61"))
+        try:
+            self.conn.executescript(_FTS.format(fts="lexical_fts", tokenizer="trigram"))
+            self.trigram = True
+        except sqlite3.OperationalError:
+            self.trigram = False   # 짧은/긴 검색어 모두 lexical_words로
+        self.min_term_len = 3 if self.trigram else 1   # 이 길이 이상이면 trigram 테이블에서 찾음
+
+    def upsert(self, collection: str, ids: List[str], texts: List[str], doc_ids: List[int]) -> None:
+        if not ids:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO lexical_chunks(collection, chunk_id, doc_id, text) VALUES(?,?,?,?) "
+                "ON CONFLICT(collection, chunk_id) DO UPDATE SET doc_id=excluded.doc_id, text=excluded.text",
+                [(collection, i, d, t) for i, t, d in zip(ids, texts, doc_ids)],
+            )
+            self.conn.commit()
+
+    def delete_docs(self, collection: str, doc_ids: Iterable[int]) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "DELETE FROM lexical_chunks WHERE collection=? AND doc_id=?", [(collection, d) for d in doc_ids]
+            )
+            self.conn.commit()
+
+    def drop_collection(self, collection: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM lexical_chunks WHERE collection=?", (collection,))
+            self.conn.commit()
+
+    def count(self, collection: str) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM lexical_chunks WHERE collection=?", (collection,)
+            ).fetchone()[0]
+
+    def search(self, collection: Union[str, Sequence[str]], question: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        BM25 순위대로 [(chunk_id, bm25 점수)]. (SQLite bm25는 작을수록 관련 높음)
+        - 3글자 이상 검색어는 trigram 테이블, 1~2글자 검색어는 단어 테이블에서 접두어로 찾고
+          청크별로 두 점수를 더함 (양쪽에 다 걸린 청크가 앞으로).
+        - collection에 목록을 주면(월별 샤드) 그 컬렉션들을 한 번에 검색. bm25 통계는 테이블 전체 기준이라 점수끼리 비교 가능.
+        """
+        names = [collection] if isinstance(collection, str) else list(collection)
+        terms = _terms(question)
+        if not names or not terms:
+            return []
+        long_terms = [t for t in terms if len(t) >= self.min_term_len] if self.trigram else []
+        short_terms = [t for t in terms if t not in long_terms]
+
+        legs = []
+        if long_terms:
+            legs.append(("lexical_fts", _fts_query(long_terms)))
+        if short_terms:
+            legs.append(("lexical_words", _fts_query(short_terms, prefix=True)))
+        scores: Dict[str, float] = {}
+        with self.lock:
+            # bm25()는 UNION 안에서 못 쓰므로 테이블별로 상위 limit개씩 받아 합침
+            for fts, match in legs:
+                rows = self.conn.execute(
+                    f"SELECT c.chunk_id, bm25({fts}) AS score FROM {fts} "
+                    f"JOIN lexical_chunks c ON c.id = {fts}.rowid "
+                    f"WHERE {fts} MATCH ? AND c.collection IN ({','.join('?' * len(names))}) "
+                    "ORDER BY score LIMIT ?",
+                    (match, *names, limit),
+                ).fetchall()
+                for chunk_id, score in rows:
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + float(score)
+        return sorted(scores.items(), key=lambda kv: kv[1])[:limit]
@@ -20,6 +20,8 @@ class AppConfig:
         self.env = os.getenv("APP_ENV", self.app["app"].get("env", "dev"))
         self.chroma_dir = os.getenv("CHROMA_DIR", self.app["paths"]["chroma_dir"])
         self.sqlite_path = os.getenv("SQLITE_PATH", self.app["paths"]["sqlite_path"])
+        # 벡터 컬렉션 샤딩(none | month): 색인기/검색기/워커가 같은 값을 쓰도록 한 곳에서 읽음
+        self.shard_by = (self.app.get("vector_store", {}) or {}).get("shard_by", "none")
 
         self.solar_api_key = os.getenv("SOLAR_API_KEY", "")
         self.langsmith_api_key = os.getenv("LANGSMITH_API_KEY", "")
@@ -0,0 +1,91 @@
+# src/utils/text.py
+"""
+- 문장 분리(한국어/영어)와 토큰 개수 세기를 여러 모듈(청커, 프롬프트 등)에서 같이 쓰려고 모아둔 유틸입니다.
+- 토큰 수는 `tokenizers`(HuggingFace)로 실제 토크나이저를 불러와 셉니다.
+  토크나이저를 못 불러오면(오프라인 등) 글자/단어 기반 근사치로 대신합니다.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+# 문장 경계
+# - 마침표/물음표/느낌표(+닫는 따옴표/괄호) 뒤에 공백이 오는 곳
+# - "했다.그리고"처럼 한국어 종결어미 뒤 마침표에 공백 없이 다음 문장이 붙은 곳
+# - 개행(문단 경계)
+_SENT_BOUNDARY = re.compile(
+    r"[.!?。！？…]+[\"'”’)\]]*(?=\s|$)"
+    r"|(?<=[다요죠음임함])\.(?=[가-힣A-Za-z])"
+    r"|\n+"
+)
+
+def split_sentences(text: str) -> List[str]:
+    """텍스트를 문장 리스트로 나눈다. (문장부호는 앞 문장에 붙여 둠)"""
+    if not text:
+        return []
+    out: List[str] = []
+    start = 0
+    for m in _SENT_BOUNDARY.finditer(text):
+        seg = text[start:m.end()].strip()
+        if seg:
+            out.append(seg)
+        start = m.end()
+    tail = text[start:].strip()
+    if tail:
+        out.append(tail)
+    return out
+
+def split_paragraphs(text: str) -> List[str]:
+    """개행 기준 문단 리스트."""
+    return [p.strip() for p in (text or "").split("\n") if p.strip()]
+
+# 토크나이저가 없을 때 쓰는 근사: 영문/숫자 단어 1개, 한글 1글자, 기호 1개를 각각 토큰 1개로 봄
+_APPROX_TOKEN = re.compile(r"[A-Za-z0-9]+|[가-힣]|[^\sA-Za-z0-9가-힣]")
+
+class TokenCounter:
+    """
+    토큰 개수 세기.
+    - path(tokenizer.json)가 있으면 파일에서, 없으면 name(HF Hub 이름)으로 불러옴
+    - 둘 다 실패하면 근사치 사용 (is_exact=False, load_error에 이유)
+    - name은 로드에 실패해도 설정한 이름 그대로 (실제로 무엇으로 세는지는 is_exact로 확인)
+    """
+    def __init__(self, name: Optional[str] = None, path: Optional[str] = None):
+        self.name = name or path or "approx"
+        self.requested = bool(name or path)   # 토크나이저를 설정했는지 (안 했으면 근사치가 의도된 것)
+        self.load_error: Optional[str] = None
+        self.tok = None
+        try:
+            from tokenizers import Tokenizer
+            if path and os.path.exists(path):
+                self.tok = Tokenizer.from_file(path)
+            elif name:
+                self.tok = Tokenizer.from_pretrained(name)
+            elif path:
+                self.load_error = f"파일 없음: {path}"
+        except Exception as e:
+            self.load_error = f"{type(e).__name__}: {e}"
+        if self.load_error:
+            print(f"[WARN] 토크나이저 로드 실패({self.name}) → 근사치로 계산합니다: {self.load_error}")
+
+    @property
+    def is_exact(self) -> bool:
+        return self.tok is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tok is not None:
+            return len(self.tok.encode(text, add_special_tokens=False).ids)
+        return len(_APPROX_TOKEN.findall(text))
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if self.tok is not None and texts:
+            encs = self.tok.encode_batch(list(texts), add_special_tokens=False)
+            return [len(e.ids) for e in encs]
+        return [self.count(t) for t in texts]
+
+@lru_cache(maxsize=8)
+def get_token_counter(name: Optional[str] = None, path: Optional[str] = None) -> TokenCounter:
+    """같은 토크나이저를 프로세스 안에서 한 번만 불러오도록 공유."""
+    return TokenCounter(name=name, path=path)
@@ -0,0 +1,288 @@
+# src/utils/tracing.py
+"""
+- 파이프라인 단계별 소요 시간을 span(이름 + 시작/끝 + 속성)으로 남기는 아주 얇은 트레이싱 유틸입니다.
+- 한 요청(질문 하나, 색인 실행 하나)에 trace_id 하나. 안쪽 단계는 부모 span 밑에 자식으로 붙습니다.
+  현재 span은 contextvars로 들고 있어서 함수 인자로 넘길 필요가 없음.
+- 백엔드 (app.yaml logging.tracing.backend)
+  - off   : 아무것도 안 함 (기본, 오버헤드 거의 없음)
+  - jsonl : 끝난 span을 한 줄씩 JSON으로 파일에 추가 → summarize_jsonl()로 단계별 p50/p95/p99
+  - otel  : OpenTelemetry SDK로 내보냄 (otlp_endpoint가 있으면 OTLP gRPC, 없으면 콘솔)
+- 스레드 풀/스레드로 일을 넘길 때는 bind(fn)으로 감싸야 부모 span이 이어집니다.
+  (asyncio 태스크는 컨텍스트를 자동으로 복사하므로 필요 없음. run_in_executor는 필요)
+
+사용 예
+    with span("retriever.vector_query", n=3) as sp:
+        ...
+        sp.set(backend="chroma")
+
+    @traced("indexer.embed_batch")
+    def _embed_batch(...): ...
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "_t0", "attrs", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+class _NullSpan:
+    """트레이싱이 꺼져 있거나 샘플링에서 빠진 요청용. set()은 아무것도 안 함."""
+    trace_id = None
+
+    def set(self, **attrs) -> None:
+        pass
+
+_NULL = _NullSpan()
+
+class _OtelSpan:
+    """OpenTelemetry span을 Span과 같은 모양(set, trace_id)으로 감싼 것."""
+    __slots__ = ("span",)
+
+    def __init__(self, span):
+        self.span = span
+
+    @property
+    def trace_id(self) -> Optional[str]:
+        ctx = self.span.get_span_context()
+        return format(ctx.trace_id, "032x") if ctx.is_valid else None
+
+    def set(self, **attrs) -> None:
+        self.span.set_attributes(_otel_attrs(attrs))
+
+# 현재 span (jsonl 백엔드). 샘플링에서 빠진 요청이면 _NULL이 들어 있어 자식도 전부 빠짐
+_current: contextvars.ContextVar[Any] = contextvars.ContextVar("trace_span", default=None)
+
+_backend = "off"
+_sample_rate = 1.0
+_writer = None          # jsonl 파일 핸들
+_write_lock = threading.Lock()
+_tracer = None          # otel tracer
+
+def configure(
+    backend: str = "off",
+    path: str = "data/traces.jsonl",
+    service_name: str = "ai-news-rag",
+    otlp_endpoint: str = "",
+    sample_rate: float = 1.0,
+) -> None:
+    """프로세스 전체 트레이싱 설정. 여러 번 불러도 마지막 설정으로 바뀜."""
+    global _backend, _sample_rate, _writer, _tracer
+    with _write_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    _sample_rate = max(0.0, min(1.0, float(sample_rate)))
+    _backend = "off"
+    if backend == "jsonl":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _writer = open(path, "a", encoding="utf-8", buffering=1)   # 줄 단위 flush
+        _backend = "jsonl"
+    elif backend == "otel":
+        try:
+            _tracer = _otel_tracer(service_name, otlp_endpoint, _sample_rate)
+            _backend = "otel"
+        except Exception as e:
+            print(f"[WARN] OpenTelemetry 설정 실패 → 트레이싱을 끕니다: {e}")
+
+def configure_from_config(cfg) -> None:
+    """app.yaml logging.tracing 설정으로 configure(). 상대 경로는 실행 위치 기준 (chroma_dir과 같음)."""
+    opts = ((cfg.app.get("logging", {}) or {}).get("tracing", {}) or {})
+    configure(
+        backend=str(opts.get("backend", "off")),
+        path=opts.get("path", "data/traces.jsonl"),
+        service_name=opts.get("service_name", "ai-news-rag"),
+        otlp_endpoint=opts.get("otlp_endpoint", "") or "",
+        sample_rate=float(opts.get("sample_rate", 1.0)),
+    )
+
+def _otel_tracer(service_name: str, endpoint: str, sample_rate: float):
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+    )
+    if endpoint:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=endpoint)
+    else:
+        exporter = ConsoleSpanExporter()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("ai-news-rag")
+
+def _otel_attrs(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    # OTel 속성은 str/bool/int/float만 (None은 빼고 나머지는 문자열로)
+    return {
+        k: (v if isinstance(v, (str, bool, int, float)) else str(v))
+        for k, v in attrs.items() if v is not None
+    }
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Any]:
+    """name 단계 span. 현재 span이 있으면 그 자식, 없으면 새 trace의 루트."""
+    if _backend == "off":
+        yield _NULL
+        return
+    if _backend == "otel":
+        with _tracer.start_as_current_span(name, attributes=_otel_attrs(attrs)) as s:
+            yield _OtelSpan(s)
+        return
+
+    parent = _current.get()
+    if parent is _NULL or (parent is None and _sample_rate < 1.0 and random.random() >= _sample_rate):
+        token = _current.set(_NULL)
+        try:
+            yield _NULL
+        finally:
+            _current.reset(token)
+        return
+    sp = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attrs)
+    token = _current.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _export(sp, (time.perf_counter() - sp._t0) * 1000)
+
+def _export(sp: Span, duration_ms: float) -> None:
+    rec = {
+        "trace_id": sp.trace_id,
+        "span_id": sp.span_id,
+        "parent_id": sp.parent_id,
+        "name": sp.name,
+        "start": round(sp.start, 6),
+        "duration_ms": round(duration_ms, 3),
+        "thread": threading.current_thread().name,
+        "attrs": sp.attrs,
+    }
+    if sp.error:
+        rec["error"] = sp.error
+    line = json.dumps(rec, ensure_ascii=False, default=str)
+    with _write_lock:
+        if _writer is not None:
+            _writer.write(line + "\n")
+
+def record_span(name: str, t0: float, error: Optional[BaseException] = None, **attrs) -> None:
+    """
+    이미 끝난 단계를 span 하나로 기록 (t0 = 시작 시각 time.perf_counter()). 현재 span의 자식으로 붙음.
+    span()으로 감쌀 수 없는 곳(async generator처럼 yield 사이에 남의 코드가 도는 곳)용.
+    """
+    if _backend == "off":
+        return
+    duration_ms = (time.perf_counter() - t0) * 1000
+    if _backend == "otel":
+        end_ns = time.time_ns()
+        s = _tracer.start_span(name, attributes=_otel_attrs(attrs), start_time=end_ns - int(duration_ms * 1e6))
+        if error is not None:
+            s.record_exception(error)
+        s.end(end_time=end_ns)
+        return
+    parent = _current.get()
+    if parent is _NULL or (parent is None and _sample_rate < 1.0 and random.random() >= _sample_rate):
+        return
+    sp = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attrs)
+    sp.start = time.time() - duration_ms / 1000
+    if error is not None:
+        sp.error = f"{type(error).__name__}: {error}"
+    _export(sp, duration_ms)
+
+def traced(name: Optional[str] = None) -> Callable:
+    """함수 전체를 span 하나로 감싸는 데코레이터. 이름이 없으면 모듈.함수 이름."""
+    def deco(fn):
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _backend == "off":
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def current_span() -> Any:
+    """지금 열려 있는 span (없으면 set()이 아무것도 안 하는 빈 span)."""
+    if _backend == "otel":
+        from opentelemetry import trace
+        return _OtelSpan(trace.get_current_span())
+    return _current.get() or _NULL
+
+def current_trace_id() -> Optional[str]:
+    return current_span().trace_id if _backend != "off" else None
+
+def bind(fn: Callable) -> Callable:
+    """
+    지금 컨텍스트(현재 span 포함)를 붙잡아 두었다가 다른 스레드에서 fn을 그 안에서 실행.
+    같은 fn을 여러 스레드가 동시에 불러도 되도록 호출마다 컨텍스트를 복사해서 씀.
+    """
+    if _backend == "off":
+        return fn
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return run
+
+def summarize_jsonl(path: str, last: int = 0) -> List[Dict[str, Any]]:
+    """
+    jsonl 트레이스 파일 → span 이름별 호출 수/p50/p95/p99/max(ms). p99 높은 순.
+    last를 주면 파일 끝에서 그만큼의 span만 봄.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    if last:
+        lines = lines[-last:]
+    by_name: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        by_name.setdefault(rec["name"], []).append(float(rec["duration_ms"]))
+        if rec.get("error"):
+            errors[rec["name"]] = errors.get(rec["name"], 0) + 1
+
+    def pct(xs: List[float], p: float) -> float:
+        return xs[min(len(xs) - 1, int(round(p * (len(xs) - 1))))]
+
+    out = []
+    for name, xs in by_name.items():
+        xs.sort()
+        out.append({
+            "name": name, "count": len(xs), "errors": errors.get(name, 0),
+            "p50_ms": round(pct(xs, 0.50), 1), "p95_ms": round(pct(xs, 0.95), 1),
+            "p99_ms": round(pct(xs, 0.99), 1), "max_ms": round(xs[-1], 1),
+        })
+    out.sort(key=lambda r: r["p99_ms"], reverse=True)
+    return out
@@ -0,0 +1,158 @@
+# src/vector_store/chunker.py
+"""
+- configs/chunking.yaml 설정대로 문서를 청크로 나누는 토큰 기반 청커입니다.
+- 길이는 글자 수가 아니라 실제 토크나이저의 토큰 수로 잽니다. (한국어/영어 길이 차이 문제 해결)
+- 문장 경계(한국어 포함)에서만 자르고, respect_paragraphs면 문단 경계를 우선합니다.
+- 오버랩은 앞 청크의 마지막 문장들을 overlap_ratio만큼 다음 청크 앞에 붙이는 방식입니다.
+- version 태그(설정값 해시 포함)를 Chroma 메타데이터에 같이 저장해서, 설정이 바뀌면 재색인 대상이 됩니다.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.text import split_sentences, split_paragraphs, get_token_counter
+
+class TokenChunker:
+    def __init__(
+        self,
+        tokens: int = 600,
+        overlap_ratio: float = 0.15,
+        respect_paragraphs: bool = True,
+        min_chars: int = 200,
+        max_chars: int = 3500,
+        tokenizer: Optional[str] = None,
+        tokenizer_path: Optional[str] = None,
+        version: str = "CHUNK_v1",
+    ):
+        self.tokens = max(1, int(tokens))
+        self.overlap_tokens = max(0, int(self.tokens * float(overlap_ratio)))
+        self.respect_paragraphs = respect_paragraphs
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.counter = get_token_counter(tokenizer, tokenizer_path)
+
+        # 파라미터가 하나라도 바뀌면 버전 문자열이 달라지도록 해시를 붙임
+        # 토크나이저는 "설정한" 이름 — 로드 실패(근사치) 여부로 버전이 바뀌면 안 됨 (Indexer가 근사치 색인을 막음)
+        params = {
+            "tokens": self.tokens, "overlap_ratio": overlap_ratio,
+            "respect_paragraphs": respect_paragraphs, "min_chars": min_chars,
+            "max_chars": max_chars, "tokenizer": tokenizer or tokenizer_path or "approx",
+        }
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:6]
+        self.version = f"{version}-{digest}"
+
+    @classmethod
+    def from_config(cls, chunking_cfg: Dict[str, Any]) -> "TokenChunker":
+        """AppConfig.chunking(= chunking.yaml 내용)에서 생성."""
+        strategy = chunking_cfg.get("strategy", {}) or {}
+        limits = chunking_cfg.get("limits", {}) or {}
+        return cls(
+            tokens=strategy.get("tokens", 600),
+            overlap_ratio=strategy.get("overlap_ratio", 0.15),
+            respect_paragraphs=strategy.get("respect_paragraphs", True),
+            min_chars=limits.get("min_chars", 200),
+            max_chars=limits.get("max_chars", 3500),
+            tokenizer=chunking_cfg.get("tokenizer") or None,
+            tokenizer_path=chunking_cfg.get("tokenizer_path") or None,
+            version=chunking_cfg.get("version", "CHUNK_v1"),
+        )
+
+    # ---------------- public ---------------- #
+
+    def chunk(self, text: str) -> List[str]:
+        if not text or not text.strip():
+            return []
+        paras = split_paragraphs(text) if self.respect_paragraphs else [text]
+
+        # 문장 단위 목록과 각 문장의 토큰 수, 그리고 "이 문장부터 시작하는 문단"의 토큰 수
+        units: List[Tuple[str, int]] = []
+        para_tokens: Dict[int, int] = {}
+        for p in paras:
+            sents: List[str] = []
+            for sent in split_sentences(p):
+                sents.extend(self._split_long(sent))
+            counts = self.counter.count_many(sents)
+            para_tokens[len(units)] = sum(counts)
+            units.extend(zip(sents, counts))
+
+        chunks: List[str] = []
+        cur: List[Tuple[str, int]] = []
+        n_carry = 0          # cur 앞쪽에서 오버랩으로 넘어온 문장 수
+        cur_tokens = 0
+        cur_chars = 0
+
+        for i, (sent, n) in enumerate(units):
+            cut = bool(cur) and (cur_tokens + n > self.tokens or cur_chars + 1 + len(sent) > self.max_chars)
+            # 문단 경계 우선: 청크가 절반 이상 찼고 새 문단이 통째로 안 들어가면 여기서 끊는다
+            if not cut and cur and i in para_tokens and self.respect_paragraphs:
+                cut = cur_tokens >= self.tokens // 2 and cur_tokens + para_tokens[i] > self.tokens
+            if cut:
+                chunks.append(" ".join(x for x, _ in cur))
+                cur = self._overlap_tail(cur)
+                # 오버랩 + 이번 문장이 상한을 넘으면 오버랩을 앞 문장부터 덜어냄 (다음 청크도 상한 안에)
+                while cur and (sum(k for _, k in cur) + n > self.tokens
+                               or sum(len(x) + 1 for x, _ in cur) + 1 + len(sent) > self.max_chars):
+                    cur.pop(0)
+                n_carry = len(cur)
+                cur_tokens = sum(k for _, k in cur)
+                cur_chars = sum(len(x) + 1 for x, _ in cur)
+            cur.append((sent, n))
+            cur_tokens += n
+            cur_chars += len(sent) + 1
+
+        if len(cur) > n_carry:
+            fresh = " ".join(x for x, _ in cur[n_carry:])
+            # 너무 짧은 꼬리 청크는 따로 두면 색인에서 버려지므로 앞 청크 끝에 붙인다
+            if chunks and len(" ".join(x for x, _ in cur)) < self.min_chars:
+                chunks[-1] = f"{chunks[-1]} {fresh}"
+            else:
+                chunks.append(" ".join(x for x, _ in cur))
+        return chunks
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        return self.counter.count_many(texts)
+
+    # ---------------- internal ---------------- #
+
+    def _overlap_tail(self, cur: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """앞 청크의 끝 문장들 중 overlap_tokens 안에 들어가는 만큼을 다음 청크로 넘김."""
+        if self.overlap_tokens <= 0:
+            return []
+        tail: List[Tuple[str, int]] = []
+        total = 0
+        for s, n in reversed(cur[1:]):   # 청크 전체를 넘기지는 않음
+            if total + n > self.overlap_tokens:
+                break
+            tail.insert(0, (s, n))
+            total += n
+        return tail
+
+    def _split_long(self, sentence: str) -> List[str]:
+        """토큰/글자 상한을 넘는 긴 문장은 단어 단위로(그래도 길면 글자 단위로) 자른다."""
+        n = self.counter.count(sentence)
+        if n <= self.tokens and len(sentence) <= self.max_chars:
+            return [sentence]
+        words = sentence.split(" ")
+        if len(words) == 1:
+            step = max(1, min(self.max_chars, len(sentence) * self.tokens // max(n, 1)))
+            return [sentence[i:i + step] for i in range(0, len(sentence), step)]
+        pieces: List[str] = []
+        buf: List[str] = []
+        for w in words:
+            cand = " ".join(buf + [w])
+            if buf and (self.counter.count(cand) > self.tokens or len(cand) > self.max_chars):
+                pieces.append(" ".join(buf))
+                buf = [w]
+            else:
+                buf.append(w)
+        if buf:
+            pieces.append(" ".join(buf))
+        # 띄어쓰기 없이 상한보다 긴 덩어리는 글자 단위로
+        out: List[str] = []
+        for piece in pieces:
+            if " " not in piece and (len(piece) > self.max_chars or self.counter.count(piece) > self.tokens):
+                out.extend(self._split_long(piece))
+            else:
+                out.append(piece)
+        return out
@@ -6,10 +6,30 @@
 """
 
 import os
+import re
+import copy
 import math
-from typing import List, Dict, Any
+import time
+import queue
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Tuple, Optional
 import chromadb
 from chromadb.config import Settings
+from src.sql.chunk_cache import ChunkEmbeddingCache, chunk_hash
+from src.sql.journal import IndexJournal
+from src.sql.collection_registry import CollectionRegistry, shard_period
+from src.sql.lexical_index import LexicalIndex
+from src.vector_store.chunker import TokenChunker
+from src.utils.tracing import bind, current_span, traced
+
+# 파이프라인 단계 사이에서 "더 이상 보낼 게 없음"을 알리는 신호
+_STOP = object()
+
+# 청크 메타데이터 구성 버전 (2: 검색 필터용 published_ts/lang 추가)
+METADATA_VERSION = 2
 
 # 간단 길이 기반 청커(문단 경계 우선, 부족하면 길이로 잘라 오버랩 포함)
 # 1200자면 대략 200 영단어라서 적당한 값으로 판단함.
@@ -52,15 +72,127 @@ class ChromaStore:
     """
     Chroma 컬렉션 래퍼.
     - persist_dir: data/chroma
-    - collection: "ai_news_rag"
+    - collection: "ai_news_rag" (registry를 주면 별칭으로 보고 실제 버전 컬렉션을 찾아 씀)
+    - lexical: 주면 청크를 쓰고/지울 때 키워드 인덱스(FTS5)도 같이 맞춤
+    - shard_by="month": 청크를 게시 월(published_ts, UTC)별 샤드 컬렉션(<컬렉션>__mYYYY_MM)에 나눠 씀.
+      샤드 목록은 registry에 기록. 지우기/버전 확인은 상위 컬렉션 + 모든 샤드를 봄
+      (샤딩 전에 상위 컬렉션에 들어간 청크도 그대로 검색/정리됨).
     """
-    def __init__(self, persist_dir: str, collection_name: str = "ai_news_rag"):
+    def __init__(
+        self,
+        persist_dir: str,
+        collection_name: str = "ai_news_rag",
+        registry: Optional[CollectionRegistry] = None,
+        lexical: Optional[LexicalIndex] = None,
+        shard_by: str = "none",
+    ):
+        if shard_by not in ("none", "month"):
+            raise ValueError(f"unknown shard_by: {shard_by}")
+        if shard_by != "none" and registry is None:
+            raise ValueError("shard_by requires a CollectionRegistry")
         os.makedirs(persist_dir, exist_ok=True)
         self.client = chromadb.PersistentClient(
             path=persist_dir,
             settings=Settings(anonymized_telemetry=False),
         )
-        self.col = self.client.get_or_create_collection(collection_name)
+        self.alias = collection_name
+        self.registry = registry
+        self.lexical = lexical
+        self.shard_by = shard_by
+        self.shards = registry if shard_by != "none" else None   # 샤드 목록 기록용 (pinned store도 유지)
+        self._shard_cols: Dict[str, Any] = {}
+        self.name: Optional[str] = None
+        self.refresh()
+
+    def refresh(self) -> str:
+        """별칭이 다른 컬렉션으로 바뀌었으면 다시 연다. 반환: 지금 쓰는 컬렉션 이름"""
+        name = self.registry.resolve(self.alias)[0] if self.registry is not None else self.alias
+        if name != self.name:
+            self.col = self.client.get_or_create_collection(name)
+            self.name = name
+        return name
+
+    def pinned(self, collection_name: str) -> "ChromaStore":
+        """같은 클라이언트로 특정 컬렉션만 쓰는 store (재색인 대상용, 별칭을 따라가지 않음)."""
+        other = copy.copy(self)
+        other.alias, other.registry, other.name = collection_name, None, None
+        other._shard_cols = {}   # 샤드 목록은 계속 self.shards(registry)에 기록
+        other.refresh()
+        return other
+
+    def collections(self, statuses: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, Any]]:
+        """[(이름, 컬렉션)] 상위 컬렉션 + (샤딩이면) 샤드들. statuses=None이면 보관(archived)한 샤드도 포함."""
+        out = [(self.name, self.col)]
+        if self.shards is None:
+            return out
+        for shard, _ in self.shards.shards(self.name, statuses=statuses or ("active", "archived")):
+            out.append((shard, self._shard_col(shard)))
+        return out
+
+    def _shard_col(self, shard: str):
+        col = self._shard_cols.get(shard)
+        if col is None:
+            col = self._shard_cols[shard] = self.client.get_or_create_collection(shard)
+        return col
+
+    def count(self) -> int:
+        return sum(col.count() for _, col in self.collections())
+
+    def drop(self, collection_name: str) -> None:
+        """컬렉션(+ 샤드들)과 키워드 인덱스 행을 지움."""
+        names = [collection_name]
+        if self.shards is not None:
+            names += [sh for sh, _ in self.shards.shards(collection_name, statuses=None)]
+        for name in names:
+            if self.lexical is not None:
+                self.lexical.drop_collection(name)
+            try:
+                self.client.delete_collection(name)
+            except Exception:
+                if name == collection_name:
+                    raise
+            self._shard_cols.pop(name, None)
+        if len(names) > 1:
+            self.shards.set_shard_status(names[1:], "dropped")
+
+    def archive_shards(self, before: str) -> List[str]:
+        """기간이 before(YYYY_MM)보다 이른 샤드를 검색에서 뺌 (데이터는 그대로, 레지스트리 한 번 갱신)."""
+        old = [sh for sh, period in self.shards.shards(self.name) if period < before]
+        self.shards.set_shard_status(old, "archived")
+        return old
+
+    def drop_shards(self, before: str) -> List[str]:
+        """기간이 before(YYYY_MM)보다 이른 샤드(보관한 것 포함)를 통째로 지움 (컬렉션 삭제 = 청크 단위 삭제 없음)."""
+        old = [sh for sh, period in self.shards.shards(self.name, statuses=("active", "archived")) if period < before]
+        for shard in old:
+            if self.lexical is not None:
+                self.lexical.drop_collection(shard)
+            try:
+                self.client.delete_collection(shard)
+            except Exception:
+                pass   # 이미 없는 컬렉션
+            self._shard_cols.pop(shard, None)
+        self.shards.set_shard_status(old, "dropped")
+        return old
+
+    def backfill_lexical(self, page: int = 1000) -> int:
+        """키워드 인덱스가 생기기 전에 색인된 컬렉션(샤드)을 FTS5에 채움. 반환: 채운 청크 수"""
+        if self.lexical is None:
+            return 0
+        n = 0
+        for name, col in self.collections():
+            if self.lexical.count(name) or not col.count():
+                continue
+            offset = 0
+            while True:
+                res = col.get(limit=page, offset=offset, include=["documents", "metadatas"])
+                ids = res.get("ids") or []
+                if not ids:
+                    break
+                self.lexical.upsert(name, ids, res["documents"], [m["doc_id"] for m in res["metadatas"]])
+                n += len(ids)
+                offset += len(ids)
+        return n
 
     def upsert_chunks(
         self,
@@ -71,6 +203,7 @@ class ChromaStore:
         date_published: str,
         chunks: List[str],
         embeddings: List[List[float]],
+        index_version: str = "",
     ) -> int:
         """
         청크+임베딩을 collection에 업서트.
@@ -78,23 +211,107 @@ class ChromaStore:
         """
         if not chunks:
             return 0
-        ids = [f"doc_{doc_id}_chunk_{i}" for i in range(len(chunks))]
-        metadatas = [{
-            "doc_id": doc_id,
-            "url": url,
-            "title": title,
-            "source": source,
-            "date_published": date_published,
-            "chunk_index": i,
-            "length": len(chunks[i]),
-        } for i in range(len(chunks))]
-        self.col.upsert(
-            ids=ids,
-            documents=chunks,
-            embeddings=embeddings,
-            metadatas=metadatas,
-        )
-        return len(chunks)
+        ids = [_chunk_id(doc_id, i) for i in range(len(chunks))]
+        metadatas = [
+            _chunk_metadata(doc_id, url, title, source, date_published, i, chunks[i], chunk_hash(chunks[i]), index_version)
+            for i in range(len(chunks))
+        ]
+        return self.upsert_records(ids, chunks, embeddings, metadatas)
+
+    def upsert_records(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+    ) -> int:
+        """
+        여러 문서의 청크를 한 번에 업서트(대량 쓰기용).
+        파이프라인 색인에서 문서 경계와 상관없이 모아서 부른다.
+        """
+        if not ids:
+            return 0
+        if self.shard_by == "none":
+            groups = {self.name: list(range(len(ids)))}
+        else:
+            groups: Dict[str, List[int]] = {}
+            for i, m in enumerate(metadatas):
+                shard = self.shards.shard_for(self.name, shard_period(m.get("published_ts")))
+                groups.setdefault(shard, []).append(i)
+        for name, rows in groups.items():
+            col = self.col if name == self.name else self._shard_col(name)
+            col.upsert(
+                ids=[ids[i] for i in rows],
+                documents=[documents[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows],
+            )
+            if self.lexical is not None:
+                self.lexical.upsert(
+                    name, [ids[i] for i in rows], [documents[i] for i in rows], [metadatas[i]["doc_id"] for i in rows]
+                )
+        return len(ids)
+
+    def doc_versions(self, doc_ids: List[int]) -> Dict[int, set]:
+        """문서별로 저장된 청크들의 index_version 집합 (색인된 적 없으면 키 없음)."""
+        out: Dict[int, set] = {}
+        for _, col in self.collections():
+            for i in range(0, len(doc_ids), 100):
+                part = doc_ids[i:i + 100]
+                res = col.get(where={"doc_id": {"$in": part}}, include=["metadatas"])
+                for m in res.get("metadatas") or []:
+                    out.setdefault(m["doc_id"], set()).add(m.get("index_version", ""))
+        return out
+
+    def delete_docs(self, doc_ids: List[int]) -> None:
+        """문서의 기존 청크를 모두 지움 (청커가 바뀌어 청크 수가 달라질 때 찌꺼기가 안 남도록)."""
+        for name, col in self.collections():
+            for i in range(0, len(doc_ids), 100):
+                col.delete(where={"doc_id": {"$in": doc_ids[i:i + 100]}})
+            if self.lexical is not None:
+                self.lexical.delete_docs(name, doc_ids)
+
+def _chunk_id(doc_id: int, i: int) -> str:
+    return f"doc_{doc_id}_chunk_{i}"
+
+def _chunk_metadata(
+    doc_id: int, url: str, title: str, source: str, date_published: str, i: int, chunk: str, h: str,
+    index_version: str, published_ts: Optional[int] = None, lang: str = "",
+) -> Dict[str, Any]:
+    return {
+        "doc_id": doc_id,
+        "url": url,
+        "title": title,
+        "source": source,
+        "date_published": date_published,
+        # 검색 필터(where)용: 숫자 시각과 정규화한 언어 코드
+        "published_ts": published_ts if published_ts is not None else _published_ts(date_published),
+        "lang": _norm_lang(lang),
+        "chunk_index": i,
+        "length": len(chunk),
+        "chunk_hash": h,
+        "index_version": index_version,
+    }
+
+def _published_ts(value: str) -> int:
+    """RSS 날짜(RFC 822) 또는 ISO 문자열 → epoch 초. 못 읽으면 0."""
+    value = (value or "").strip()
+    if not value:
+        return 0
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def _norm_lang(value: str) -> str:
+    # "en-US", "ko_KR" → "en", "ko"
+    return re.split(r"[-_]", (value or "").strip().lower())[0]
 
 class Indexer:
     """
@@ -103,6 +320,38 @@ class Indexer:
     - 청킹
     - Upstage 임베딩(embedding-passage)
     - Chroma 업서트
+
+    세 단계는 크기 제한이 있는 큐로 연결되어 동시에 돈다.
+      [청킹 스레드] --embed_q--> [임베딩 워커 N개] --write_q--> [업서트(호출 스레드)]
+    - 임베딩 배치는 문서 경계를 넘어 batch_size만큼 채워서 보낸다(짧은 기사도 꽉 찬 요청).
+    - Chroma 쓰기는 upsert_batch_size만큼 모아서 한 번에 한다.
+    - id/메타데이터/임베딩은 문서 단위로 처리하던 예전 방식과 똑같다.
+
+    청킹
+    - chunker(TokenChunker, chunking.yaml 기반)를 주면 토큰/문장 기준으로 자르고, 없으면 simple_chunk(글자 기준).
+    - 청커 버전(+메타데이터 구성 버전)을 메타데이터(index_version)에 저장. 이미 같은 버전으로 색인된 문서는 건너뛰고,
+      다른 버전으로 색인된 문서는 기존 청크를 지운 뒤 다시 색인한다.
+
+    청크 중복 제거
+    - 청크마다 해시를 만들고, 이미 임베딩한 적 있는 청크(이번 실행/이전 실행 모두)는 API를 다시 부르지 않고 벡터를 재사용.
+    - boilerplate_max_docs를 주면, 그보다 많은 문서에 등장한 청크(면책 조항 등)는 색인에서 제외.
+
+    이어서 하기(저널)
+    - 실행마다 job을 만들고 문서별 청킹/임베딩/업서트 개수를 IndexJournal(SQLite)에 기록.
+    - 같은 청커 버전의 끝나지 않은 job이 있으면 그 job을 이어서 돌리고, 끝난 문서는 건너뜀.
+    - 받아 온 임베딩은 바로 chunk_cache에 저장되므로 이어서 돌릴 때 API를 다시 부르지 않음.
+
+    컬렉션 버전(blue/green)
+    - collection_name은 별칭. CollectionRegistry(SQLite)가 실제 버전 컬렉션을 알려줌.
+    - 평소 색인은 별칭이 가리키는 컬렉션에 쓰고, 쓸 때마다 별칭 버전을 올려 검색기가 알아채게 함.
+    - rebuild()는 새 컬렉션에 전부 다시 색인 → 검증 → 별칭 전환 → 오래된 컬렉션 삭제.
+
+    키워드 인덱스
+    - 청크를 Chroma에 쓰거나 지울 때 SQLite FTS5(LexicalIndex)에도 같이 반영 (하이브리드 검색용).
+
+    월별 샤드
+    - shard_by="month"면 청크를 게시 월별 컬렉션에 나눠 씀(ChromaStore 참고). 기존 단일 컬렉션을 샤드로
+      옮기려면 설정을 바꾼 뒤 rebuild() — 새 버전 컬렉션이 샤드로 만들어지고 전환됨.
     """
     def __init__(
         self,
@@ -113,70 +362,470 @@ class Indexer:
         overlap: int = 120,
         min_chunk_chars: int = 200,
         batch_size: int = 32,
+        embed_workers: int = 4,         # 임베딩 요청을 동시에 보낼 스레드 수
+        upsert_batch_size: int = 256,   # Chroma에 한 번에 쓸 청크 수
+        queue_size: int = 8,            # 단계 사이 큐에 쌓아둘 최대 배치 수
+        chunk_cache: Optional[ChunkEmbeddingCache] = None,  # 청크 해시 → 임베딩 캐시
+        boilerplate_max_docs: Optional[int] = None,         # 이보다 많은 문서에 나온 청크는 제외(None이면 끄기)
+        chunker: Optional[TokenChunker] = None,             # 없으면 simple_chunk(max_chars/overlap) 사용
+        journal: Optional[IndexJournal] = None,             # 색인 진행 기록(이어서 하기용)
+        collection_name: str = "ai_news_rag",               # 컬렉션 별칭
+        registry: Optional[CollectionRegistry] = None,      # 별칭 → 실제 컬렉션
+        lexical: Optional[LexicalIndex] = None,             # 키워드(FTS5) 인덱스, 청크 쓸 때 같이 갱신
+        shard_by: str = "none",                             # "month"면 게시 월별 샤드 컬렉션에 나눠 씀
     ):
         self.store = store
-        self.vdb = ChromaStore(chroma_dir)
+        # 레지스트리/키워드 인덱스/캐시/저널은 따로 안 주면 문서 DB 파일에 같이 둠. 경로를 모르면 멈춤
+        # (메모리 DB로 대신하면 별칭/키워드 인덱스가 검색기와 어긋나고 이어서 하기도 안 됨)
+        db_path = getattr(store, "db_path", None)
+        if not db_path and None in (registry, lexical, chunk_cache, journal):
+            raise ValueError("store에 db_path가 없으면 registry/lexical/chunk_cache/journal을 모두 넘겨야 합니다")
+        self.registry = registry or CollectionRegistry(db_path)
+        self.vdb = ChromaStore(
+            chroma_dir, collection_name=collection_name, registry=self.registry,
+            lexical=lexical or LexicalIndex(db_path), shard_by=shard_by,
+        )
+        self.embed_model = "embedding-passage"
         self.solar = solar_client
         self.max_chars = max_chars
         self.overlap = overlap
         self.min_chunk_chars = min_chunk_chars
         self.batch_size = batch_size
+        self.embed_workers = max(1, embed_workers)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.queue_size = max(1, queue_size)
+        # 캐시를 따로 안 주면 문서 DB 파일에 같이 저장
+        self.chunk_cache = chunk_cache or ChunkEmbeddingCache(db_path, model=self.embed_model)
+        self.journal = journal or IndexJournal(db_path)
+        self._job_id: Optional[int] = None
+        self.boilerplate_max_docs = boilerplate_max_docs
+        self.chunker = chunker
+        # 메타데이터 구성이 바뀌어도 다시 색인되도록 버전에 함께 넣음
+        base_version = chunker.version if chunker else f"simple-{max_chars}-{overlap}"
+        self.index_version = f"{base_version}.m{METADATA_VERSION}"
+        self._stats_lock = threading.Lock()
 
     def _chunk_doc(self, text: str) -> List[str]:
-        chunks = simple_chunk(text, self.max_chars, self.overlap)
+        if self.chunker is not None:
+            chunks = self.chunker.chunk(text)
+        else:
+            chunks = simple_chunk(text, self.max_chars, self.overlap)
         # 너무 짧은 청크 제거
         return [c for c in chunks if len(c) >= self.min_chunk_chars]
 
+    @traced("indexer.embed_batch")
     def _embed_batch(self, batch_texts: List[str]) -> List[List[float]]:
         # 문서 색인에는 passage 임베딩 권장
         return self.solar.embed_passage(batch_texts)
 
-    def index_recent(self, limit_docs: int = 200) -> Dict[str, Any]:
+    def index_recent(self, limit_docs: int = 200, force: bool = False, resume: bool = True) -> Dict[str, Any]:
+        """
+        최근 문서 N개를 색인.
+        - force=False면 현재 청커 버전으로 이미 색인된 문서는 건너뜀.
+        - resume=True면 같은 버전으로 돌다 멈춘 job의 남은 문서도 이어서 처리.
+        """
         docs = self.store.fetch_all(limit=limit_docs)
-        total_chunks = 0
-        total_embedded = 0
-        total_upserted = 0
+        return self._index_docs(docs, force=force, resume=resume)
 
-        for d in docs:
-            doc_id = d["id"]
-            url = d.get("url", "")
-            title = d.get("title", "")
-            source = d.get("source", "")
-            date_published = d.get("date_published", "")
-            text = d.get("raw_text", "")
-
-            chunks = self._chunk_doc(text)
-            if not chunks:
-                continue
+    def index_ids(self, doc_ids: List[int], force: bool = False) -> Dict[str, Any]:
+        """
+        지정한 문서들만 색인 (색인 큐 워커용).
+        여러 워커가 동시에 돌 수 있어 다른 job을 이어받지는 않음.
+        """
+        docs = self.store.fetch_by_ids(list(doc_ids))
+        return self._index_docs(docs, force=force, resume=False)
 
-            # 배치 임베딩
-            embeddings: List[List[float]] = []
-            for i in range(0, len(chunks), self.batch_size):
-                batch = chunks[i:i + self.batch_size]
-                embs = self._embed_batch(batch)
-                embeddings.extend(embs)
-
-            # 안전 체크
-            if len(embeddings) != len(chunks):
-                raise RuntimeError("임베딩 개수와 청크 개수가 일치하지 않습니다.")
-
-            upserted = self.vdb.upsert_chunks(
-                doc_id=doc_id,
-                url=url,
-                title=title,
-                source=source,
-                date_published=date_published,
-                chunks=chunks,
-                embeddings=embeddings,
+    @traced("indexer.index")
+    def _index_docs(self, docs: List[Dict[str, Any]], force: bool = False, resume: bool = True) -> Dict[str, Any]:
+        # 다른 프로세스가 rebuild로 별칭을 바꿨을 수 있으니 매번 다시 확인
+        self.vdb.refresh()
+        # 키워드 인덱스가 생기기 전에 색인된 컬렉션(샤드)이면 한 번 채워 둠 (이미 채운 것은 건너뜀)
+        self.vdb.backfill_lexical()
+        job_id = self.journal.find_resumable(self.index_version) if resume else None
+        unfinished = set(self.journal.unfinished_docs(job_id)) if job_id else set()
+
+        # 멈춘 job의 문서 중 이번 목록에 없는 것도 가져와서 같이 처리
+        missing = unfinished - {d["id"] for d in docs}
+        if missing:
+            docs = list(docs) + self.store.fetch_by_ids(sorted(missing))
+        todo = self._select_stale(docs, force, unfinished)
+
+        result_extra = {
+            "docs_skipped": len(docs) - len(todo),
+            "job_id": None,
+            "resumed": False,
+            "docs_resumed": sum(1 for d in todo if d["id"] in unfinished),
+        }
+        if not todo:
+            result = self._run_pipeline([])
+            result.update(result_extra)
+            if job_id:   # 가져온 job에 남은 문서가 없으면 끝난 것으로 (다음 실행이 또 가져가지 않게)
+                result["job_id"] = job_id
+                self.journal.finish(job_id, result)
+            return result
+
+        if job_id:
+            self.journal.resume(job_id, [d["id"] for d in todo])
+        else:
+            job_id = self.journal.start(self.index_version, [d["id"] for d in todo])
+        self._job_id = job_id
+        try:
+            result = self._run_pipeline(todo)
+        except BaseException as e:
+            self.journal.fail(job_id, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._job_id = None
+        result.update(result_extra, job_id=job_id, resumed=bool(unfinished))
+        self.journal.finish(job_id, result)
+        if result["upserted_total"] and self.vdb.registry is not None:
+            self.vdb.registry.touch(self.vdb.alias)   # 검색기에 "내용 바뀜" 알림
+        return result
+
+    # ---------------- blue/green rebuild ---------------- #
+
+    @traced("indexer.rebuild")
+    def rebuild(self, limit_docs: int = 100_000, keep_old: int = 1, probe: int = 5) -> Dict[str, Any]:
+        """
+        전체 문서를 새 버전 컬렉션에 다시 색인하고, 검증을 통과하면 별칭을 한 번에 전환.
+        - 청커/임베딩 모델을 바꿀 때 쓰는 경로. 그동안 검색은 기존 컬렉션으로 계속 됨.
+        - 임베딩은 chunk_cache에서 재사용되므로 청크가 같으면 API를 다시 부르지 않음.
+        - keep_old: 롤백용으로 남겨 둘 이전 컬렉션 수. 나머지는 삭제.
+        """
+        alias = self.vdb.alias
+        name = self.registry.create_version(alias, self.index_version, self.embed_model)
+        live = self.vdb
+        self.vdb = live.pinned(name)
+        try:
+            build = self._index_docs(self.store.fetch_all(limit=limit_docs), force=True, resume=False)
+            # 짓는 동안 워커가 기존 컬렉션에 넣은 새 문서 따라잡기
+            catchup = self._index_docs(self.store.fetch_all(limit=limit_docs), force=False, resume=False)
+            expected = build["upserted_total"] + catchup["upserted_total"]
+            self._validate_collection(self.vdb, expected, probe)
+            chunks = self.vdb.count()
+        except BaseException as e:
+            self.registry.set_status(name, "failed")
+            try:
+                live.drop(name)
+            except Exception:
+                pass
+            print(f"[REBUILD] {name} 실패, 기존 컬렉션 유지: {e}")
+            raise
+        finally:
+            self.vdb = live
+
+        self.registry.set_status(name, "building", chunks=chunks)
+        version = self.registry.promote(alias, name)
+        # 검증~전환 사이 틈에 기존 컬렉션으로 들어간 문서까지 새 live 컬렉션에 반영
+        late = self._index_docs(self.store.fetch_all(limit=limit_docs), force=False, resume=False)
+
+        dropped = []
+        for old in self.registry.collections_to_gc(alias, keep=keep_old):
+            try:
+                live.drop(old)
+            except Exception:
+                pass   # 이미 없는 컬렉션
+            self.registry.set_status(old, "deleted")
+            dropped.append(old)
+
+        return {
+            "collection": name,
+            "alias_version": version,
+            "docs_processed": build["docs_processed"],
+            "chunks": chunks + late["upserted_total"],
+            "embedded_new": build["embedded_new"] + catchup["embedded_new"] + late["embedded_new"],
+            "reused_total": build["reused_total"] + catchup["reused_total"] + late["reused_total"],
+            "dropped_collections": dropped,
+            "elapsed_s": round(build["elapsed_s"] + catchup["elapsed_s"] + late["elapsed_s"], 3),
+        }
+
+    @staticmethod
+    def _validate_collection(vdb: "ChromaStore", expected: int, probe: int) -> None:
+        """
+        승격 전 검사:
+        - 비어 있지 않고, 쓴 청크 수와 컬렉션 개수가 같을 것
+        - 몇 개 청크를 자기 벡터로 검색하면 거리 0으로 1등이 나올 것(인덱스가 깨지지 않았는지)
+          (문서 사이 같은 청크는 벡터도 같아서 id 대신 거리로 봄)
+        """
+        n = vdb.count()
+        if n == 0 or n != expected:
+            raise RuntimeError(f"collection {vdb.name}: count={n}, expected={expected}")
+        # 샤딩이면 상위 컬렉션은 비어 있으니 청크가 있는 첫 컬렉션(샤드)으로 검사
+        for name, col in vdb.collections():
+            sample = col.get(limit=probe, include=["embeddings"])
+            ids, embs = sample.get("ids") or [], sample.get("embeddings")
+            if embs is not None and len(ids):
+                break
+        else:
+            return
+        res = col.query(query_embeddings=[list(e) for e in embs], n_results=1, include=["distances"])
+        bad = [i for i, d in zip(ids, res["distances"]) if not d or d[0] > 1e-3]
+        if bad:
+            raise RuntimeError(f"collection {name}: self-retrieval failed for {bad}")
+
+    def _check_tokenizer(self) -> None:
+        """
+        설정한 토크나이저를 못 불러와 근사치로 세고 있으면 색인하지 않음.
+        버전 태그는 설정한 토크나이저 이름이라, 그대로 색인하면 근사치로 자른 청크가 정상 버전으로 저장되어
+        토크나이저가 돌아와도 다시 색인되지 않음.
+        """
+        counter = self.chunker.counter if self.chunker is not None else None
+        if counter is not None and counter.requested and not counter.is_exact:
+            raise RuntimeError(
+                f"토크나이저 로드 실패({counter.name}: {counter.load_error}) — 근사치 청킹으로는 색인하지 않습니다. "
+                "tokenizer/tokenizer_path(configs/chunking.yaml)를 확인하세요."
             )
 
-            total_chunks += len(chunks)
-            total_embedded += len(embeddings)
-            total_upserted += upserted
+    def _select_stale(
+        self, docs: List[Dict[str, Any]], force: bool, must_redo: Optional[set] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        현재 버전으로 색인되지 않은 문서(+ 저널상 끝나지 않은 문서)만 고르고, 기존 청크는 미리 지운다.
+        (중간에 멈춘 문서는 청크가 일부만 현재 버전으로 들어가 있을 수 있어 버전만 보고는 판단 못 함)
+        """
+        self._check_tokenizer()
+        if not docs:
+            return []
+        must_redo = must_redo or set()
+        versions = self.vdb.doc_versions([d["id"] for d in docs])
+        if force:
+            todo = docs
+        else:
+            todo = [
+                d for d in docs
+                if d["id"] in must_redo or versions.get(d["id"]) != {self.index_version}
+            ]
+        old = [d["id"] for d in todo if d["id"] in versions]
+        if old:
+            self.vdb.delete_docs(old)
+        return todo
+
+    # ---------------- pipeline ---------------- #
+
+    @traced("indexer.pipeline")
+    def _run_pipeline(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.time()
+        embed_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        write_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        errors: List[BaseException] = []   # 어느 단계든 실패하면 여기에 담기고, 나머지 단계는 큐만 비움
+        stats = {
+            "chunks_total": 0, "embedded_total": 0, "upserted_total": 0,
+            "embed_calls": 0, "embedded_new": 0, "reused_total": 0, "dropped_boilerplate": 0,
+            "chunk_tokens": [],   # 청커가 토큰을 셀 수 있을 때만 채움(청크당 토큰 수 통계용)
+        }
+        # 이번 실행에서 먼저 나온 같은 청크가 아직 임베딩 중일 수 있어 맨 마지막에 캐시에서 채움
+        deferred: List[Tuple[str, str, Dict[str, Any]]] = []
 
+        # 단계 스레드도 같은 trace 밑으로 (bind)
+        chunker = threading.Thread(
+            target=bind(self._chunk_stage), args=(docs, embed_q, write_q, errors, stats, deferred), daemon=True
+        )
+        embedders = [
+            threading.Thread(target=bind(self._embed_stage), args=(embed_q, write_q, errors, stats), daemon=True)
+            for _ in range(self.embed_workers)
+        ]
+        chunker.start()
+        for t in embedders:
+            t.start()
+
+        self._write_stage(write_q, errors, stats)
+
+        chunker.join()
+        for t in embedders:
+            t.join()
+        if errors:
+            raise errors[0]
+        self._write_deferred(deferred, stats)
+
+        elapsed = time.time() - t0
+        tok = stats["chunk_tokens"]
+        current_span().set(docs=len(docs), chunks=stats["chunks_total"], embed_calls=stats["embed_calls"])
         return {
             "docs_processed": len(docs),
-            "chunks_total": total_chunks,
-            "embedded_total": total_embedded,
-            "upserted_total": total_upserted,
-        }
\ No newline at end of file
+            "chunks_total": stats["chunks_total"],
+            "embedded_total": stats["embedded_total"],
+            "upserted_total": stats["upserted_total"],
+            "embed_calls": stats["embed_calls"],
+            "embedded_new": stats["embedded_new"],
+            "reused_total": stats["reused_total"],
+            "dropped_boilerplate": stats["dropped_boilerplate"],
+            "index_version": self.index_version,
+            "chunks_per_doc_avg": round(stats["chunks_total"] / len(docs), 2) if docs else 0.0,
+            "tokens_per_chunk_avg": round(sum(tok) / len(tok), 1) if tok else None,
+            "tokens_per_chunk_max": max(tok) if tok else None,
+            "elapsed_s": round(elapsed, 3),
+            "chunks_per_sec": round(stats["upserted_total"] / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def _prepare_docs(self, docs, stats: dict):
+        """문서별 (문서, 청크 목록, 청크 해시 목록)을 만들고 등장 문서 수를 기록."""
+        for d in docs:
+            chunks = self._chunk_doc(d.get("raw_text", ""))
+            hashes = [chunk_hash(c) for c in chunks]
+            self.chunk_cache.record_occurrences(d["id"], hashes)
+            if self.chunker is not None and chunks:
+                stats["chunk_tokens"].extend(self.chunker.count_tokens(chunks))
+            yield d, chunks, hashes
+
+    def _chunk_stage(
+        self, docs, embed_q: queue.Queue, write_q: queue.Queue, errors: list, stats: dict, deferred: list
+    ) -> None:
+        """
+        1단계: 문서를 청크로 쪼개고, 문서 경계를 넘어 batch_size씩 묶어 임베딩 큐로 보낸다.
+        - 캐시에 벡터가 있는 청크는 임베딩을 건너뛰고 바로 쓰기 큐로
+        - 이번 실행에서 이미 임베딩 큐로 보낸 청크와 같은 청크는 deferred로(마지막에 캐시에서 채움)
+        """
+        batch: List[Tuple[str, str, Dict[str, Any]]] = []
+        reuse_recs: List[Tuple[str, str, Dict[str, Any]]] = []
+        reuse_vecs: List[List[float]] = []
+        sent: set = set()   # 이번 실행에서 임베딩 큐로 보낸 해시
+        try:
+            prepared = self._prepare_docs(docs, stats)
+            dropped: set = set()
+            if self.boilerplate_max_docs is not None:
+                # 등장 문서 수를 알려면 먼저 전부 청킹해야 함(청킹은 임베딩에 비해 아주 쌈)
+                prepared = list(prepared)
+                df = self.chunk_cache.doc_freq(h for _, _, hashes in prepared for h in hashes)
+                dropped = {h for h, n in df.items() if n > self.boilerplate_max_docs}
+
+            for d, chunks, hashes in prepared:
+                if errors:
+                    break
+                doc_id = d["id"]
+                url = d.get("url", "")
+                title = d.get("title", "")
+                source = d.get("source", "")
+                date_published = d.get("date_published", "")
+                # 발행일이 없거나 못 읽으면 수집 시각으로 대신 (기간 필터에서 통째로 빠지지 않도록)
+                ts = _published_ts(date_published) or _published_ts(d.get("date_crawled", ""))
+                lang = d.get("lang", "")
+
+                self._journal("mark_chunked", doc_id, sum(1 for h in hashes if h not in dropped))
+                cached = self.chunk_cache.get_many(h for h in hashes if h not in dropped and h not in sent)
+                for i, (c, h) in enumerate(zip(chunks, hashes)):
+                    if h in dropped:
+                        stats["dropped_boilerplate"] += 1
+                        continue
+                    stats["chunks_total"] += 1
+                    rec = (_chunk_id(doc_id, i), c, _chunk_metadata(
+                        doc_id, url, title, source, date_published, i, c, h, self.index_version, ts, lang
+                    ))
+                    if h in cached:
+                        reuse_recs.append(rec)
+                        reuse_vecs.append(cached[h])
+                        stats["reused_total"] += 1
+                        if len(reuse_recs) >= self.batch_size:
+                            self._journal("add_embedded", _doc_counts(reuse_recs))   # 배치 단위로 기록
+                            write_q.put((reuse_recs, reuse_vecs))
+                            reuse_recs, reuse_vecs = [], []
+                    elif h in sent:
+                        deferred.append(rec)
+                        stats["reused_total"] += 1
+                    else:
+                        sent.add(h)
+                        batch.append(rec)
+                        if len(batch) >= self.batch_size:
+                            embed_q.put(batch)
+                            batch = []
+            if not errors:
+                if batch:
+                    embed_q.put(batch)
+                if reuse_recs:
+                    self._journal("add_embedded", _doc_counts(reuse_recs))
+                    write_q.put((reuse_recs, reuse_vecs))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            # 임베딩 워커마다 종료 신호 하나씩
+            for _ in range(self.embed_workers):
+                embed_q.put(_STOP)
+
+    def _embed_stage(self, embed_q: queue.Queue, write_q: queue.Queue, errors: list, stats: dict) -> None:
+        """2단계: 배치를 임베딩해서 쓰기 큐로 넘긴다. (워커 여러 개가 동시에 실행)"""
+        while True:
+            batch = embed_q.get()
+            if batch is _STOP:
+                break
+            if errors:
+                continue
+            try:
+                embs = self._embed_batch([text for _, text, _ in batch])
+                # 안전 체크
+                if len(embs) != len(batch):
+                    raise RuntimeError("임베딩 개수와 청크 개수가 일치하지 않습니다.")
+                self.chunk_cache.put_many({meta["chunk_hash"]: e for (_, _, meta), e in zip(batch, embs)})
+                with self._stats_lock:
+                    stats["embed_calls"] += 1
+                    stats["embedded_new"] += len(embs)
+                self._journal("add_embedded", _doc_counts(batch))
+                write_q.put((batch, embs))
+            except BaseException as e:
+                errors.append(e)
+        write_q.put(_STOP)
+
+    def _write_stage(self, write_q: queue.Queue, errors: list, stats: dict) -> None:
+        """3단계: 임베딩된 청크를 upsert_batch_size만큼 모아서 Chroma에 한 번에 쓴다."""
+        ids: List[str] = []
+        documents: List[str] = []
+        embeddings: List[List[float]] = []
+        metadatas: List[Dict[str, Any]] = []
+
+        @traced("indexer.upsert")
+        def flush():
+            current_span().set(records=len(ids))
+            stats["upserted_total"] += self.vdb.upsert_records(ids, documents, embeddings, metadatas)
+            self._journal("add_upserted", dict(Counter(m["doc_id"] for m in metadatas)))
+            ids.clear(); documents.clear(); embeddings.clear(); metadatas.clear()
+
+        stops = 0
+        while stops < self.embed_workers:
+            item = write_q.get()
+            if item is _STOP:
+                stops += 1
+                continue
+            if errors:
+                continue
+            try:
+                batch, embs = item
+                for (cid, text, meta), emb in zip(batch, embs):
+                    ids.append(cid)
+                    documents.append(text)
+                    embeddings.append(emb)
+                    metadatas.append(meta)
+                stats["embedded_total"] += len(embs)
+                if len(ids) >= self.upsert_batch_size:
+                    flush()
+            except BaseException as e:
+                errors.append(e)
+
+        if ids and not errors:
+            try:
+                flush()
+            except BaseException as e:
+                errors.append(e)
+
+    def _write_deferred(self, deferred: list, stats: dict) -> None:
+        """이번 실행 안에서 중복된 청크: 먼저 나온 청크의 벡터가 캐시에 들어간 뒤 한꺼번에 업서트."""
+        if not deferred:
+            return
+        vecs = self.chunk_cache.get_many(meta["chunk_hash"] for _, _, meta in deferred)
+        for i in range(0, len(deferred), self.upsert_batch_size):
+            part = deferred[i:i + self.upsert_batch_size]
+            stats["upserted_total"] += self.vdb.upsert_records(
+                [cid for cid, _, _ in part],
+                [text for _, text, _ in part],
+                [vecs[meta["chunk_hash"]] for _, _, meta in part],
+                [meta for _, _, meta in part],
+            )
+            stats["embedded_total"] += len(part)
+            self._journal("add_embedded", _doc_counts(part))
+            self._journal("add_upserted", _doc_counts(part))
+
+    def _journal(self, method: str, *args) -> None:
+        """실행 중인 job이 있을 때만 저널에 기록."""
+        if self._job_id is not None:
+            getattr(self.journal, method)(self._job_id, *args)
+
+def _doc_counts(records) -> Dict[int, int]:
+    """(id, text, meta) 레코드 묶음에서 문서별 청크 수."""
+    return dict(Counter(meta["doc_id"] for _, _, meta in records))
@@ -0,0 +1,495 @@
+# src/vector_store/mmap_index.py
+"""
+- Chroma 컬렉션을 "읽기 전용 float32 행렬 파일(np.memmap) + id/필터 열"로 떠 두는 검색 인덱스입니다.
+- 검색은 NumPy 행렬곱 한 번(정확 검색) 또는 IVF(군집 몇 개만 훑기)로 top-k를 구합니다.
+  → Chroma query가 매번 전체 후보를 훑고 직렬화하는 비용이 없어 지연이 짧고 일정합니다.
+- 파일을 mmap으로 열기 때문에 여러 서버 프로세스가 같은 페이지(OS 페이지 캐시)를 복사 없이 함께 씁니다.
+- 본문(documents)/메타데이터는 인덱스에 두지 않습니다(프로세스마다 힙에 올라가면 벡터보다 큼).
+  meta.json에는 id와 where 필터에 쓰는 필드(FILTER_FIELDS)만 있고, 본문/메타데이터는 검색기가
+  고른 후보만 Chroma에서 id로 가져옵니다.
+- 컬렉션 버전(CollectionRegistry)이 바뀌면 백그라운드에서 새로 떠서 교체합니다.
+  새 버전이 준비되기 전에는 None(→ Chroma로 검색). 이전 버전 결과가 새 버전 결과처럼 캐시되지 않도록.
+  다른 프로세스가 이미 떠 둔 같은 버전이 있으면 그 파일을 그대로 엽니다.
+- (선택) quantization="int8"|"binary"면 압축 코드(차원별 int8 / 부호 비트)를 따로 만들어 1차 검색은 코드로 하고,
+  상위 k*rescore_factor개만 float 벡터(mmap이라 그 행의 페이지만 읽힘)로 정확히 다시 계산합니다.
+  truncate_dim을 주면 앞쪽 차원만 코드로 만듭니다(Matryoshka식 임베딩용). 상주 메모리는 코드 크기 정도.
+  속도: binary는 float 정확 검색보다 2배 이상 빠름. int8은 float와 비슷한 속도(NumPy에 int8 행렬곱이 없어
+  작은 블록씩 float로 펼쳐 곱함)라 메모리 절약용. (tests/quantization_check.py로 측정)
+
+파일 구조
+  <base_dir>/<collection>/CURRENT          # 지금 쓰는 버전 폴더 이름
+  <base_dir>/<collection>/v<ver>-<ts>/
+      vectors.f32   # N x dim float32 (행 순서 = ids 순서)
+      meta.json     # ids, filters(FILTER_FIELDS 열), dim, space, version
+      ivf.npz       # (선택) 군집 중심, 군집별 행 번호
+      codes.i8 / codes.b1 + quant.npz   # (선택) 압축 코드, 복원 파라미터/복원 벡터 제곱 노름
+"""
+
+import json, os, shutil, threading, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_PAGE = 1000   # Chroma에서 한 번에 읽어올 청크 수
+_BLOCK = 65536 # binary 코드로 1차 검색할 때 한 번에 계산하는 행 수 (임시 메모리 상한)
+_SCAN_ROWS = 64 # int8 코드를 float로 펼쳐 곱하는 행 수 (버퍼가 CPU 캐시에 들어가는 크기)
+QUANTIZATIONS = ("none", "int8", "binary")
+# rescore_factor를 안 주면 코덱별 기본값 (binary는 후보를 넉넉히 다시 계산해야 recall이 나옴)
+DEFAULT_RESCORE = {"none": 1, "int8": 4, "binary": 20}
+# where 필터에 쓰는 메타데이터 필드 (search.build_where가 만드는 조건). 이것만 인덱스에 열로 저장
+FILTER_FIELDS = ("published_ts", "source", "lang")
+
+class MmapVectorIndex:
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.collection: str = meta["collection"]
+        self.version: int = meta["version"]
+        self.space: str = meta.get("space", "l2")
+        self.ids: List[str] = meta["ids"]
+        n, dim = len(self.ids), meta["dim"]
+        self.vectors = (
+            np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(n, dim))
+            if n else np.zeros((0, dim), dtype=np.float32)
+        )
+        self.quantization: str = meta.get("quantization", "none")
+        self.truncate_dim: int = meta.get("truncate_dim", 0)
+        self.codes = None
+        if self.quantization != "none" and n:
+            self._load_codes(path, n)
+            self.sq_norms = None   # float 벡터 전체를 읽지 않도록, 다시 계산할 행만 그때그때
+        else:
+            self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors) if n else np.zeros(0, dtype=np.float32)
+        # 필터 필드 → (값 있음 여부, 숫자 열, 문자열 열). 여는 김에 한 번 펼쳐 두고 JSON 리스트는 버림
+        self._columns: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+            key: _column(values) for key, values in meta.get("filters", {}).items()
+        }
+        self.centroids = self.lists = self.offsets = None
+        ivf = os.path.join(path, "ivf.npz")
+        if os.path.exists(ivf):
+            z = np.load(ivf)
+            self.centroids, self.lists, self.offsets = z["centroids"], z["lists"], z["offsets"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def codec(self) -> Tuple[str, int]:
+        return self.quantization, self.truncate_dim
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """검색에 늘 필요한 부분(코드 또는 float 행렬)과 필요할 때만 읽는 float 행렬 크기."""
+        floats = int(self.vectors.nbytes)
+        if self.codes is None:
+            return {"resident": floats + int(self.sq_norms.nbytes), "on_demand": 0}
+        extra = sum(int(a.nbytes) for a in (self.code_sq_norms, self.code_offset, self.code_scale) if a is not None)
+        return {"resident": int(self.codes.nbytes) + extra, "on_demand": floats}
+
+    def _load_codes(self, path: str, n: int) -> None:
+        z = np.load(os.path.join(path, "quant.npz"))
+        d = self.code_dim = int(z["dim"])
+        self.code_sq_norms = z["sq_norms"]
+        self.code_offset = z["offset"] if "offset" in z else None
+        self.code_scale = z["scale"] if "scale" in z else None
+        if self.quantization == "int8":
+            self.codes = np.memmap(os.path.join(path, "codes.i8"), dtype=np.int8, mode="r", shape=(n, d))
+        else:
+            self.codes = np.memmap(os.path.join(path, "codes.b1"), dtype=np.uint8, mode="r", shape=(n, (d + 7) // 8))
+
+    # ---------------- build ---------------- #
+
+    @staticmethod
+    def build(
+        col, path: str, collection: str, version: int, ivf_nlist: int = 0,
+        quantization: str = "none", truncate_dim: int = 0,
+    ) -> str:
+        """Chroma 컬렉션을 페이지 단위로 읽어 path에 기록 (메모리에 전체 행렬을 올리지 않음)."""
+        os.makedirs(path, exist_ok=True)
+        ids: List[str] = []
+        filters: Dict[str, List[Any]] = {key: [] for key in FILTER_FIELDS}
+        dim = 0
+        with open(os.path.join(path, "vectors.f32"), "wb") as f:
+            offset = 0
+            while True:
+                res = col.get(limit=_PAGE, offset=offset, include=["embeddings", "metadatas"])
+                page_ids = res.get("ids") or []
+                if not page_ids:
+                    break
+                vecs = np.asarray(res["embeddings"], dtype=np.float32)
+                dim = vecs.shape[1]
+                f.write(vecs.tobytes())
+                ids.extend(page_ids)
+                for m in res["metadatas"]:
+                    for key, values in filters.items():
+                        values.append((m or {}).get(key))
+                offset += len(page_ids)
+
+        space = (getattr(col, "metadata", None) or {}).get("hnsw:space", "l2")
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "collection": collection, "version": version, "space": space, "dim": dim,
+                "ids": ids, "filters": filters,
+                "quantization": quantization, "truncate_dim": truncate_dim,
+            }, f, ensure_ascii=False)
+
+        if quantization != "none" and ids:
+            vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(len(ids), dim))
+            _write_codes(vectors, path, quantization, truncate_dim)
+
+        if ivf_nlist and len(ids) > ivf_nlist * 4:
+            vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(len(ids), dim))
+            centroids, lists, offsets = _train_ivf(vectors, ivf_nlist)
+            np.savez(os.path.join(path, "ivf.npz"), centroids=centroids, lists=lists, offsets=offsets)
+        return path
+
+    # ---------------- search ---------------- #
+
+    def query(
+        self, q: List[float], k: int, where: Optional[Dict[str, Any]] = None, n_probe: int = 8,
+        rescore_factor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Chroma col.query와 같은 모양의 결과(질문 1개), 본문/메타데이터는 빼고:
+        {"ids": [[...]], "distances": [[...]], "embeddings": [[...]]}
+        (documents/metadatas는 호출하는 쪽이 고른 id만 Chroma에서 가져옴)
+        압축 코드가 있으면 코드로 상위 k*rescore_factor개를 고른 뒤 float 벡터로 다시 계산.
+        """
+        Q = np.asarray(q, dtype=np.float32)
+        rescore_factor = rescore_factor or DEFAULT_RESCORE[self.quantization]
+        rows = self._probe_rows(Q, n_probe) if self.centroids is not None else None
+        mask = self._mask(where) if where else None
+        if rows is not None and mask is not None:
+            rows = rows[mask[rows]]
+        elif mask is not None:
+            rows = np.flatnonzero(mask)
+
+        if self.codes is not None:
+            cand = rows if rows is not None else np.arange(len(self.ids))
+            if len(cand) > k * rescore_factor:
+                approx = self._code_distances(Q, rows)
+                r = max(k, k * rescore_factor)
+                cand = np.sort(cand[np.argpartition(approx, r - 1)[:r]])  # 오름차순 행 → mmap 읽기가 순차적
+            V = np.asarray(self.vectors[cand])
+            d = self._distances(V @ Q, np.einsum("ij,ij->i", V, V), Q)
+        elif rows is None:
+            d = self._distances(self.vectors @ Q, self.sq_norms, Q)
+            cand = np.arange(len(d))
+        else:
+            d = self._distances(self.vectors[rows] @ Q, self.sq_norms[rows], Q)
+            cand = rows
+
+        k = min(k, len(d))
+        if k <= 0:
+            return {"ids": [[]], "distances": [[]], "embeddings": [[]]}
+        top = np.argpartition(d, k - 1)[:k]
+        top = top[np.argsort(d[top], kind="stable")]
+        idx = cand[top]
+        return {
+            "ids": [[self.ids[i] for i in idx]],
+            "distances": [d[top].astype(float).tolist()],
+            "embeddings": [list(self.vectors[idx])],
+        }
+
+    def _distances(self, dots: np.ndarray, sq_norms: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        # Chroma와 같은 거리: l2는 제곱 거리, cosine은 1-cos, ip는 1-dot
+        if self.space == "cosine":
+            return 1 - dots / (np.sqrt(sq_norms) * np.linalg.norm(Q) + 1e-12)
+        if self.space == "ip":
+            return 1 - dots
+        return np.maximum(sq_norms + float(Q @ Q) - 2 * dots, 0)
+
+    def _code_distances(self, Q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """
+        압축 코드로 구한 근사 거리(작을수록 가까움, 순위만 맞으면 됨). rows가 None이면 전체 행.
+        전체 행은 연속 구간(slice)으로 읽고, 일부 행(IVF/필터)만 블록마다 모아서 계산.
+        """
+        q = Q[: self.code_dim]
+        n = len(self.ids) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        if self.quantization == "binary":
+            qbits = np.packbits(q > self.code_offset)
+            for s in range(0, n, _BLOCK):
+                codes = self.codes[s:s + _BLOCK] if rows is None else self.codes[rows[s:s + _BLOCK]]
+                out[s:s + len(codes)] = np.bitwise_count(np.bitwise_xor(codes, qbits)).sum(axis=1)
+            return out
+        # int8: x ≈ offset + (code + 128) * scale → q·x ≈ q·offset + (q*scale)·(code + 128)
+        # 블록 전체를 한 번에 float로 바꾸면(fancy index + astype) 큰 임시 배열을 메모리에 썼다 읽느라
+        # float 정확 검색보다 느림 → 캐시에 들어가는 작은 float 버퍼 하나를 재사용하며 블록마다 곱함
+        qs = (q * self.code_scale).astype(np.float32)
+        dots = np.empty(n, dtype=np.float32)
+        buf = np.empty((_SCAN_ROWS, self.code_dim), dtype=np.float32)
+        gather = np.empty((_SCAN_ROWS, self.code_dim), dtype=np.int8) if rows is not None else None
+        all_codes = self.codes.view(np.ndarray)   # memmap 슬라이스마다 붙는 서브클래스 비용 없이
+        for s in range(0, n, _SCAN_ROWS):
+            if rows is None:
+                codes = all_codes[s:s + _SCAN_ROWS]
+            else:
+                part = rows[s:s + _SCAN_ROWS]
+                codes = np.take(all_codes, part, axis=0, out=gather[:len(part)])
+            b = buf[:len(codes)]
+            np.copyto(b, codes, casting="unsafe")
+            np.matmul(b, qs, out=dots[s:s + len(codes)])
+        dots += float(q @ self.code_offset) + 128.0 * float(qs.sum())
+        sq = self.code_sq_norms if rows is None else self.code_sq_norms[rows]
+        qq = float(q @ q)
+        if self.space == "cosine":
+            out[:] = 1 - dots / (np.sqrt(sq) * np.sqrt(qq) + 1e-12)
+        elif self.space == "ip":
+            out[:] = 1 - dots
+        else:
+            out[:] = sq + qq - 2 * dots
+        return out
+
+    def _probe_rows(self, Q: np.ndarray, n_probe: int) -> np.ndarray:
+        scores = self.centroids @ (Q / (np.linalg.norm(Q) + 1e-12))
+        probe = np.argsort(-scores)[: max(1, n_probe)]
+        return np.concatenate([self.lists[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+
+    # ---------------- where 필터 ---------------- #
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Chroma where 문법($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin)을 필터 열 단위로 평가."""
+        n = len(self.ids)
+        mask = np.ones(n, dtype=bool)
+        for key, cond in where.items():
+            if key == "$and":
+                for c in cond:
+                    mask &= self._mask(c)
+            elif key == "$or":
+                m = np.zeros(n, dtype=bool)
+                for c in cond:
+                    m |= self._mask(c)
+                mask &= m
+            else:
+                if key not in self._columns:
+                    raise ValueError(f"unsupported where field: {key} (mmap index keeps {FILTER_FIELDS})")
+                mask &= self._field_mask(self._columns[key], cond)
+        return mask
+
+    @staticmethod
+    def _field_mask(column: Tuple[np.ndarray, np.ndarray, np.ndarray], cond: Any) -> np.ndarray:
+        # Chroma처럼 키가 없는 청크는 어떤 조건에도 걸리지 않음
+        present, num, strs = column
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        mask = present.copy()
+
+        def pick(v):
+            return (num, v) if isinstance(v, (int, float)) and not isinstance(v, bool) else (strs, str(v))
+
+        for op, v in cond.items():
+            if op in ("$eq", "$ne"):
+                arr, x = pick(v)
+                mask &= (arr == x) if op == "$eq" else (arr != x)
+            elif op in ("$in", "$nin"):
+                v = list(v)
+                arr = num if v and all(pick(x)[0] is num for x in v) else strs
+                vals = v if arr is num else [str(x) for x in v]
+                hit = np.isin(arr, vals)
+                mask &= hit if op == "$in" else ~hit
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                with np.errstate(invalid="ignore"):
+                    mask &= {"$gt": num > v, "$gte": num >= v, "$lt": num < v, "$lte": num <= v}[op]
+            else:
+                raise ValueError(f"unsupported where operator: {op}")
+        return mask
+
+def _column(values: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """필터 필드 값 목록 → (값 있음 여부, 숫자 열, 문자열 열)."""
+    present = np.array([v is not None for v in values], dtype=bool)
+    num = np.array(
+        [v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in values],
+        dtype=np.float64,
+    )
+    strs = np.array(["" if v is None else str(v) for v in values])
+    return present, num, strs
+
+def _write_codes(vectors: np.ndarray, path: str, quantization: str, truncate_dim: int = 0) -> None:
+    """
+    float 행렬 → 압축 코드 파일. (페이지 단위로 읽고 써서 전체를 메모리에 올리지 않음)
+    - int8: 차원별 최솟값/간격으로 0~255 구간에 맞춘 뒤 -128 (scale = (max-min)/255)
+    - binary: 차원별 평균을 뺀 부호 비트를 8개씩 묶음 (해밍 거리 ≈ 각도 거리, 평균을 빼야 비트가 고르게 갈림)
+    truncate_dim > 0이면 앞쪽 차원만 사용.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"unknown quantization: {quantization}")
+    n, dim = vectors.shape
+    d = min(truncate_dim, dim) if truncate_dim else dim
+    extra: Dict[str, np.ndarray] = {}
+    if quantization == "binary":
+        total = np.zeros(d, dtype=np.float64)
+        for s in range(0, n, _PAGE):
+            total += vectors[s:s + _PAGE, :d].sum(axis=0)
+        mean = (total / max(1, n)).astype(np.float32)
+        extra = {"offset": mean}
+    elif quantization == "int8":
+        lo = np.full(d, np.inf, dtype=np.float32)
+        hi = np.full(d, -np.inf, dtype=np.float32)
+        for s in range(0, n, _PAGE):
+            block = vectors[s:s + _PAGE, :d]
+            np.minimum(lo, block.min(axis=0), out=lo)
+            np.maximum(hi, block.max(axis=0), out=hi)
+        scale = np.maximum(hi - lo, 1e-12) / 255.0
+        extra = {"offset": lo, "scale": scale.astype(np.float32)}
+    sq_norms = np.empty(n, dtype=np.float32)
+    fname = "codes.i8" if quantization == "int8" else "codes.b1"
+    with open(os.path.join(path, fname), "wb") as f:
+        for s in range(0, n, _PAGE):
+            block = np.asarray(vectors[s:s + _PAGE, :d], dtype=np.float32)
+            if quantization == "int8":
+                codes = (np.clip(np.rint((block - lo) / scale), 0, 255) - 128).astype(np.int8)
+                recon = lo + (codes.astype(np.float32) + 128) * scale
+                sq_norms[s:s + len(block)] = np.einsum("ij,ij->i", recon, recon)
+            else:
+                codes = np.packbits(block > mean, axis=1)
+                sq_norms[s:s + len(block)] = np.einsum("ij,ij->i", block, block)
+            f.write(codes.tobytes())
+    np.savez(os.path.join(path, "quant.npz"), dim=d, sq_norms=sq_norms, **extra)
+
+def _train_ivf(vectors: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """정규화한 벡터로 간단한 k-means → (중심, 군집 순서로 정렬한 행 번호, 군집별 시작 위치)."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    X = np.asarray(vectors, dtype=np.float32)
+    X = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
+    centroids = X[rng.choice(n, size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(X @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = X[assign == c]
+            if len(members):
+                v = members.mean(axis=0)
+                centroids[c] = v / (np.linalg.norm(v) + 1e-12)
+    assign = np.argmax(X @ centroids.T, axis=1)
+    lists = np.argsort(assign, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+    return centroids, lists, offsets
+
+class MmapIndexManager:
+    """
+    컬렉션 버전별 MmapVectorIndex를 관리.
+    - current(col, name, version): 그 버전 그대로인 인덱스(없으면 None → Chroma로 검색).
+      버전이 바뀌었으면 백그라운드 스레드에서 새로 떠서 교체하고, 그동안은 None.
+      (이전 버전으로 검색하면 그 결과가 새 버전 이름으로 시맨틱/답변 캐시에 들어가 재색인 뒤에도 남음)
+    - min_rebuild_interval_s: 색인 워커가 자주 쓰는 동안 매번 다시 뜨지 않도록 최소 간격.
+    - quantization/truncate_dim이 디스크의 인덱스와 다르면(설정 변경) 버전이 같아도 다시 뜸.
+    """
+    def __init__(
+        self, base_dir: str, ivf_nlist: int = 0, n_probe: int = 8, min_rebuild_interval_s: float = 60.0,
+        quantization: str = "none", truncate_dim: int = 0, rescore_factor: Optional[int] = None,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"unknown quantization: {quantization}")
+        self.base_dir = base_dir
+        self.ivf_nlist = ivf_nlist
+        self.n_probe = n_probe
+        self.codec = (quantization, truncate_dim)
+        self.rescore_factor = rescore_factor or DEFAULT_RESCORE[quantization]
+        self.min_rebuild_interval_s = min_rebuild_interval_s
+        self.lock = threading.Lock()
+        self.index: Optional[MmapVectorIndex] = None
+        self._building = False
+        self._last_build = 0.0
+        self._seen: Dict[str, str] = {}   # 컬렉션 → 마지막으로 읽은 CURRENT 값
+
+    def current(self, col, collection: str, version: int) -> Optional[MmapVectorIndex]:
+        idx = self.index
+        if idx is not None and idx.collection == collection and idx.version == version and idx.codec == self.codec:
+            return idx
+        # 다른 프로세스가 새로 떠 둔 게 있으면 바로 열기
+        on_disk = self._load_current(collection)
+        if on_disk is not None:
+            self.index = on_disk
+            if on_disk.version == version and on_disk.codec == self.codec:
+                return on_disk
+        self._maybe_rebuild(col, collection, version)
+        # 다른 컬렉션(별칭 전환 직후)이나 이전 버전의 인덱스는 쓰지 않음 (새 버전이 뜰 때까지 Chroma)
+        return None
+
+    def _maybe_rebuild(self, col, collection: str, version: int) -> None:
+        with self.lock:
+            if self._building or time.time() - self._last_build < self.min_rebuild_interval_s:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, args=(col, collection, version), daemon=True).start()
+
+    def _rebuild(self, col, collection: str, version: int) -> None:
+        root = os.path.join(self.base_dir, collection)
+        lock = _try_lock(root)
+        if lock is None:   # 다른 프로세스가 뜨는 중 → 끝나면 CURRENT로 받아 감
+            with self.lock:
+                self._building = False
+                self._last_build = time.time()
+            return
+        name = f"v{version}-{int(time.time() * 1000)}"
+        tmp = os.path.join(root, f".{name}.tmp")
+        try:
+            MmapVectorIndex.build(col, tmp, collection, version, self.ivf_nlist, *self.codec)
+            os.replace(tmp, os.path.join(root, name))
+            _write_atomic(os.path.join(root, "CURRENT"), name)
+            self.index = MmapVectorIndex(os.path.join(root, name))
+            self._seen[collection] = name
+            _cleanup(root, keep={name})
+            print(f"[MMAP] {collection} v{version}: {len(self.index)} vectors ({self.codec[0]}, {self.index.memory_bytes()})")
+        except Exception as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            print(f"[WARN] mmap index build failed ({collection} v{version}): {e}")
+        finally:
+            os.remove(lock)
+            with self.lock:
+                self._building = False
+                self._last_build = time.time()
+
+    def _load_current(self, collection: str) -> Optional[MmapVectorIndex]:
+        """CURRENT가 가리키는 폴더가 바뀌었을 때만 새로 연다 (meta.json을 매 검색마다 읽지 않도록)."""
+        root = os.path.join(self.base_dir, collection)
+        try:
+            with open(os.path.join(root, "CURRENT"), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+            if self._seen.get(collection) == name:
+                return None
+            self._seen[collection] = name
+            return MmapVectorIndex(os.path.join(root, name))
+        except (OSError, ValueError, KeyError):
+            return None
+
+_managers: Dict[str, MmapIndexManager] = {}
+_managers_lock = threading.Lock()
+
+def get_mmap_index(base_dir: str, **kwargs) -> MmapIndexManager:
+    """프로세스 공용 매니저 (UI가 Retriever를 새로 만들어도 열어 둔 인덱스를 그대로 씀)."""
+    with _managers_lock:
+        if base_dir not in _managers:
+            _managers[base_dir] = MmapIndexManager(base_dir, **kwargs)
+        return _managers[base_dir]
+
+def _try_lock(root: str, stale_s: float = 1800.0) -> Optional[str]:
+    """프로세스 사이 빌드 잠금 파일 (O_EXCL). 오래된 잠금(죽은 프로세스)은 치우고 다시 시도."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, ".build.lock")
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < stale_s:
+                    return None
+                os.remove(path)
+            except OSError:
+                return None
+    return None
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def _cleanup(root: str, keep: set) -> None:
+    # 다른 프로세스가 아직 열고 있어도 (리눅스에서는) 지워도 매핑은 유지됨
+    for d in os.listdir(root):
+        full = os.path.join(root, d)
+        if d not in keep and os.path.isdir(full) and not d.startswith("."):
+            shutil.rmtree(full, ignore_errors=True)
@@ -0,0 +1,201 @@
+# tests/answer_multi_check.py
+"""
+목적:
+- Answerer.answer_multi가 검색/프롬프트를 한 번만 만들고 모델 호출을 동시에 보내는지 확인.
+  1) 모델 2개 비교: 검색 1번, 두 모델이 같은 프롬프트(같은 Evidence)를 받음, 생성이 겹쳐서 돌아감
+     (전체 시간 ≈ 가장 느린 모델, 합보다 짧음)
+  2) 결과가 모델별 answer()를 따로 부른 것과 같음 (답변/출처)
+  3) 한 모델이 실패해도 다른 모델 결과는 정상, 실패한 모델만 error
+  4) 여러 스레드에서 서로 다른 질문으로 동시에 불러도 결과가 섞이지 않음
+
+사전조건:
+- 없음 (Solar API 대신 가짜 클라이언트, Chroma/SQLite는 임시 디렉터리에 가짜 기사로 색인).
+  설정(configs/*.yaml)은 그대로 읽되 답변 캐시는 끔.
+
+실행:
+  python -m tests.answer_multi_check
+"""
+
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from src.utils.config import AppConfig
+from src.vector_store.indexer import Indexer
+from src.qa.answerer import Answerer
+
+_DELAY_S = {"solar-pro": 0.4, "solar-mini": 0.25}
+
+class _FakeSolar:
+    """
+    임베딩: 글자 2-gram 해시 벡터 (비슷한 글이면 가까움).
+    생성: 모델별로 정해진 시간만큼 쉬고, 동시에 몇 개가 돌고 있었는지 기록. "broken" 모델은 실패.
+    """
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts: List[tuple] = []   # (model, user_prompt)
+
+    def _vec(self, text: str) -> List[float]:
+        v = [0.0] * self.dim
+        for w in text.split():
+            for i in range(len(w) - 1):
+                v[int(hashlib.md5(w[i:i + 2].encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        n = math.sqrt(sum(x * x for x in v)) or 1.0
+        return [x / n for x in v]
+
+    def embed_passage(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        return [self._vec(t) for t in texts]
+
+    def generate(self, system_prompt: str, user_prompt: str, model: str = "solar-pro", max_tokens: int = 600) -> str:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.prompts.append((model, user_prompt))
+        try:
+            if model == "broken":
+                raise RuntimeError("500 Internal Server Error (fake)")
+            time.sleep(_DELAY_S.get(model, 0.1))
+            return f"{model} 답변 (프롬프트 {hashlib.sha1(user_prompt.encode('utf-8')).hexdigest()[:8]})"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+class _MemStore:
+    def __init__(self, docs: List[Dict[str, Any]], db_path: str):
+        self.docs = docs
+        self.db_path = db_path
+
+    def fetch_all(self, limit: int = 200):
+        return self.docs[:limit]
+
+    def fetch_by_ids(self, ids):
+        ids = set(ids)
+        return [d for d in self.docs if d["id"] in ids]
+
+_TOPICS = {
+    "규제": "유럽연합 인공지능 규제 법안이 의회를 통과했다. 고위험 인공지능 시스템은 위험 평가와 투명성 의무를 진다.",
+    "반도체": "삼성전자와 SK하이닉스가 고대역폭 메모리 반도체 생산을 늘린다. 인공지능 가속기 수요가 급증했다.",
+    "모델": "오픈AI가 새 언어 모델을 공개했다. 추론 성능이 좋아졌고 긴 문맥을 처리할 수 있다.",
+    "로봇": "휴머노이드 로봇 스타트업이 대규모 투자를 유치했다. 물류 창고에서 시범 운영을 시작한다.",
+}
+QUESTIONS = {
+    "규제": "유럽 인공지능 규제 법안 내용은?",
+    "반도체": "고대역폭 메모리 반도체 생산 동향은?",
+    "모델": "오픈AI 새 언어 모델의 특징은?",
+    "로봇": "휴머노이드 로봇 투자 소식은?",
+}
+
+def _make_docs() -> List[Dict[str, Any]]:
+    today = datetime.now(timezone.utc).isoformat()
+    docs = []
+    for t, (topic, body) in enumerate(_TOPICS.items()):
+        for j in range(5):
+            doc_id = t * 10 + j + 1
+            docs.append({
+                "id": doc_id, "url": f"https://example.com/{doc_id}", "title": f"{topic} 기사 {j + 1}",
+                "source": "example", "date_published": today, "lang": "ko",
+                "raw_text": "\n".join(f"{body} ({j + 1}-{k}번째 문단, 관련 업계 반응도 이어졌다.)" for k in range(4)),
+            })
+    return docs
+
+def build_answerer(tmp: str, solar: _FakeSolar) -> Answerer:
+    """임시 디렉터리에 가짜 기사를 색인하고 가짜 Solar를 쓰는 Answerer를 만든다."""
+    cfg = AppConfig()
+    cfg.chroma_dir = os.path.join(tmp, "chroma")
+    cfg.sqlite_path = os.path.join(tmp, "app.db")
+    cfg.solar_api_key = cfg.solar_api_key or "test-key"   # 실제 호출은 안 함
+    cfg.app.setdefault("generation", {})["answer_cache"] = {"enabled": False}
+    Indexer(
+        _MemStore(_make_docs(), cfg.sqlite_path), cfg.chroma_dir, solar,
+        max_chars=400, overlap=40, min_chunk_chars=50,
+    ).index_recent()
+    answerer = Answerer(cfg)
+    answerer.solar = solar
+    answerer.retriever.solar = solar
+    return answerer
+
+def _count_searches(answerer: Answerer) -> List[str]:
+    """retriever.search 호출을 기록하도록 감싸고, 기록 리스트를 돌려줌."""
+    calls: List[str] = []
+    search = answerer.retriever.search
+    def counted(question, *args, **kwargs):
+        calls.append(question)
+        return search(question, *args, **kwargs)
+    answerer.retriever.search = counted
+    return calls
+
+def _urls(res: Dict[str, Any]) -> List[str]:
+    return [s.get("url") for s in res.get("sources") or []]
+
+def main():
+    problems: List[str] = []
+
+    def check(cond: bool, msg: str) -> None:
+        print(("  ok   " if cond else "  FAIL ") + msg)
+        if not cond:
+            problems.append(msg)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        solar = _FakeSolar()
+        answerer = build_answerer(tmp, solar)
+        searches = _count_searches(answerer)
+        models = ["solar-pro", "solar-mini"]
+        q = QUESTIONS["규제"]
+
+        print("[1] answer_multi: one retrieval, concurrent generation")
+        answerer.answer_multi(q, models)   # 질문 임베딩/컬렉션 열기 등 첫 호출 비용 제외
+        searches.clear(); solar.prompts.clear(); solar.max_in_flight = 0
+        t0 = time.perf_counter()
+        multi = answerer.answer_multi(q, models)
+        elapsed = time.perf_counter() - t0
+        check([r["model"] for r in multi] == models, "results follow the models order")
+        check(all(r["error"] is None for r in multi), f"no errors: {[r['error'] for r in multi]}")
+        check(len(searches) == 1, f"retrieval ran once for {len(models)} models (ran {len(searches)})")
+        check(len({p for _, p in solar.prompts}) == 1, "every model got the same prompt")
+        check(_urls(multi[0]) == _urls(multi[1]) and _urls(multi[0]), "every model got the same sources")
+        check(solar.max_in_flight == len(models), f"generation calls overlapped (max in flight {solar.max_in_flight})")
+        check(elapsed < sum(_DELAY_S.values()),
+              f"wall time {elapsed:.2f}s < sum of model times {sum(_DELAY_S.values()):.2f}s")
+
+        print("[2] answer_multi == answer() per model")
+        for res in multi:
+            single = answerer.answer(q, model=res["model"])
+            check(single["error"] is None and single["answer"] == res["answer"] and _urls(single) == _urls(res),
+                  f"{res['model']}: same answer and sources as answer()")
+
+        print("[3] one model fails")
+        searches.clear()
+        mixed = answerer.answer_multi(q, ["solar-pro", "broken"])
+        check(mixed[0]["error"] is None and mixed[1]["error"], f"only the broken model errors: {[r['error'] for r in mixed]}")
+        check(len(searches) == 1, "retrieval still ran once")
+
+        print("[4] concurrent answer_multi from several threads")
+        expected = {topic: _urls(answerer.answer(question)) for topic, question in QUESTIONS.items()}
+        jobs = [(topic, question) for topic, question in QUESTIONS.items()] * 3
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            outs = list(pool.map(lambda job: (job[0], answerer.answer_multi(job[1], models)), jobs))
+        mismatched = [topic for topic, res in outs if any(_urls(r) != expected[topic] for r in res)]
+        errors = [r["error"] for _, res in outs for r in res if r["error"]]
+        check(not errors, f"{len(jobs)} concurrent calls without errors {errors[:2]}")
+        check(all(expected.values()) and not mismatched,
+              f"each call got the sources of its own question (mismatched: {mismatched})")
+
+    if problems:
+        print(f"[FAIL] {len(problems)} check(s) failed")
+        raise SystemExit(1)
+    print("[OK] answer_multi shares one retrieval and runs models concurrently")
+
+if __name__ == "__main__":
+    main()
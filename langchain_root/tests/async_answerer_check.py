@@ -0,0 +1,150 @@
+# tests/async_answerer_check.py
+"""
+목적:
+- AsyncAnswerer(async QA 파이프라인)를 동시에 여러 요청으로 돌렸을 때 확인할 것.
+  1) answer() 여러 개를 gather: 모두 성공, 질문마다 동기 Answerer.answer()와 같은 출처, 생성 호출이 겹쳐 돌아감
+  2) 그동안 이벤트 루프가 막히지 않음 (검색/Chroma/SQLite 답변 캐시는 스레드 풀에서)
+     → 옆에서 10ms 간격으로 도는 코루틴의 최대 지연으로 확인. 답변 캐시를 켠 상태에서 두 번(miss → hit) 돌림
+  3) answer_multi: 검색 1번, 모델 호출 동시에
+  4) 생성 도중 취소해도 다음 요청은 정상
+
+사전조건:
+- 없음 (Solar API 대신 가짜 클라이언트, Chroma/SQLite는 임시 디렉터리. 준비는 tests.answer_multi_check와 같음).
+
+실행:
+  python -m tests.async_answerer_check
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from src.qa.async_answerer import AsyncAnswerer
+from src.sql.answer_cache import AnswerCache
+from tests.answer_multi_check import QUESTIONS, _FakeSolar, _count_searches, _urls, build_answerer
+
+_DELAY_S = {"solar-pro": 0.3, "solar-mini": 0.2}
+
+class _FakeAsyncSolar:
+    """AsyncSolarClient 흉내: 임베딩은 동기 가짜와 같은 벡터, 생성은 asyncio.sleep으로 기다림."""
+    def __init__(self, sync: _FakeSolar):
+        self.sync = sync
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def embed_query(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        await asyncio.sleep(0.02)
+        return self.sync.embed_query(texts)
+
+    async def generate(self, system_prompt: str, user_prompt: str, model: str = "solar-pro", max_tokens: int = 600) -> str:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(_DELAY_S.get(model, 0.1))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        # 동기 가짜와 같은 답변 문자열
+        return f"{model} 답변 (프롬프트 {hashlib.sha1(user_prompt.encode('utf-8')).hexdigest()[:8]})"
+
+    async def aclose(self) -> None:
+        pass
+
+async def _max_stall(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """stop될 때까지 interval마다 깨어나며, 예정보다 가장 늦게 깬 시간(초)."""
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t0 - interval)
+    return worst
+
+async def _gather_with_stall(coros) -> tuple:
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(_max_stall(stop))
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*coros)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    return results, elapsed, await watcher
+
+async def _run(aa: AsyncAnswerer, fake: _FakeAsyncSolar, expected: Dict[str, List[str]], searches: List[str], check) -> None:
+    questions = list(QUESTIONS.values()) * 2
+
+    print("[1] concurrent answer()")
+    results, elapsed, stall = await _gather_with_stall(aa.answer(q, model="solar-mini") for q in questions)
+    check(all(r["error"] is None for r in results), f"{len(questions)} concurrent answers without errors")
+    check(all(_urls(r) == expected[q] for q, r in zip(questions, results)),
+          "each answer has the same sources as the sync Answerer.answer()")
+    check(fake.max_in_flight > 1, f"generation calls overlapped (max in flight {fake.max_in_flight})")
+    check(elapsed < len(questions) * _DELAY_S["solar-mini"],
+          f"wall time {elapsed:.2f}s < serial {len(questions) * _DELAY_S['solar-mini']:.2f}s")
+
+    print("[2] event loop stays responsive (answer cache on)")
+    check(stall < 0.1, f"cache-miss round: worst loop stall {stall * 1000:.0f} ms")
+    results, _, stall = await _gather_with_stall(aa.answer(q, model="solar-mini") for q in questions)
+    check(all(r.get("cached") for r in results), "second round is served from the answer cache")
+    check(stall < 0.1, f"cache-hit round: worst loop stall {stall * 1000:.0f} ms")
+
+    print("[3] answer_multi")
+    searches.clear()
+    fake.max_in_flight = 0
+    multi = await aa.answer_multi("휴머노이드 로봇 스타트업 소식 정리", ["solar-pro", "solar-mini"])
+    check(all(r["error"] is None for r in multi) and _urls(multi[0]) == _urls(multi[1]) and _urls(multi[0]),
+          "both models answered from the same sources")
+    check(len(searches) == 1, f"retrieval ran once (ran {len(searches)})")
+    check(fake.max_in_flight == 2, f"model calls overlapped (max in flight {fake.max_in_flight})")
+
+    print("[4] cancellation")
+    task = asyncio.ensure_future(aa.answer("오픈AI 새 언어 모델 소식 요약", model="solar-pro"))
+    while fake.in_flight == 0 and not task.done():
+        await asyncio.sleep(0.01)
+    task.cancel()
+    try:
+        await task
+        check(False, "cancelled answer() raised CancelledError")
+    except asyncio.CancelledError:
+        check(fake.cancelled == 1 and fake.in_flight == 0, "in-flight generate call was cancelled")
+    after = await aa.answer(QUESTIONS["반도체"], model="solar-mini")
+    check(after["error"] is None and _urls(after) == expected[QUESTIONS["반도체"]], "next request still works")
+
+def main():
+    problems: List[str] = []
+
+    def check(cond: bool, msg: str) -> None:
+        print(("  ok   " if cond else "  FAIL ") + msg)
+        if not cond:
+            problems.append(msg)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        solar = _FakeSolar()
+        answerer = build_answerer(tmp, solar)
+        expected = {q: _urls(answerer.answer(q, model="solar-mini")) for q in QUESTIONS.values()}
+        check(all(expected.values()), "sync answers found sources for every question")
+        answerer.answer_cache = AnswerCache(os.path.join(tmp, "answer_cache.db"))
+        searches = _count_searches(answerer)
+
+        fake = _FakeAsyncSolar(solar)
+        aa = AsyncAnswerer(answerer, fake, retrieval_workers=4)
+
+        async def run() -> None:
+            try:
+                await _run(aa, fake, expected, searches, check)
+            finally:
+                await aa.aclose()
+
+        asyncio.run(run())
+
+    if problems:
+        print(f"[FAIL] {len(problems)} check(s) failed")
+        raise SystemExit(1)
+    print("[OK] AsyncAnswerer answers concurrently without blocking the event loop")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# tests/chunker_check.py
+"""
+목적:
+- SQLite에 저장된 문서로 예전 simple_chunk(글자 기준)와 TokenChunker(chunking.yaml, 토큰/문장 기준)를 비교.
+- 문서당 청크 수, 청크당 토큰 수(평균/최소/최대)를 출력해서 청크가 너무 작거나 크게 묶이지 않는지 확인.
+- 먼저 DB 없이 만든 글로 토큰 상한 확인: 짧은 문장들 뒤에 상한에 가까운 긴 문장이 오면
+  오버랩을 붙여도 청크가 상한(tokens)을 넘지 않아야 함 (tokens=100, overlap 0.15, 긴 문장 96토큰 근처).
+
+사전조건:
+- 수집(ingest)이 한 번 이상 돌아 documents 테이블에 문서가 있어야 함 (상한 확인은 DB 없이 돎).
+
+실행:
+  python -m tests.chunker_check
+"""
+
+from src.utils.config import AppConfig
+from src.sql.db import SqlStore
+from src.vector_store.indexer import simple_chunk
+from src.vector_store.chunker import TokenChunker
+
+def _summary(name, per_doc, token_counts):
+    n_docs = len(per_doc)
+    n_chunks = sum(per_doc)
+    print(f"[{name}]")
+    print(f"  chunks/doc  : avg={n_chunks / max(n_docs, 1):.2f}  min={min(per_doc, default=0)}  max={max(per_doc, default=0)}")
+    if token_counts:
+        avg = sum(token_counts) / len(token_counts)
+        print(f"  tokens/chunk: avg={avg:.1f}  min={min(token_counts)}  max={max(token_counts)}")
+
+def _sentence(chunker, tag: str, target: int) -> str:
+    """토큰 수가 target을 넘지 않는 선에서 가장 긴 문장 (토크나이저가 달라도 길이를 맞춤)."""
+    words = []
+    while chunker.counter.count(" ".join(words + [f"{tag}{len(words)}"]) + ".") <= target:
+        words.append(f"{tag}{len(words)}")
+    return " ".join(words) + "."
+
+def _budget_check(tokenizer=None, tokenizer_path=None) -> bool:
+    chunker = TokenChunker(tokens=100, overlap_ratio=0.15, min_chars=20, tokenizer=tokenizer, tokenizer_path=tokenizer_path)
+    shorts = [_sentence(chunker, f"s{k}w", 8) for k in range(14)]
+    long = _sentence(chunker, "L", 96)
+    text = " ".join(shorts + [long] + [_sentence(chunker, f"t{k}w", 8) for k in range(6)])
+    chunks = chunker.chunk(text)
+    counts = chunker.count_tokens(chunks)
+    ok = max(counts) <= chunker.tokens and any(long in c for c in chunks)
+    print(f"[BUDGET] tokens={chunker.tokens} overlap={chunker.overlap_tokens}  chunk tokens={counts}  "
+          f"{'ok' if ok else 'FAIL (chunk over budget or long sentence split)'}")
+    return ok
+
+def main():
+    cfg = AppConfig()
+    if not _budget_check(cfg.chunking.get("tokenizer") or None, cfg.chunking.get("tokenizer_path") or None):
+        raise SystemExit(1)
+    store = SqlStore(cfg.sqlite_path)
+    docs = store.fetch_all(limit=50)
+    if not docs:
+        print("[WARN] documents가 비어있습니다. 먼저 수집(ingest)을 실행하세요: python -m app.main")
+        return
+
+    chunker = TokenChunker.from_config(cfg.chunking)
+    print(f"[CHUNKER] version={chunker.version}  tokenizer={chunker.counter.name}  exact={chunker.counter.is_exact}")
+
+    simple_per_doc, simple_tokens = [], []
+    token_per_doc, token_tokens = [], []
+    for d in docs:
+        text = d.get("raw_text", "") or ""
+
+        s_chunks = simple_chunk(text, 1200, 120)
+        simple_per_doc.append(len(s_chunks))
+        simple_tokens.extend(chunker.count_tokens(s_chunks))
+
+        t_chunks = chunker.chunk(text)
+        token_per_doc.append(len(t_chunks))
+        token_tokens.extend(chunker.count_tokens(t_chunks))
+
+    _summary("simple_chunk(1200, 120)", simple_per_doc, simple_tokens)
+    _summary(f"TokenChunker({chunker.tokens} tokens)", token_per_doc, token_tokens)
+
+    # 첫 문서 청크 경계 미리보기 (문장 끝에서 끊기는지 눈으로 확인)
+    first = chunker.chunk(docs[0].get("raw_text", "") or "")
+    print("\n[PREVIEW] 첫 문서 청크 끝부분")
+    for i, c in enumerate(first[:5]):
+        print(f"  {i}: ...{c[-80:]!r}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# tests/index_queue_check.py
+"""
+목적:
+- 색인 큐(IndexQueue)와 색인 워커(IndexWorker.run_once)의 임대(lease) 규칙 확인.
+  1) 중복 enqueue는 무시, 두 워커가 동시에 임대해도 같은 문서를 나눠 갖지 않음
+  2) 임대 만료(visibility timeout) → 다른 워커가 다시 가져감. 늦게 끝난 원래 워커의 ack는 무시됨
+  3) nack → retry_after 뒤에 다시 보임, attempts가 max_attempts에 닿으면 dead로 남고 더는 안 꺼냄
+  4) 워커: 색인 실패 → nack(큐에 남음) → 다음 run_once에서 재시도 성공 → ack(큐에서 빠짐)
+
+사전조건:
+- 없음 (임시 SQLite, 색인기는 가짜. 실제 청킹/임베딩은 tests.indexer_pipeline_check 참고).
+
+실행:
+  python -m tests.index_queue_check
+"""
+
+import os
+import tempfile
+import time
+from typing import List
+
+from src.sql.job_queue import IndexQueue
+from app.worker import IndexWorker
+
+class _FlakyIndexer:
+    """처음 fail_times번은 실패하는 가짜 색인기 (index_ids만 흉내)."""
+    def __init__(self, fail_times: int = 1):
+        self.fail_times = fail_times
+        self.calls: List[List[int]] = []
+
+    def index_ids(self, doc_ids):
+        self.calls.append(list(doc_ids))
+        if len(self.calls) <= self.fail_times:
+            raise RuntimeError("429 Too Many Requests (fake)")
+        return {"upserted_total": 3 * len(doc_ids)}
+
+class _Worker(IndexWorker):
+    """설정/Solar 없이 큐와 색인기만 넣은 워커 (run_once는 그대로 사용)."""
+    def __init__(self, queue: IndexQueue, indexer, worker_id: str):
+        self.queue = queue
+        self.indexer = indexer
+        self.worker_id = worker_id
+        self.batch_size = 10
+        self.visibility_timeout = 30.0
+
+def _ids(leased) -> List[int]:
+    return sorted(d for d, _ in leased)
+
+def main():
+    problems: List[str] = []
+
+    def check(cond: bool, msg: str) -> None:
+        print(("  ok   " if cond else "  FAIL ") + msg)
+        if not cond:
+            problems.append(msg)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.db")
+
+        print("[1] enqueue / lease")
+        q1, q2 = IndexQueue(path, max_attempts=2), IndexQueue(path, max_attempts=2)   # 프로세스 두 개처럼 커넥션 둘
+        check(q1.enqueue([1, 2, 3, 4, 5]) == 5 and q1.enqueue([5, 6]) == 1, "duplicate enqueue is ignored")
+        a = q1.lease("w1", 3, visibility_timeout=0.3)
+        b = q2.lease("w2", 10, visibility_timeout=30)
+        check(not set(_ids(a)) & set(_ids(b)) and sorted(_ids(a) + _ids(b)) == [1, 2, 3, 4, 5, 6],
+              f"two workers split the queue without overlap: w1={_ids(a)} w2={_ids(b)}")
+        q2.ack("w2", _ids(b))
+        check(q1.stats() == {"ready": 0, "leased": 3, "dead": 0}, f"ack removes items: {q1.stats()}")
+
+        print("[2] lease expiry")
+        time.sleep(0.4)
+        c = q2.lease("w3", 10, visibility_timeout=30)
+        check(_ids(c) == _ids(a), f"expired lease is taken by another worker: {_ids(c)}")
+        q1.ack("w1", _ids(a))   # 만료된 뒤에 늦게 끝난 원래 워커
+        check(q1.stats()["leased"] == 3, "late ack from the expired worker does not remove re-leased items")
+
+        print("[3] nack / retry / dead")
+        q2.nack("w3", _ids(c), "boom", retry_after=0)
+        d = q1.lease("w4", 10, visibility_timeout=30)
+        check(d == [] and q1.stats()["dead"] == 3,
+              f"items that reached max_attempts (2) are not leased again: {q1.stats()}")
+        q1.enqueue([7])
+        q1.nack("w5", [7], "not mine", retry_after=0)
+        e = q1.lease("w5", 10, visibility_timeout=30)
+        check(_ids(e) == [7], "nack from a worker that does not hold the lease is ignored")
+        q1.nack("w5", [7], "boom", retry_after=0.3)
+        check(q1.lease("w6", 10, visibility_timeout=30) == [], "nacked item is hidden until retry_after")
+        time.sleep(0.35)
+        check(_ids(q1.lease("w6", 10, visibility_timeout=30)) == [7], "nacked item is visible again after retry_after")
+        q1.ack("w6", [7])
+
+        print("[4] worker run_once")
+        path = os.path.join(tmp, "worker.db")
+        queue = IndexQueue(path, max_attempts=3)
+        queue.enqueue([10, 11, 12])
+        indexer = _FlakyIndexer(fail_times=1)
+        worker = _Worker(queue, indexer, "worker-1")
+        out1 = worker.run_once()
+        check(out1 is not None and "error" in out1 and queue.stats()["ready"] == 0,
+              f"failed batch is nacked and hidden for retry_after: {out1}")
+        queue.conn.execute("UPDATE index_queue SET lease_until=0")   # retry_after(30초) 기다리는 대신
+        out2 = worker.run_once()
+        check(out2 is not None and out2.get("upserted") == 9 and out2.get("docs") == 3, f"retry succeeds: {out2}")
+        check(queue.stats() == {"ready": 0, "leased": 0, "dead": 0}, f"acked batch leaves the queue: {queue.stats()}")
+        check(indexer.calls == [[10, 11, 12], [10, 11, 12]], f"same docs were retried: {indexer.calls}")
+        check(worker.run_once() is None, "empty queue → run_once returns None")
+
+    if problems:
+        print(f"[FAIL] {len(problems)} check(s) failed")
+        raise SystemExit(1)
+    print("[OK] lease / expiry / ack / nack / retry behave as documented")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# tests/indexer_pipeline_check.py
+"""
+목적:
+- 파이프라인 색인(청킹 스레드 → 임베딩 워커 N개 → 모아서 업서트)이 문서 하나씩 차례로 색인한 것과
+  "같은 결과"(청크 id / 본문 / 메타데이터 / 임베딩)를 Chroma에 남기는지 확인.
+  - 파이프라인: embed_workers=4, 문서 경계를 넘는 임베딩 배치, upsert_batch_size 묶음 쓰기
+  - 직렬에 가까운 설정: embed_workers=1, batch_size=1, upsert_batch_size=1, queue_size=1
+  - 기준(reference): 문서마다 청킹 → 임베딩 → 같은 id/메타데이터 규칙으로 직접 만든 결과
+- 다른 기사 본문을 그대로 실은 기사(통신사 전재)가 섞여 있어 "이번 실행에서 이미 임베딩 중인 청크 재사용" 경로도 함께 탐.
+- 임베딩 호출 수가 배치 덕분에 문서 수보다 적은지도 출력.
+
+사전조건:
+- 없음 (Solar API 대신 가짜 임베딩, Chroma/SQLite는 임시 디렉터리).
+
+실행:
+  python -m tests.indexer_pipeline_check
+  python -m tests.indexer_pipeline_check --docs 200
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from src.vector_store.indexer import Indexer, _chunk_id, _chunk_metadata, _published_ts
+from src.sql.chunk_cache import chunk_hash
+
+class _FakeSolar:
+    """텍스트 해시로 만든 결정적 임베딩. 요청마다 조금씩 늦게 돌려줘서 워커들의 완료 순서가 섞이게 함."""
+    def __init__(self, dim: int = 16, seed: int = 0):
+        self.dim = dim
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+
+    def embed_passage(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        with self.lock:
+            self.calls += 1
+            delay = self.rng.uniform(0, 0.01)
+        time.sleep(delay)
+        return [self._vec(t) for t in texts]
+
+    def _vec(self, text: str) -> List[float]:
+        h = hashlib.sha256(text.encode("utf-8")).digest()
+        return [(b - 127.5) / 127.5 for b in h[: self.dim]]
+
+class _MemStore:
+    """Indexer가 쓰는 SqlStore 메서드만 흉내 (문서는 메모리, db_path는 캐시/저널/레지스트리용)."""
+    def __init__(self, docs: List[Dict[str, Any]], db_path: str):
+        self.docs = docs
+        self.db_path = db_path
+
+    def fetch_all(self, limit: int = 200):
+        return self.docs[:limit]
+
+    def fetch_by_ids(self, ids):
+        ids = set(ids)
+        return [d for d in self.docs if d["id"] in ids]
+
+_WORDS = ["정부", "규제", "모델", "반도체", "발표", "투자", "데이터", "서비스", "공개", "출시", "연구", "기업"]
+
+def _make_docs(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    docs = []
+    for i in range(n):
+        if i % 5 == 4:
+            text = docs[-1]["raw_text"]   # 앞 기사를 그대로 실은 전재 기사 → 같은 청크
+        else:
+            paras = []
+            for _ in range(rng.randint(1, 5)):
+                sents = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 14))) + "했다." for _ in range(rng.randint(3, 9))]
+                paras.append(" ".join(sents))
+            text = "\n".join(paras)
+        docs.append({
+            "id": i + 1, "url": f"https://example.com/{i + 1}", "title": f"기사 {i + 1}",
+            "source": "example", "date_published": today, "raw_text": text,
+        })
+    return docs
+
+def _dump(ix: Indexer) -> Dict[str, tuple]:
+    """Chroma 컬렉션 전체 → {청크 id: (본문, 메타데이터, 임베딩)}"""
+    res = ix.vdb.col.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        i: (doc, dict(meta), [round(float(x), 5) for x in emb])
+        for i, doc, meta, emb in zip(res["ids"], res["documents"], res["metadatas"], res["embeddings"])
+    }
+
+def _reference(ix: Indexer, docs: List[Dict[str, Any]], solar: _FakeSolar) -> Dict[str, tuple]:
+    """문서 하나씩: 청킹 → 임베딩 → Indexer와 같은 id/메타데이터 규칙."""
+    out = {}
+    for d in docs:
+        chunks = ix._chunk_doc(d["raw_text"])
+        if not chunks:
+            continue
+        embs = solar.embed_passage(chunks)
+        ts = _published_ts(d["date_published"])
+        for i, (c, e) in enumerate(zip(chunks, embs)):
+            meta = _chunk_metadata(
+                d["id"], d["url"], d["title"], d["source"], d["date_published"], i, c, chunk_hash(c),
+                ix.index_version, ts, d.get("lang", ""),
+            )
+            out[_chunk_id(d["id"], i)] = (c, meta, [round(float(x), 5) for x in e])
+    return out
+
+def _run(tmp: str, name: str, docs: List[Dict[str, Any]], **kwargs):
+    solar = _FakeSolar()
+    root = os.path.join(tmp, name)
+    ix = Indexer(
+        _MemStore(docs, os.path.join(root, "app.db")), os.path.join(root, "chroma"), solar,
+        max_chars=400, overlap=40, min_chunk_chars=50, **kwargs,
+    )
+    t0 = time.perf_counter()
+    result = ix.index_recent(limit_docs=len(docs))
+    return ix, solar, result, time.perf_counter() - t0
+
+def _diff(a: Dict[str, tuple], b: Dict[str, tuple]) -> List[str]:
+    problems = []
+    if set(a) != set(b):
+        problems.append(f"ids differ: only_a={sorted(set(a) - set(b))[:5]} only_b={sorted(set(b) - set(a))[:5]}")
+    for k in sorted(set(a) & set(b)):
+        for part, x, y in zip(("document", "metadata", "embedding"), a[k], b[k]):
+            if x != y:
+                problems.append(f"{k}: {part} differs")
+                break
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=60)
+    args = ap.parse_args()
+
+    docs = _make_docs(args.docs)
+    with tempfile.TemporaryDirectory() as tmp:
+        pipe, pipe_solar, pipe_res, pipe_s = _run(
+            tmp, "pipelined", docs, batch_size=16, embed_workers=4, upsert_batch_size=50, queue_size=2,
+        )
+        serial, serial_solar, serial_res, serial_s = _run(
+            tmp, "serial", docs, batch_size=1, embed_workers=1, upsert_batch_size=1, queue_size=1,
+        )
+        got_pipe, got_serial = _dump(pipe), _dump(serial)
+        expected = _reference(pipe, docs, _FakeSolar())
+
+    print(f"[PIPELINE CHECK] docs={len(docs)}  chunks={len(expected)}")
+    print(f"  pipelined : {pipe_s * 1000:7.1f} ms  embed_calls={pipe_solar.calls:4d}  "
+          f"upserted={pipe_res['upserted_total']}  reused={pipe_res['reused_total']}")
+    print(f"  serial    : {serial_s * 1000:7.1f} ms  embed_calls={serial_solar.calls:4d}  "
+          f"upserted={serial_res['upserted_total']}  reused={serial_res['reused_total']}")
+
+    problems = [f"pipelined vs reference: {p}" for p in _diff(got_pipe, expected)]
+    problems += [f"serial vs reference: {p}" for p in _diff(got_serial, expected)]
+    if pipe_solar.calls >= len(docs):
+        problems.append(f"pipelined run made {pipe_solar.calls} embed calls for {len(docs)} docs (not batched across docs)")
+    if problems:
+        print("[FAIL]")
+        for p in problems[:20]:
+            print("  -", p)
+        raise SystemExit(1)
+    print("[OK] pipelined == serial == reference (ids, documents, metadatas, embeddings)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# tests/indexer_resume_check.py
+"""
+목적:
+- 색인 도중 임베딩 API가 실패(429 등)로 멈춘 뒤, 다시 실행하면 저널(IndexJournal) 기준으로 이어서 끝나는지 확인.
+  1) 중간에 멈춤   : job 상태 failed, 문서 일부만 업서트됨
+  2) 이어서 실행   : 같은 job을 이어받음(resumed), 멈추기 전에 받은 임베딩은 chunk_cache에서 재사용(API 재호출 없음)
+  3) 결과 비교     : 한 번에 끝까지 색인한 컬렉션과 청크 id/본문/메타데이터/임베딩이 같음 (반쯤 쓴 문서도 정리됨)
+  4) 한 번 더 실행 : 모두 건너뜀, 임베딩 호출 0
+  5) 다른 프로세스가 돌리고 있는 job(heartbeat가 최근)은 이어받지 않고, heartbeat가 멈춘 job(죽은 프로세스)만 이어받음
+
+사전조건:
+- 없음 (Solar API 대신 가짜 임베딩, Chroma/SQLite는 임시 디렉터리).
+
+실행:
+  python -m tests.indexer_resume_check
+  python -m tests.indexer_resume_check --fail-after 5
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from src.sql.journal import IndexJournal
+from src.vector_store.indexer import Indexer
+
+class _FakeSolar:
+    """텍스트 해시로 만든 결정적 임베딩. fail_after번째 호출 뒤부터는 429처럼 실패."""
+    def __init__(self, fail_after: Optional[int] = None, dim: int = 16):
+        self.fail_after = fail_after
+        self.dim = dim
+        self.calls = 0
+        self.embedded = 0
+        self.lock = threading.Lock()
+
+    def embed_passage(self, texts: List[str], timeout: int = 60) -> List[List[float]]:
+        with self.lock:
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise RuntimeError("429 Too Many Requests (fake)")
+            self.embedded += len(texts)
+        return [[(b - 127.5) / 127.5 for b in hashlib.sha256(t.encode("utf-8")).digest()[: self.dim]] for t in texts]
+
+class _MemStore:
+    """Indexer가 쓰는 SqlStore 메서드만 흉내 (문서는 메모리, db_path는 캐시/저널/레지스트리용)."""
+    def __init__(self, docs: List[Dict[str, Any]], db_path: str):
+        self.docs = docs
+        self.db_path = db_path
+
+    def fetch_all(self, limit: int = 200):
+        return self.docs[:limit]
+
+    def fetch_by_ids(self, ids):
+        ids = set(ids)
+        return [d for d in self.docs if d["id"] in ids]
+
+_WORDS = ["정부", "규제", "모델", "반도체", "발표", "투자", "데이터", "서비스", "공개", "출시", "연구", "기업"]
+
+def _make_docs(n: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    docs = []
+    for i in range(n):
+        paras = [
+            " ".join(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 14))) + "했다." for _ in range(rng.randint(3, 9)))
+            for _ in range(rng.randint(2, 5))
+        ]
+        docs.append({
+            "id": i + 1, "url": f"https://example.com/{i + 1}", "title": f"기사 {i + 1}",
+            "source": "example", "date_published": today, "raw_text": "\n".join(paras),
+        })
+    return docs
+
+def _indexer(root: str, docs: List[Dict[str, Any]], solar: _FakeSolar) -> Indexer:
+    # embed_workers=1: 어느 배치에서 멈추는지 실행마다 같게
+    return Indexer(
+        _MemStore(docs, os.path.join(root, "app.db")), os.path.join(root, "chroma"), solar,
+        max_chars=400, overlap=40, min_chunk_chars=50, batch_size=8, embed_workers=1, upsert_batch_size=8,
+    )
+
+def _dump(ix: Indexer) -> Dict[str, tuple]:
+    res = ix.vdb.col.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        i: (doc, dict(meta), [round(float(x), 5) for x in emb])
+        for i, doc, meta, emb in zip(res["ids"], res["documents"], res["metadatas"], res["embeddings"])
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=40)
+    ap.add_argument("--fail-after", type=int, default=6, help="이 횟수만큼 임베딩 호출이 성공한 뒤 실패")
+    args = ap.parse_args()
+
+    docs = _make_docs(args.docs)
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 기준: 한 번에 끝까지
+        clean = _indexer(os.path.join(tmp, "clean"), docs, _FakeSolar())
+        clean_res = clean.index_recent(limit_docs=len(docs))
+        expected = _dump(clean)
+
+        # 1) 중간에 멈춤
+        root = os.path.join(tmp, "resume")
+        flaky = _FakeSolar(fail_after=args.fail_after)
+        try:
+            _indexer(root, docs, flaky).index_recent(limit_docs=len(docs))
+            problems.append("first run did not fail")
+        except RuntimeError as e:
+            print(f"[RUN 1] stopped: {e}")
+        journal = IndexJournal(os.path.join(root, "app.db"))
+        job = journal.status()[0]
+        print(f"[RUN 1] job={job['job_id']} status={job['status']}  docs upserted {job['docs_upserted']}/{job['docs_total']}  "
+              f"chunks embedded {job['chunks_embedded']}/{job['chunks_total']}  (embed calls ok={flaky.embedded} chunks)")
+        if job["status"] != "failed":
+            problems.append(f"job status after crash: {job['status']}")
+        if job["docs_upserted"] >= job["docs_total"]:
+            problems.append("crash happened after every doc was upserted (raise --docs or lower --fail-after)")
+
+        # 2) 이어서 실행
+        healthy = _FakeSolar()
+        ix = _indexer(root, docs, healthy)
+        res = ix.index_recent(limit_docs=len(docs))
+        job = journal.status()[0]
+        print(f"[RUN 2] resumed={res['resumed']} job={res['job_id']} docs_resumed={res['docs_resumed']}  "
+              f"embedded_new={res['embedded_new']} reused={res['reused_total']}  status={job['status']}")
+        if not res["resumed"] or res["job_id"] != job["job_id"]:
+            problems.append("second run did not resume the failed job")
+        if job["status"] != "done":
+            problems.append(f"job status after resume: {job['status']}")
+        if healthy.embedded + flaky.embedded != clean_res["embedded_new"]:
+            problems.append(
+                f"chunks embedded twice: before crash {flaky.embedded} + after {healthy.embedded} "
+                f"!= clean run {clean_res['embedded_new']}"
+            )
+
+        # 3) 결과 비교
+        got = _dump(ix)
+        if set(got) != set(expected):
+            problems.append(f"chunk ids differ: missing={sorted(set(expected) - set(got))[:5]} extra={sorted(set(got) - set(expected))[:5]}")
+        diff = [k for k in set(got) & set(expected) if got[k] != expected[k]]
+        if diff:
+            problems.append(f"{len(diff)} chunks differ from the clean run, e.g. {sorted(diff)[:3]}")
+
+        # 4) 한 번 더
+        again = _FakeSolar()
+        res = _indexer(root, docs, again).index_recent(limit_docs=len(docs))
+        print(f"[RUN 3] skipped={res['docs_skipped']}/{len(docs)} embed_calls={again.calls}")
+        if res["docs_skipped"] != len(docs) or again.calls:
+            problems.append("third run re-indexed documents")
+
+        # 5) 살아 있는 job / 죽은 job
+        other = IndexJournal(os.path.join(root, "app.db"), owner="other-host:1")
+        live = other.start(ix.index_version, [1, 2])
+        res = _indexer(root, docs, _FakeSolar()).index_recent(limit_docs=len(docs))
+        job = journal.status()[0]
+        print(f"[RUN 4] live job {live}: resumed={res['resumed']} status={job['status']} owner={job['owner']}")
+        if res["resumed"] or res["job_id"] == live or job["status"] != "running" or job["owner"] != "other-host:1":
+            problems.append("a live job of another process was taken over")
+        other.conn.execute("UPDATE index_jobs SET heartbeat=0 WHERE job_id=?", (live,))   # 그 프로세스가 죽었다고 치고
+        other.conn.commit()
+        again = _FakeSolar()
+        res = _indexer(root, docs, again).index_recent(limit_docs=len(docs))
+        job = journal.status()[0]
+        print(f"[RUN 5] stale job {live}: resumed={res['resumed']} job={res['job_id']} status={job['status']} "
+              f"embed_calls={again.calls}")
+        if not res["resumed"] or res["job_id"] != live or job["status"] != "done" or again.calls:
+            problems.append("a job with a stale heartbeat was not resumed (or re-embedded chunks)")
+
+    if problems:
+        print("[FAIL]")
+        for p in problems:
+            print("  -", p)
+        raise SystemExit(1)
+    print(f"[OK] resumed run == clean run ({len(expected)} chunks), no chunk embedded twice")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# tests/mmr_bench_check.py
+"""
+목적:
+- search.py의 NumPy MMR(_mmr_select)이 예전 순수 파이썬 MMR과 "같은 결과"를 내는지 확인.
+- 후보 수(n_initial)를 15 → 500까지 늘려 가며 두 구현의 실행 시간을 비교.
+  → n_initial(top_k*3)을 키워도 MMR이 병목이 되지 않는지 판단하는 용도.
+
+사전조건:
+- 없음 (API/DB 없이 랜덤 벡터로 돌림). Solar 임베딩 차원(4096)을 기본으로 사용.
+
+실행:
+  python -m tests.mmr_bench_check
+  python -m tests.mmr_bench_check --dim 1024 --k 10
+"""
+
+import argparse
+import math
+import random
+import time
+from typing import List
+
+from src.retriever.search import _mmr_select
+
+# ---- 예전 구현 (비교 기준) ---- #
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x*y for x, y in zip(a, b))
+    na = math.sqrt(sum(x*x for x in a))
+    nb = math.sqrt(sum(y*y for y in b))
+    return dot / (na * nb + 1e-12)
+
+def _mmr_select_py(query_vec, cand_vecs, cand_idxs, k, lambda_coef=0.3):
+    selected: List[int] = []
+    remaining = set(cand_idxs)
+    rel_scores = {i: _cosine(query_vec, cand_vecs[i]) for i in cand_idxs}
+    while remaining and len(selected) < k:
+        best_i = None
+        best_score = -1e9
+        for i in list(remaining):
+            if not selected:
+                score = rel_scores[i]
+            else:
+                max_sim = max(_cosine(cand_vecs[i], cand_vecs[j]) for j in selected)
+                score = lambda_coef * rel_scores[i] - (1 - lambda_coef) * max_sim
+            if score > best_score:
+                best_score = score
+                best_i = i
+        selected.append(best_i)
+        remaining.remove(best_i)
+    return selected
+
+def _vectors(n: int, dim: int, rng: random.Random):
+    # 뉴스 청크처럼 서로 비슷한 벡터가 섞이도록 "주제 중심 + 잡음"으로 생성
+    centers = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(max(3, n // 10))]
+    vecs = []
+    for _ in range(n):
+        c = rng.choice(centers)
+        vecs.append([x + rng.gauss(0, 0.5) for x in c])
+    query = [x + rng.gauss(0, 0.8) for x in centers[0]]
+    return query, vecs
+
+def _time(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - t0) / repeat * 1000, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dim", type=int, default=4096)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--lam", type=float, default=0.3)
+    ap.add_argument("--sizes", default="15,30,60,120,250,500")
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    print(f"[MMR BENCH] dim={args.dim}  k={args.k}  lambda={args.lam}")
+    print(f"{'n_cand':>7} | {'python(ms)':>11} | {'numpy(ms)':>10} | {'speedup':>7} | same")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        query, vecs = _vectors(n, args.dim, rng)
+        idxs = list(range(n))
+        py_ms, py_sel = _time(lambda: _mmr_select_py(query, vecs, idxs, args.k, args.lam), 1)
+        np_ms, np_sel = _time(lambda: _mmr_select(query, vecs, idxs, args.k, args.lam), 5)
+        same = "OK" if py_sel == np_sel else f"DIFF {py_sel} vs {np_sel}"
+        print(f"{n:>7} | {py_ms:>11.1f} | {np_ms:>10.2f} | {py_ms / max(np_ms, 1e-9):>6.1f}x | {same}")
+
+if __name__ == "__main__":
+    main()
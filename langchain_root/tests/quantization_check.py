@@ -0,0 +1,104 @@
+# tests/quantization_check.py
+"""
+목적:
+- mmap 인덱스의 압축 코드(int8 / binary, truncate_dim) 검색이 정확 검색(float32 전체)과
+  얼마나 같은 결과를 내는지(recall@k), 상주 메모리와 검색 시간이 얼마나 줄었는지 비교.
+  → app.yaml retrieval.mmap_index.quantization / truncate_dim / rescore_factor 고를 때 참고.
+
+사전조건:
+- 기본은 API/DB 없이 군집이 있는 랜덤 벡터로 돌림 (Solar 임베딩 차원 4096).
+- --chroma_dir를 주면 실제 Chroma 컬렉션 벡터로 측정 (질문은 컬렉션 벡터에 잡음을 섞어 만듦).
+
+실행:
+  python -m tests.quantization_check
+  python -m tests.quantization_check --n 20000 --dim 1024 --rescore 4 8
+  python -m tests.quantization_check --chroma_dir data/chroma --collection ai_news_rag
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.vector_store.mmap_index import MmapVectorIndex
+
+class _ArrayCollection:
+    """MmapVectorIndex.build가 쓰는 col.get(limit, offset, include)만 흉내 낸 메모리 컬렉션."""
+    metadata = {"hnsw:space": "l2"}
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def get(self, limit, offset, include=None):
+        part = self.vectors[offset:offset + limit]
+        ids = [f"c{i}" for i in range(offset, offset + len(part))]
+        return {"ids": ids, "embeddings": part, "metadatas": [{} for _ in ids]}
+
+def _synthetic(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 200), dim)).astype(np.float32)
+    X = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+def _chroma_vectors(chroma_dir: str, collection: str) -> np.ndarray:
+    import chromadb
+    from chromadb.config import Settings
+    col = chromadb.PersistentClient(path=chroma_dir, settings=Settings(anonymized_telemetry=False)).get_collection(collection)
+    out, offset = [], 0
+    while True:
+        res = col.get(limit=1000, offset=offset, include=["embeddings"])
+        if not len(res["ids"]):
+            break
+        out.append(np.asarray(res["embeddings"], dtype=np.float32))
+        offset += len(res["ids"])
+    return np.concatenate(out)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10000)
+    ap.add_argument("--dim", type=int, default=4096)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--rescore", type=int, nargs="+", default=[4, 20])
+    ap.add_argument("--truncate", type=int, nargs="+", default=[0])
+    ap.add_argument("--chroma_dir", default=None)
+    ap.add_argument("--collection", default="ai_news_rag")
+    args = ap.parse_args()
+
+    X = _chroma_vectors(args.chroma_dir, args.collection) if args.chroma_dir else _synthetic(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    Q = X[rng.integers(len(X), size=args.queries)] + 0.05 * rng.normal(size=(args.queries, X.shape[1])).astype(np.float32)
+    print(f"[DATA] {X.shape[0]} vectors x {X.shape[1]} dim, {args.queries} queries, k={args.k}")
+
+    col = _ArrayCollection(X)
+    tmp = tempfile.mkdtemp(prefix="quant_check_")
+    try:
+        exact = MmapVectorIndex(MmapVectorIndex.build(col, os.path.join(tmp, "none"), "c", 1))
+        t0 = time.perf_counter()
+        truth = [set(exact.query(q, args.k)["ids"][0]) for q in Q]
+        base_ms = (time.perf_counter() - t0) * 1000 / len(Q)
+        base_mem = exact.memory_bytes()["resident"]
+        print(f"{'codec':<22}{'rescore':>8}{'recall@k':>10}{'resident MB':>13}{'ms/query':>10}")
+        print(f"{'float32 (exact)':<22}{'-':>8}{1.0:>10.3f}{base_mem / 2**20:>13.1f}{base_ms:>10.2f}")
+
+        for quant in ("int8", "binary"):
+            for trunc in args.truncate:
+                path = MmapVectorIndex.build(col, os.path.join(tmp, f"{quant}_{trunc}"), "c", 1,
+                                             quantization=quant, truncate_dim=trunc)
+                ix = MmapVectorIndex(path)
+                mem = ix.memory_bytes()["resident"]
+                for rf in args.rescore:
+                    t0 = time.perf_counter()
+                    got = [set(ix.query(q, args.k, rescore_factor=rf)["ids"][0]) for q in Q]
+                    ms = (time.perf_counter() - t0) * 1000 / len(Q)
+                    recall = np.mean([len(g & t) / max(1, len(t)) for g, t in zip(got, truth)])
+                    name = quant + (f" @{trunc}d" if trunc else "")
+                    print(f"{name:<22}{rf:>8}{recall:>10.3f}{mem / 2**20:>13.1f}{ms:>10.2f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
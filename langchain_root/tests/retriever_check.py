@@ -45,5 +45,21 @@ def main():
     print("\n[CONTEXT PREVIEW]")
     print(ctx_preview)
 
+    # 6) 여러 질문 한 번에 (임베딩 1회 + Chroma query 1회) → search()와 결과가 같은지 확인
+    questions = [question, "생성형 AI 규제 동향", "Google의 최신 AI 모델 발표"]
+    batch = retriever.search_many(questions)
+    print("\n[SEARCH_MANY]")
+    for q, res in zip(questions, batch):
+        same = [s["url"] for s in res["sources"]] == [s["url"] for s in retriever.search(q)["sources"]]
+        print(f"- {q}: {len(res['sources'])} sources, same_as_search={same}, vector_ms={res['raw'].get('vector_ms')}")
+
+    # 7) 기사별 묶기 + 이웃 청크 확장 → 기사 수/본문 길이/추가 조회 횟수 비교
+    retriever.group_by_doc, retriever.expand_window = True, 1
+    expanded = retriever.search(question)
+    print("\n[EXPANSION]")
+    print("docs:", len({s["url"] for s in result["sources"]}), "→", len({s["url"] for s in expanded["sources"]}),
+          "| chars:", sum(len(s["text"]) for s in result["sources"]), "→", sum(len(s["text"]) for s in expanded["sources"]),
+          "| expansion_calls:", expanded["raw"]["expansion_calls"])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file